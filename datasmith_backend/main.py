@@ -4,12 +4,15 @@ from pathlib import Path
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
-from src.api.chat_controller import router as chat_router
+from src.api.chat_controller import router as chat_router, admission_controller, interaction_journal, patient_db
+from src.api.admin_controller import router as admin_router
 from src.utils.logger import Logger
+from src.utils.tracing import configure_tracing, shutdown_tracing
+from src.utils.admission import AdmissionMiddleware
 from src.constants.environment_constants import EnvironmentConstants
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import ValidationError
 
 
@@ -22,19 +25,33 @@ Path("src/vector_db").mkdir(parents=True, exist_ok=True)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    Logger.configure()
+    configure_tracing()
     Logger.log_info_message("Starting Post-Discharge Medical AI Assistant...")
     Logger.log_info_message(f"Mode: {EnvironmentConstants.APP_MODE.value}")
     Logger.log_info_message(f"Port: {EnvironmentConstants.PORT.value}")
+    patient_db.start_watching()
     yield
     Logger.log_info_message("Shutting down Post-Discharge Medical AI Assistant...")
+    patient_db.stop_watching()
+    interaction_journal.close()
+    shutdown_tracing()
+    Logger.shutdown()
 
 app = FastAPI(
     title="Post-Discharge Medical AI Assistant",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 
+# only /message is admission-controlled here; WebSocket turns and /batch items take their slots in
+# chat_controller and batch_service. /greeting, /patients and session reads are never queued.
+# Added before CORS so shed responses still carry CORS headers.
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
+
 origins = [
     "http://localhost:8501",  # Streamlit default  
 ]
@@ -75,6 +92,7 @@ async def health_check():
 
 
 app.include_router(chat_router, prefix="/api/v1/chat", tags=["Chat"])
+app.include_router(admin_router, prefix="/api/v1/admin", tags=["Admin"])
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
@@ -0,0 +1,169 @@
+"""
+Benchmark the /patients listing against a large synthetic patients file.
+
+Run from datasmith_backend/:
+    python -m scripts.benchmark_patients [--patients 200000] [--page-size 100] [--queries 50] [--seed 7] [--output FILE]
+
+A patients.json of --patients records is generated with Faker into a temporary
+folder (diagnoses, medications and instructions are drawn from the real
+src/data/patients.json) and loaded through PatientDatabase. The original
+full-list response is timed against paged listings: the first page, a cursor
+walk over the whole file, name-prefix, diagnosis and discharge-date filters,
+their combination, and a projection of every field. Each page is consumed
+through the same JSON stream the route sends. Linear scans for the prefix and
+diagnosis filters are timed for comparison. Results are saved to
+<LOG_FOLDER_PATH>/benchmarks/patients-<timestamp>.json.
+"""
+import json
+import time
+import random
+import orjson
+import itertools
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import date
+from typing import Callable, Dict, List
+from dotenv import load_dotenv
+
+load_dotenv(".env")
+
+from faker import Faker
+from src.tools.patient_db import PatientDatabase, PATIENT_FIELDS, DEFAULT_LISTING_FIELDS
+from src.constants.environment_constants import EnvironmentConstants
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def synthetic_patients(templates: List[Dict], count: int, seed: int) -> List[Dict]:
+    """Faker names and discharge dates over clinical details sampled from the real records"""
+    fake = Faker()
+    Faker.seed(seed)
+    rng = random.Random(seed)
+    patients = []
+    for _ in range(count):
+        template = rng.choice(templates)
+        patients.append({
+            **template,
+            "patient_name": fake.name(),
+            "discharge_date": fake.date_between(start_date=date(2022, 1, 1), end_date=date(2025, 12, 31)).isoformat()
+        })
+    return patients
+
+
+def legacy_listing(db: PatientDatabase) -> bytes:
+    """The original response: every patient built into one list, then serialized"""
+    return orjson.dumps({
+        "patients": [
+            {"name": p["patient_name"], "diagnosis": p["primary_diagnosis"], "discharge_date": p["discharge_date"]}
+            for p in db.patients
+        ]
+    })
+
+
+def timed(fn: Callable[[], object], repeat: int) -> Dict:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "count": repeat,
+        "p50_ms": round(_percentile(latencies, 0.50), 3),
+        "p95_ms": round(_percentile(latencies, 0.95), 3),
+        "max_ms": round(max(latencies), 3)
+    }
+
+
+def consume(db: PatientDatabase, page_size: int, fields=DEFAULT_LISTING_FIELDS, **filters) -> Dict:
+    page = db.list_patients(page_size, **filters)
+    body = b"".join(page.iter_json(fields))
+    return {"records": page.count, "bytes": len(body), "next_cursor": page.next_cursor}
+
+
+def scan_prefix(db: PatientDatabase, prefix: str, limit: int) -> List[Dict]:
+    prefix = prefix.lower()
+    return [p for p in db.patients if any(word.startswith(prefix) for word in p["patient_name"].lower().split())][:limit]
+
+
+def scan_diagnosis(db: PatientDatabase, diagnosis: str, limit: int) -> List[Dict]:
+    diagnosis = diagnosis.lower()
+    return [p for p in db.patients if diagnosis in p["primary_diagnosis"].lower()][:limit]
+
+
+def cursor_walk(db: PatientDatabase, page_size: int) -> Dict:
+    started = time.perf_counter()
+    pages = records = 0
+    cursor = None
+    while True:
+        result = consume(db, page_size, cursor=cursor)
+        pages += 1
+        records += result["records"]
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+    seconds = time.perf_counter() - started
+    return {"pages": pages, "records": records, "seconds": round(seconds, 3), "ms_per_page": round(seconds * 1000 / pages, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /patients paging, filters and projection on a synthetic file")
+    parser.add_argument("--patients", type=int, default=200000, help="synthetic records to generate")
+    parser.add_argument("--page-size", type=int, default=EnvironmentConstants.PATIENTS_PAGE_SIZE.value)
+    parser.add_argument("--queries", type=int, default=50, help="timed requests per scenario")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="results file (default: <LOG_FOLDER_PATH>/benchmarks/patients-<timestamp>.json)")
+    args = parser.parse_args()
+
+    with open(EnvironmentConstants.PATIENTS_JSON_PATH.value, "r") as f:
+        templates = [{k: v for k, v in patient.items() if k not in ("patient_name", "discharge_date")} for patient in json.load(f)]
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "patients.json"
+        started = time.perf_counter()
+        patients = synthetic_patients(templates, args.patients, args.seed)
+        path.write_bytes(orjson.dumps(patients))
+        print(f"Generated {len(patients)} patients ({path.stat().st_size / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s")
+
+        db = PatientDatabase(path)
+        status = db.status()
+        names = [patient["patient_name"] for patient in rng.sample(patients, min(args.queries, len(patients)))]
+        prefixes = [name.split()[-1][:3] for name in names]
+        diagnoses = [template["primary_diagnosis"].split()[0] for template in templates]
+        del patients
+
+        prefix_cycle, diagnosis_cycle = itertools.cycle(prefixes), itertools.cycle(diagnoses)
+        scan_repeat = max(args.queries // 10, 3)
+        date_range = {"discharged_from": "2024-03-01", "discharged_to": "2024-03-31"}
+        legacy_bytes = len(legacy_listing(db))
+        results = {
+            "patients": status["patients"],
+            "file_bytes": path.stat().st_size,
+            "load_seconds": status["load_seconds"],
+            "page_size": args.page_size,
+            "legacy_full_list": {**timed(lambda: legacy_listing(db), scan_repeat), "bytes": legacy_bytes},
+            "first_page": timed(lambda: consume(db, args.page_size), args.queries),
+            "name_prefix": timed(lambda: consume(db, args.page_size, name_prefix=next(prefix_cycle)), args.queries),
+            "name_prefix_linear_scan": timed(lambda: scan_prefix(db, next(prefix_cycle), args.page_size), scan_repeat),
+            "diagnosis": timed(lambda: consume(db, args.page_size, diagnosis=next(diagnosis_cycle)), args.queries),
+            "diagnosis_linear_scan": timed(lambda: scan_diagnosis(db, next(diagnosis_cycle), args.page_size), scan_repeat),
+            "date_range": timed(lambda: consume(db, args.page_size, **date_range), args.queries),
+            "combined": timed(lambda: consume(
+                db, args.page_size, name_prefix=next(prefix_cycle)[:1], diagnosis=next(diagnosis_cycle), **date_range
+            ), args.queries),
+            "all_fields": timed(lambda: consume(db, args.page_size, fields=PATIENT_FIELDS), args.queries),
+            "cursor_walk": cursor_walk(db, EnvironmentConstants.PATIENTS_MAX_PAGE_SIZE.value)
+        }
+
+    output = Path(args.output or Path(EnvironmentConstants.LOG_FOLDER_PATH.value) / "benchmarks" / f"patients-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"args": vars(args), "results": results}, indent=2))
+    print(json.dumps({"results": str(output), **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Benchmark retrieval quality and speed over a grid of chunking, dedupe and HNSW settings.
+
+Run from datasmith_backend/ (sources are converted once; every chunking setting
+is embedded once and then indexed under every HNSW setting):
+    python -m scripts.benchmark_retrieval [--config src/data/retrieval_benchmark.json] [--output FILE] [--apply]
+
+Queries in the labelled set list the concepts a good answer needs, each as
+alternative phrases (synonyms, spellings) a chunk may contain, so labels hold
+across chunk sizes. A chunk containing any phrase of any concept is relevant.
+Reports recall@k (share of a query's concepts covered by the top k), hit@k
+(a relevant chunk in the top k), MRR, index size, build time and query p50/p99
+per setting. The best
+setting by the config's objective is saved with the results; --apply writes it
+into the shard's "chunking" and "hnsw" entries in KNOWLEDGE_SHARDS_PATH, where
+scripts.build_index picks it up.
+"""
+import json
+import time
+import shutil
+import argparse
+import itertools
+import tempfile
+import chromadb
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from chromadb.config import Settings
+
+load_dotenv(".env")
+
+from sentence_transformers import SentenceTransformer
+from docling.document_converter import DocumentConverter
+from src.utils.logger import Logger
+from src.utils.index_artifacts import sha256_file
+from src.tools.rag_tool import RAGTool, load_shard_configs, chunking_settings, collection_metadata
+from src.constants.environment_constants import EnvironmentConstants
+
+
+def expand_grid(grid: Dict) -> List[Dict]:
+    """Every combination of the list-valued keys; scalar keys are shared"""
+    keys = list(grid)
+    values = [grid[key] if isinstance(grid[key], list) else [grid[key]] for key in keys]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def _folder_bytes(folder: Path) -> int:
+    return sum(path.stat().st_size for path in folder.rglob("*") if path.is_file())
+
+
+def query_concepts(query: Dict) -> List[List[str]]:
+    """A query's concepts as lists of alternative phrases; a plain string is a concept with one phrase"""
+    return [
+        [_normalize_text(phrase) for phrase in ([concept] if isinstance(concept, str) else concept)]
+        for concept in query["relevant"]
+    ]
+
+
+def label_chunks(chunks: List[Dict], queries: List[Dict]) -> List[Dict[int, frozenset]]:
+    """Per query: chunk position -> the query's concepts that chunk contains any phrase of"""
+    texts = [_normalize_text(chunk["text"]) for chunk in chunks]
+    labels = []
+    for query in queries:
+        concepts = query_concepts(query)
+        matches = {}
+        for position, text in enumerate(texts):
+            found = frozenset(i for i, phrases in enumerate(concepts) if any(phrase in text for phrase in phrases))
+            if found:
+                matches[position] = found
+        labels.append(matches)
+    return labels
+
+
+def build_collection(folder: Path, embeddings: List[List[float]], chunks: List[Dict], hnsw: Dict):
+    """Index precomputed embeddings the way RAGTool does; returns the collection and seconds spent"""
+    client = chromadb.PersistentClient(path=str(folder), settings=Settings(anonymized_telemetry=False))
+    collection = client.create_collection(name="benchmark", metadata=collection_metadata({"hnsw": hnsw}))
+    started = time.perf_counter()
+    batch_size = 500
+    for i in range(0, len(chunks), batch_size):
+        collection.add(
+            ids=[str(position) for position in range(i, i + len(chunks[i:i + batch_size]))],
+            embeddings=embeddings[i:i + batch_size],
+            documents=[chunk["text"] for chunk in chunks[i:i + batch_size]],
+            metadatas=[chunk["metadata"] for chunk in chunks[i:i + batch_size]]
+        )
+    return collection, time.perf_counter() - started
+
+
+def evaluate(collection, query_embeddings: np.ndarray, labels: List[Dict[int, frozenset]], queries: List[Dict], ks: List[int], repeat: int) -> Dict:
+    """recall@k, hit@k and MRR from one pass; latency from `repeat` timed passes, one query per call as in live search"""
+    max_k = max(ks)
+    rankings = [
+        [int(doc_id) for doc_id in collection.query(query_embeddings=[embedding.tolist()], n_results=max_k)["ids"][0]]
+        for embedding in query_embeddings
+    ]
+
+    recall = {k: [] for k in ks}
+    hits = {k: [] for k in ks}
+    reciprocal_ranks = []
+    for ranking, matches, query in zip(rankings, labels, queries):
+        for k in ks:
+            found = set().union(*(matches.get(position, frozenset()) for position in ranking[:k]))
+            recall[k].append(len(found) / len(query["relevant"]))
+            hits[k].append(float(any(position in matches for position in ranking[:k])))
+        first = next((rank for rank, position in enumerate(ranking, start=1) if position in matches), None)
+        reciprocal_ranks.append(1 / first if first else 0.0)
+
+    latencies = []
+    for _ in range(repeat):
+        for embedding in query_embeddings:
+            started = time.perf_counter()
+            collection.query(query_embeddings=[embedding.tolist()], n_results=max_k)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        **{f"recall@{k}": round(float(np.mean(recall[k])), 4) for k in ks},
+        **{f"hit@{k}": round(float(np.mean(hits[k])), 4) for k in ks},
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+        "query_p50_ms": round(_percentile(latencies, 0.50), 3),
+        "query_p99_ms": round(_percentile(latencies, 0.99), 3)
+    }
+
+
+def pick_best(results: List[Dict], objective: Dict) -> Optional[Dict]:
+    """Highest objective metric within the p99 budget, then MRR, then the faster p50"""
+    if not results:
+        return None
+    metric = objective.get("metric", "mrr")
+    max_p99_ms = objective.get("max_p99_ms")
+    within_budget = [row for row in results if max_p99_ms is None or row["query_p99_ms"] <= max_p99_ms]
+    best = max(within_budget or results, key=lambda row: (row[metric], row["mrr"], -row["query_p50_ms"]))
+    return {**best, "within_latency_budget": bool(within_budget)}
+
+
+def apply_best(shard_name: str, best: Dict):
+    """Write the winning settings into the shard's entry, keeping the file's {SETTING} placeholders"""
+    path = Path(EnvironmentConstants.KNOWLEDGE_SHARDS_PATH.value)
+    with open(path, "r", encoding="utf-8") as f:
+        configs = json.load(f)
+    for config in configs:
+        if config["name"] == shard_name:
+            config["chunking"] = best["chunking"]
+            config["hnsw"] = best["hnsw"]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(configs, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recall@k and latency across chunking and HNSW settings")
+    parser.add_argument("--config", default="src/data/retrieval_benchmark.json", help="grid, query set and objective")
+    parser.add_argument("--output", help="results file (default: <LOG_FOLDER_PATH>/benchmarks/retrieval-<timestamp>.json)")
+    parser.add_argument("--apply", action="store_true", help="write the best settings into the shard config")
+    args = parser.parse_args()
+
+    Logger.configure()
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    with open(config["queries_path"], "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    shard_config = next((shard for shard in load_shard_configs() if shard["name"] == config["shard"]), None)
+    if shard_config is None:
+        raise SystemExit(f"Shard {config['shard']} is not in {EnvironmentConstants.KNOWLEDGE_SHARDS_PATH.value}")
+    sources = [source for source in shard_config.get("sources", []) if Path(source["path"]).exists()]
+    if not sources:
+        raise SystemExit(f"Shard {config['shard']} has no source files")
+
+    ks = sorted(config.get("k", [EnvironmentConstants.RAG_TOP_K.value]))
+    repeat = config.get("repeat", 5)
+    embedding_model = SentenceTransformer(EnvironmentConstants.EMBEDDING_MODEL.value)
+    query_embeddings = np.asarray(
+        embedding_model.encode([query["query"] for query in queries], normalize_embeddings=True, show_progress_bar=False),
+        dtype=np.float32
+    )
+
+    converter = DocumentConverter()
+    documents = [(source["name"], converter.convert(source["path"]).document) for source in sources]
+
+    chunkings = [setting for grid in config["chunking"] for setting in expand_grid(grid)]
+    hnsw_settings = expand_grid(config.get("hnsw", {}))
+    Logger.log_info_message(f"Benchmarking {len(chunkings)} chunkings x {len(hnsw_settings)} HNSW settings on {len(queries)} queries")
+
+    results = []
+    scratch = Path(tempfile.mkdtemp(prefix="retrieval-benchmark-"))
+    try:
+        for chunking in chunkings:
+            chunking = chunking_settings({"chunking": chunking})
+            started = time.perf_counter()
+            chunks = [chunk for name, document in documents for chunk in RAGTool.chunk_document(document, name, chunking)]
+            chunk_seconds = time.perf_counter() - started
+            if not chunks:
+                Logger.log_error_message(Exception("No chunks"), f"Chunking {chunking} produced no chunks")
+                continue
+
+            started = time.perf_counter()
+            embeddings = embedding_model.encode([chunk["text"] for chunk in chunks], show_progress_bar=False).tolist()
+            embed_seconds = time.perf_counter() - started
+            labels = label_chunks(chunks, queries)
+
+            for hnsw in hnsw_settings:
+                folder = scratch / f"run-{len(results)}"
+                collection, index_seconds = build_collection(folder, embeddings, chunks, hnsw)
+                row = {
+                    "chunking": chunking,
+                    "hnsw": hnsw,
+                    # "hybrid" falls back to flat splitting when the chunking extra is missing
+                    "extraction_method": chunks[0]["metadata"]["extraction_method"],
+                    "chunks": len(chunks),
+                    "answerable_queries": sum(1 for matches in labels if matches),
+                    "index_bytes": _folder_bytes(folder),
+                    "chunk_seconds": round(chunk_seconds, 3),
+                    "embed_seconds": round(embed_seconds, 3),
+                    "index_seconds": round(index_seconds, 3),
+                    "build_seconds": round(chunk_seconds + embed_seconds + index_seconds, 3),
+                    **evaluate(collection, query_embeddings, labels, queries, ks, repeat)
+                }
+                results.append(row)
+                shutil.rmtree(folder, ignore_errors=True)
+                print(
+                    f"{chunking['chunker']:>6} size={chunking['chunk_size']:<5} overlap={chunking['chunk_overlap']:<4} "
+                    f"tokens={chunking['max_tokens']:<4} dedupe={'on ' if chunking['dedupe'] else 'off'} {json.dumps(hnsw)} chunks={row['chunks']:<6} "
+                    + " ".join(f"r@{k}={row[f'recall@{k}']:.3f}" for k in ks)
+                    + " " + " ".join(f"hit@{k}={row[f'hit@{k}']:.3f}" for k in ks)
+                    + f" mrr={row['mrr']:.3f} p50={row['query_p50_ms']:.2f}ms p99={row['query_p99_ms']:.2f}ms "
+                    f"size={row['index_bytes'] / 1e6:.1f}MB build={row['build_seconds']:.1f}s"
+                )
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    best = pick_best(results, config.get("objective", {}))
+    output = Path(args.output or Path(EnvironmentConstants.LOG_FOLDER_PATH.value) / "benchmarks" / f"retrieval-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "config": config,
+        "shard": config["shard"],
+        "embedding_model": EnvironmentConstants.EMBEDDING_MODEL.value,
+        "chromadb_version": chromadb.__version__,
+        "sources": [{"name": source["name"], "sha256": sha256_file(Path(source["path"]))} for source in sources],
+        "results": results,
+        "best": best
+    }, indent=2))
+
+    print({"results": str(output), "best": best and {key: best[key] for key in ("chunking", "hnsw", "mrr", "query_p99_ms")}})
+    if best and args.apply:
+        apply_best(config["shard"], best)
+        print(f"Best settings written to {EnvironmentConstants.KNOWLEDGE_SHARDS_PATH.value}; rebuild with python -m scripts.build_index")
+    Logger.shutdown()
+
+
+if __name__ == "__main__":
+    main()
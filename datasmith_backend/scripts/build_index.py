@@ -0,0 +1,93 @@
+"""
+Build the knowledge-base shards offline and package them as one versioned artifact.
+
+Every shard in KNOWLEDGE_SHARDS_PATH with at least one source file becomes a
+collection in the artifact. Run from datasmith_backend/ (docling/OCR can take a
+long time on the full books):
+    python -m scripts.build_index [--version VERSION]
+
+Servers load the newest artifact in INDEX_ARTIFACT_PATH (or INDEX_VERSION) at startup;
+a running server switches with POST /api/v1/admin/index/activate.
+"""
+import time
+import shutil
+import argparse
+import tempfile
+import chromadb
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv(".env")
+
+from src.utils.logger import Logger
+from src.utils.http_cache import compute_version
+from src.utils.index_artifacts import sha256_file
+from src.tools.rag_tool import RAGTool, chunking_settings, collection_metadata
+from src.constants.environment_constants import EnvironmentConstants
+
+
+def build_manifest(rag_tool: RAGTool) -> dict:
+    """Everything that determines the index contents"""
+    shards = {}
+    for config in rag_tool.shard_configs:
+        shard = rag_tool.shards.get(config["name"])
+        if shard is None:
+            continue
+        sample = shard.collection.get(limit=1, include=["metadatas"])["metadatas"]
+        shards[config["name"]] = {
+            "collection_name": config["collection"],
+            "chunk_count": shard.collection.count(),
+            "chunking": {
+                **chunking_settings(config),
+                "extraction_method": sample[0].get("extraction_method") if sample else None
+            },
+            "collection_metadata": collection_metadata(config),
+            "sources": [{
+                "name": source["name"],
+                "bytes": Path(source["path"]).stat().st_size,
+                "sha256": sha256_file(Path(source["path"]))
+            } for source in config.get("sources", []) if Path(source["path"]).exists()]
+        }
+    
+    return {
+        "shards": shards,
+        "chunk_count": sum(shard["chunk_count"] for shard in shards.values()),
+        "embedding_model": EnvironmentConstants.EMBEDDING_MODEL.value,
+        "chromadb_version": chromadb.__version__
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a versioned, checksummed vector index artifact")
+    parser.add_argument("--version", help="artifact version (default: timestamp plus content hash)")
+    args = parser.parse_args()
+
+    Logger.configure()
+    artifact_folder = Path(EnvironmentConstants.INDEX_ARTIFACT_PATH.value)
+    artifact_folder.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".build-", dir=artifact_folder))
+    try:
+        started = time.perf_counter()
+        rag_tool = RAGTool(vector_db_path=staging / "chroma", use_artifacts=False)
+        if not any(rag_tool.chunk_counts().values()):
+            raise SystemExit("Index build produced no chunks")
+
+        manifest = build_manifest(rag_tool)
+        manifest["build_seconds"] = round(time.perf_counter() - started, 1)
+        version = args.version or f"{time.strftime('%Y%m%d%H%M%S')}-{compute_version({k: v for k, v in manifest.items() if k != 'build_seconds'})}"
+
+        archive_path = rag_tool.artifacts.package(staging / "chroma", version, manifest)
+        print({
+            "version": version,
+            "artifact": str(archive_path),
+            "chunks": {name: shard["chunk_count"] for name, shard in manifest["shards"].items()},
+            "bytes": archive_path.stat().st_size,
+            "build_seconds": manifest["build_seconds"]
+        })
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        Logger.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,589 @@
+"""
+Drive chat traffic at a running server and report latency, throughput and shedding.
+
+Run from datasmith_backend/ against a server started separately:
+    python -m scripts.load_test [--base-url URL] [--sessions 20] [--turns 3] [--concurrency 8]
+    python -m scripts.load_test --replay [--journal DIR] [--since YYYY-MM-DD] [--until YYYY-MM-DD] [--speed 1.0]
+    python -m scripts.load_test --soak [--duration 1800] [--users 8] [--sample-interval 15] [--max-rss-mb-per-hour 50] ...
+
+Synthetic traffic: every virtual session identifies a patient listed by
+/patients, then asks --turns questions from src/data/faq_questions.json.
+
+Replay: sessions are rebuilt from the interaction journal and their recorded
+questions sent in order. Sessions start at their recorded offsets and keep the
+recorded think time between turns, both divided by --speed (0 sends back to
+back). Recorded patients are mapped onto patients in the current database and
+the journal's [PATIENT] placeholder is filled with that patient's name. Batch
+records are skipped, since they were not sent through /message.
+
+Soak: the harness starts its own server (uvicorn main:app on --port) with the
+Groq client and web search pointed at local stubs answering after --stub-llm-ms
+and --stub-search-ms, so hours of traffic cost nothing and the stubs' latency
+stays flat. --users virtual users churn sessions for --duration seconds: each
+identifies a patient, asks a few questions with think time, then resets the
+session (--reset-ratio) or abandons it. Every --sample-interval the server's
+RSS and open file descriptors (psutil), traced Python heap (tracemalloc, via
+the admin profiling API) and session count are sampled; per-stage latency is
+read back from the run's interaction journal in --window-seconds windows.
+Least-squares slopes after --warmup-seconds are checked against the
+--max-*-per-hour limits and the run exits with status 1 if any is exceeded.
+The server log and journal are kept in <LOG_FOLDER_PATH>/benchmarks/soak-<timestamp>/.
+
+Results (per-request latency percentiles, status counts including 503 sheds,
+agents and degraded stages) are saved to
+<LOG_FOLDER_PATH>/benchmarks/load-<timestamp>.json (soak-<timestamp>.json for soak runs).
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import httpx
+import psutil
+import random
+import asyncio
+import socket
+import secrets
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from dotenv import load_dotenv
+
+load_dotenv(".env")
+
+from src.services.interaction_journal import read_journal, PATIENT_PLACEHOLDER
+from src.constants.environment_constants import EnvironmentConstants
+
+
+MESSAGE_PATH = "/api/v1/chat/message"
+PATIENTS_PATH = "/api/v1/chat/patients"
+RESET_PATH = "/api/v1/chat/session/{session_id}/reset"
+HEALTH_PATH = "/api/v1/"
+PROFILE_PATH = "/api/v1/admin/profile"
+SNAPSHOT_PATH = "/api/v1/admin/profile/memory/snapshot"
+SNAPSHOT_DIFF_PATH = "/api/v1/admin/profile/memory/diff"
+
+STUB_ANSWER = (
+    "Based on your discharge instructions, keep following your medication schedule, "
+    "watch your fluid and sodium intake, and contact your care team if symptoms get worse. "
+    "If you notice severe swelling, chest pain or shortness of breath, seek emergency care."
+)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def synthetic_plans(patients: List[str], questions: List[str], sessions: int, turns: int, seed: int) -> List[Dict]:
+    """A plan is a start offset plus (delay, message, kind) turns; the first turn identifies the patient"""
+    rng = random.Random(seed)
+    return [
+        {
+            "start": 0.0,
+            "turns": [(0.0, rng.choice(patients), "identify")]
+                     + [(0.0, rng.choice(questions), "question") for _ in range(turns)]
+        }
+        for _ in range(sessions)
+    ]
+
+
+def replay_plans(records: Iterable[Dict], patients: List[str], speed: float) -> List[Dict]:
+    """One plan per journaled session, paced as recorded"""
+    sessions: Dict[str, List[Dict]] = {}
+    for record in records:
+        if record.get("question") and record.get("session") and record.get("channel") != "batch":
+            sessions.setdefault(record["session"], []).append(record)
+    if not sessions:
+        return []
+
+    def started_at(record: Dict) -> float:
+        # ts is stamped when the turn finished
+        return record["ts"] - record.get("latency_ms", {}).get("total", 0) / 1000
+
+    first = min(started_at(turns[0]) for turns in sessions.values())
+    plans = []
+    for turns in sessions.values():
+        patient = patients[int(turns[0]["patient"], 16) % len(patients)]
+        plan_turns = [(0.0, patient, "identify")]
+        previous_end = None
+        for record in turns:
+            think = max(started_at(record) - previous_end, 0.0) if previous_end is not None else 0.0
+            plan_turns.append((
+                think / speed if speed else 0.0,
+                record["question"].replace(PATIENT_PLACEHOLDER, patient),
+                "question"
+            ))
+            previous_end = record["ts"]
+        plans.append({"start": (started_at(turns[0]) - first) / speed if speed else 0.0, "turns": plan_turns})
+    return plans
+
+
+async def send_message(client: httpx.AsyncClient, session_id: str, message: str, kind: str, results: List[Dict], deadline_ms: Optional[int]):
+    """POST one message and record its outcome; returns the status (an exception name on transport errors)"""
+    payload = {"session_id": session_id, "message": message}
+    if deadline_ms:
+        payload["deadline_ms"] = deadline_ms
+    started = time.perf_counter()
+    try:
+        response = await client.post(MESSAGE_PATH, json=payload)
+        status = response.status_code
+        body = response.json() if status == 200 else {}
+    except httpx.HTTPError as e:
+        status, body = type(e).__name__, {}
+    results.append({
+        "kind": kind,
+        "status": status,
+        "at": time.time(),
+        "latency": time.perf_counter() - started,
+        "agent": body.get("agent"),
+        "degraded": body.get("degraded") or []
+    })
+    return status
+
+
+async def run_session(client: httpx.AsyncClient, plan: Dict, semaphore: asyncio.Semaphore, results: List[Dict], deadline_ms: int):
+    await asyncio.sleep(plan["start"])
+    session_id = f"load-{uuid.uuid4().hex[:12]}"
+    for delay, message, kind in plan["turns"]:
+        await asyncio.sleep(delay)
+        async with semaphore:
+            status = await send_message(client, session_id, message, kind, results, deadline_ms)
+        if status != 200 and kind == "identify":
+            # the rest of the session depends on the patient being identified
+            return
+
+
+async def run_plans(base_url: str, plans: List[Dict], concurrency: int, timeout: float, deadline_ms: int):
+    results: List[Dict] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(run_session(client, plan, semaphore, results, deadline_ms) for plan in plans))
+        return results, time.perf_counter() - started
+
+
+def summarize(results: List[Dict], wall_seconds: float) -> Dict:
+    summary = {"requests": len(results), "wall_seconds": round(wall_seconds, 3)}
+    for kind in ("identify", "question"):
+        rows = [row for row in results if row["kind"] == kind]
+        if not rows:
+            continue
+        ok = [row["latency"] * 1000 for row in rows if row["status"] == 200]
+        statuses: Dict[str, int] = {}
+        degraded: Dict[str, int] = {}
+        agents: Dict[str, int] = {}
+        for row in rows:
+            statuses[str(row["status"])] = statuses.get(str(row["status"]), 0) + 1
+            if row["agent"]:
+                agents[row["agent"]] = agents.get(row["agent"], 0) + 1
+            for stage in row["degraded"]:
+                degraded[stage] = degraded.get(stage, 0) + 1
+        summary[kind] = {
+            "count": len(rows),
+            "status": statuses,
+            "agents": agents,
+            "degraded": degraded,
+            "throughput_per_second": round(len(ok) / wall_seconds, 3) if wall_seconds else None,
+            "latency_ms": {
+                "p50": round(_percentile(ok, 0.50), 1),
+                "p95": round(_percentile(ok, 0.95), 1),
+                "p99": round(_percentile(ok, 0.99), 1),
+                "max": round(max(ok), 1)
+            } if ok else None
+        }
+    return summary
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Groq chat completions (POST, plain or streamed) and DuckDuckGo-shaped search results (GET)"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay(self, ms: float):
+        # jittered so requests overlap and queue as they would on a real backend
+        time.sleep(random.uniform(0.5, 1.5) * ms / 1000)
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self._delay(self.server.llm_ms)
+        prompt_tokens = sum(len(message.get("content", "")) for message in request.get("messages", [])) // 4
+        completion_tokens = len(STUB_ANSWER) // 4
+        base = {"id": f"stub-{uuid.uuid4().hex[:12]}", "created": int(time.time()), "model": request.get("model", "stub")}
+        if not request.get("stream"):
+            self._send_json({
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": STUB_ANSWER}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+            })
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in STUB_ANSWER.split(" "):
+            chunk = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        self._delay(self.server.search_ms)
+        self._send_json([
+            {"title": f"Result {i + 1}", "body": STUB_ANSWER, "href": f"https://example.org/result-{i + 1}"}
+            for i in range(int(query.get("max_results", ["3"])[0]))
+        ])
+
+
+class StubBackends:
+    """The LLM and search stubs on one local port, served from background threads"""
+
+    def __init__(self, llm_ms: float, search_ms: float):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.llm_ms = llm_ms
+        self.server.search_ms = search_ms
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="soak-stubs", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def start_server(port: int, stubs_url: str, workdir: Path, admin_token: str, log) -> subprocess.Popen:
+    """uvicorn main:app with the LLM and web search on the stubs and the journal in workdir"""
+    env = {
+        **os.environ,
+        "GROQ_BASE_URL": stubs_url,
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY") or "soak",
+        "WEB_SEARCH_URL": f"{stubs_url}/search",
+        "ADMIN_TOKEN": admin_token,
+        # the tracemalloc routes only exist in PROFILING_APP_MODES
+        "APP_MODE": "test",
+        "JOURNAL_ENABLED": "true",
+        "JOURNAL_FOLDER_PATH": str(workdir / "journal"),
+        "JOURNAL_STORE_QUESTIONS": "false"
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_until_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with status {process.returncode} during startup")
+        try:
+            if (await client.get(HEALTH_PATH)).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(1)
+    raise SystemExit(f"Server not ready after {timeout}s")
+
+
+async def churn_user(client: httpx.AsyncClient, rng: random.Random, patients: List[str], questions: List[str], stop_at: float,
+                     args: argparse.Namespace, results: List[Dict], lifecycle: Dict[str, int]):
+    """Sessions back to back until stop_at: identify, a few questions with think time, then reset or walk away"""
+    while time.monotonic() < stop_at:
+        session_id = f"soak-{uuid.uuid4().hex[:12]}"
+        lifecycle["started"] += 1
+        if await send_message(client, session_id, rng.choice(patients), "identify", results, args.deadline_ms) != 200:
+            lifecycle["failed"] += 1
+            await asyncio.sleep(1)
+            continue
+        for _ in range(rng.randint(1, args.turns)):
+            await asyncio.sleep(rng.expovariate(1 / args.think_seconds) if args.think_seconds else 0)
+            if time.monotonic() >= stop_at:
+                break
+            await send_message(client, session_id, rng.choice(questions), "question", results, args.deadline_ms)
+        if rng.random() < args.reset_ratio:
+            try:
+                await client.post(RESET_PATH.format(session_id=session_id))
+                lifecycle["reset"] += 1
+            except httpx.HTTPError:
+                lifecycle["failed"] += 1
+        else:
+            # the server keeps an abandoned session for as long as it runs
+            lifecycle["abandoned"] += 1
+
+
+async def sample_server(admin: httpx.AsyncClient, headers: Dict, process: psutil.Process, stop_at: float, interval: float, samples: List[Dict]):
+    """RSS, open file descriptors, traced heap and session count every interval, and once more at the end"""
+    while True:
+        sample = {"at": time.time(), "rss_bytes": None, "fds": None, "heap_bytes": None, "sessions": None}
+        try:
+            sample["rss_bytes"] = process.memory_info().rss
+            sample["fds"] = process.num_fds() if hasattr(process, "num_fds") else process.num_handles()
+        except psutil.Error:
+            return
+        try:
+            status = (await admin.get(PROFILE_PATH, headers=headers)).json()
+            if status["tracemalloc"]["tracing"]:
+                sample["heap_bytes"] = status["tracemalloc"]["traced_current_bytes"]
+            sample["sessions"] = status["sessions"]
+        except (httpx.HTTPError, KeyError, ValueError):
+            pass
+        samples.append(sample)
+        if time.monotonic() >= stop_at:
+            return
+        await asyncio.sleep(min(interval, max(stop_at - time.monotonic(), 0)))
+
+
+async def drive_soak(base_url: str, process: subprocess.Popen, questions: List[str], args: argparse.Namespace) -> Dict:
+    results: List[Dict] = []
+    samples: List[Dict] = []
+    lifecycle = {"started": 0, "reset": 0, "abandoned": 0, "failed": 0}
+    headers = {"X-Admin-Token": args.admin_token}
+    users = args.users or args.concurrency
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client, \
+            httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as admin:
+        await wait_until_ready(admin, process, args.startup_timeout)
+        patients = [patient["name"] for patient in (await admin.get(PATIENTS_PATH)).json()["patients"]]
+        if not patients:
+            raise SystemExit("The server has no patients to identify")
+        # the first snapshot starts tracemalloc; the last one is diffed against it
+        heap_tracked = (await admin.post(SNAPSHOT_PATH, headers=headers, json={"label": "soak-start"})).status_code == 200
+
+        rng = random.Random(args.seed)
+        started_at, started = time.time(), time.perf_counter()
+        stop_at = time.monotonic() + args.duration
+        print(f"Soaking {base_url} for {args.duration}s with {users} users")
+        await asyncio.gather(
+            sample_server(admin, headers, psutil.Process(process.pid), stop_at, args.sample_interval, samples),
+            *(churn_user(client, random.Random(rng.random()), patients, questions, stop_at, args, results, lifecycle)
+              for _ in range(users))
+        )
+        wall_seconds = time.perf_counter() - started
+
+        heap_growth = None
+        if heap_tracked:
+            await admin.post(SNAPSHOT_PATH, headers=headers, json={"label": "soak-end"})
+            heap_growth = (await admin.get(SNAPSHOT_DIFF_PATH, headers=headers, params={"limit": 15})).json()
+    return {
+        "started_at": started_at,
+        "wall_seconds": wall_seconds,
+        "results": results,
+        "samples": samples,
+        "lifecycle": lifecycle,
+        "heap_growth": heap_growth
+    }
+
+
+def slope_per_hour(points: List[Tuple[float, float]]) -> Optional[float]:
+    """Least-squares slope of (seconds, value) points, in value per hour"""
+    if len(points) < 3:
+        return None
+    mean_t = sum(t for t, _ in points) / len(points)
+    mean_v = sum(v for _, v in points) / len(points)
+    variance = sum((t - mean_t) ** 2 for t, _ in points)
+    if not variance:
+        return None
+    return sum((t - mean_t) * (v - mean_v) for t, v in points) / variance * 3600
+
+
+def latency_windows(records: Iterable[Dict], results: List[Dict], started_at: float, window: float) -> Dict[str, List[Dict]]:
+    """p50/p95 per window of the run for every journaled stage, plus "client": question round trips as sent"""
+    slots: Dict[str, Dict[int, List[float]]] = {}
+    for record in records:
+        for stage, ms in (record.get("latency_ms") or {}).items():
+            slots.setdefault(stage, {}).setdefault(int((record["ts"] - started_at) // window), []).append(ms)
+    for row in results:
+        if row["kind"] == "question" and row["status"] == 200:
+            slots.setdefault("client", {}).setdefault(int((row["at"] - started_at) // window), []).append(row["latency"] * 1000)
+    return {
+        stage: [
+            {
+                "t": (slot + 0.5) * window,
+                "count": len(values),
+                "p50": round(_percentile(values, 0.50), 1),
+                "p95": round(_percentile(values, 0.95), 1)
+            }
+            for slot, values in sorted(by_slot.items()) if slot >= 0
+        ]
+        for stage, by_slot in sorted(slots.items())
+    }
+
+
+def evaluate_soak(samples: List[Dict], windows: Dict[str, List[Dict]], started_at: float, args: argparse.Namespace) -> Tuple[Dict, List[str]]:
+    """Growth slopes after the warmup and the limits they exceed"""
+    def series(key: str, scale: float = 1.0) -> List[Tuple[float, float]]:
+        return [
+            (sample["at"] - started_at, sample[key] / scale)
+            for sample in samples
+            if sample[key] is not None and sample["at"] - started_at >= args.warmup_seconds
+        ]
+
+    slopes = {
+        "rss_mb_per_hour": slope_per_hour(series("rss_bytes", 2 ** 20)),
+        "heap_mb_per_hour": slope_per_hour(series("heap_bytes", 2 ** 20)),
+        "fds_per_hour": slope_per_hour(series("fds")),
+        "sessions_per_hour": slope_per_hour(series("sessions")),
+        "p50_latency_ms_per_hour": {
+            stage: slope_per_hour([(row["t"], row["p50"]) for row in rows if row["t"] >= args.warmup_seconds])
+            for stage, rows in windows.items()
+        }
+    }
+    limits = {
+        "rss_mb_per_hour": args.max_rss_mb_per_hour,
+        "heap_mb_per_hour": args.max_heap_mb_per_hour,
+        "fds_per_hour": args.max_fds_per_hour
+    }
+    violations = [
+        f"{metric} {slopes[metric]:.2f} > {limit}"
+        for metric, limit in limits.items()
+        if slopes[metric] is not None and slopes[metric] > limit
+    ]
+    violations += [
+        f"{stage} p50_latency_ms_per_hour {slope:.1f} > {args.max_latency_ms_per_hour}"
+        for stage, slope in slopes["p50_latency_ms_per_hour"].items()
+        if slope is not None and slope > args.max_latency_ms_per_hour
+    ]
+    return slopes, violations
+
+
+def run_soak(args: argparse.Namespace) -> bool:
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    benchmarks = Path(EnvironmentConstants.LOG_FOLDER_PATH.value) / "benchmarks"
+    workdir = benchmarks / f"soak-{stamp}"
+    workdir.mkdir(parents=True, exist_ok=True)
+    with open("src/data/faq_questions.json", "r", encoding="utf-8") as f:
+        questions = [faq["question"] for faq in json.load(f)]
+    args.admin_token = secrets.token_urlsafe(16)
+    port = _free_port()
+
+    with StubBackends(args.stub_llm_ms, args.stub_search_ms) as stubs, open(workdir / "server.log", "wb") as log:
+        process = start_server(port, stubs.url, workdir, args.admin_token, log)
+        try:
+            run = asyncio.run(drive_soak(f"http://127.0.0.1:{port}", process, questions, args))
+        finally:
+            # a graceful stop flushes the journal the stage latencies are read from
+            process.terminate()
+            try:
+                process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    windows = latency_windows(read_journal(workdir / "journal"), run["results"], run["started_at"], args.window_seconds)
+    slopes, violations = evaluate_soak(run["samples"], windows, run["started_at"], args)
+    report = {
+        "mode": "soak",
+        "args": {key: value for key, value in vars(args).items() if key != "admin_token"},
+        "passed": not violations,
+        "violations": violations,
+        "slopes": slopes,
+        "lifecycle": run["lifecycle"],
+        "summary": summarize(run["results"], run["wall_seconds"]),
+        "samples": [{**sample, "at": round(sample["at"] - run["started_at"], 1)} for sample in run["samples"]],
+        "latency_windows": windows,
+        "heap_growth": run["heap_growth"],
+        "workdir": str(workdir)
+    }
+    output = Path(args.output or benchmarks / f"soak-{stamp}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(json.dumps({
+        "results": str(output),
+        **{key: report[key] for key in ("passed", "violations", "slopes", "lifecycle")}
+    }, indent=2))
+    return not violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic or journal-replayed chat load against a running server")
+    parser.add_argument("--base-url", default=f"http://localhost:{EnvironmentConstants.PORT.value}")
+    parser.add_argument("--sessions", type=int, default=20, help="synthetic sessions")
+    parser.add_argument("--turns", type=int, default=3, help="questions per synthetic session (at most, per soak session)")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at most")
+    parser.add_argument("--deadline-ms", type=int, help="deadline_ms sent with every message")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request (seconds)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--replay", action="store_true", help="replay sessions from the interaction journal")
+    parser.add_argument("--journal", default=EnvironmentConstants.JOURNAL_FOLDER_PATH.value, help="journal folder to replay")
+    parser.add_argument("--since", help="first journal day to replay (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last journal day to replay (YYYY-MM-DD)")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay pacing multiplier; 0 sends back to back")
+    parser.add_argument("--soak", action="store_true", help="start a server on local LLM/search stubs and churn sessions for --duration")
+    parser.add_argument("--duration", type=float, default=1800, help="soak length (seconds)")
+    parser.add_argument("--users", type=int, help="virtual users churning sessions when soaking (default: --concurrency)")
+    parser.add_argument("--think-seconds", type=float, default=2.0, help="mean pause before each soak question; 0 for none")
+    parser.add_argument("--reset-ratio", type=float, default=0.3, help="share of soak sessions reset at the end; the rest are abandoned")
+    parser.add_argument("--sample-interval", type=float, default=15, help="seconds between RSS/heap/FD samples")
+    parser.add_argument("--window-seconds", type=float, default=60, help="latency percentile window")
+    parser.add_argument("--warmup-seconds", type=float, default=120, help="start of the soak left out of the slopes")
+    parser.add_argument("--startup-timeout", type=float, default=300, help="seconds to wait for the soak server to come up")
+    parser.add_argument("--stub-llm-ms", type=float, default=800, help="mean stub LLM latency")
+    parser.add_argument("--stub-search-ms", type=float, default=300, help="mean stub web search latency")
+    parser.add_argument("--max-rss-mb-per-hour", type=float, default=50)
+    parser.add_argument("--max-heap-mb-per-hour", type=float, default=25)
+    parser.add_argument("--max-fds-per-hour", type=float, default=10)
+    parser.add_argument("--max-latency-ms-per-hour", type=float, default=250, help="p50 growth allowed for any stage")
+    parser.add_argument("--output", help="results file (default: <LOG_FOLDER_PATH>/benchmarks/load-<timestamp>.json)")
+    args = parser.parse_args()
+
+    if args.soak:
+        if not run_soak(args):
+            raise SystemExit(1)
+        return
+
+    patients = [patient["name"] for patient in httpx.get(f"{args.base_url}{PATIENTS_PATH}", timeout=args.timeout).json()["patients"]]
+    if not patients:
+        raise SystemExit("The server has no patients to identify")
+
+    if args.replay:
+        plans = replay_plans(read_journal(Path(args.journal), args.since, args.until), patients, args.speed)
+        if not plans:
+            raise SystemExit(f"No replayable sessions in {args.journal} (journal questions may be disabled)")
+    else:
+        with open("src/data/faq_questions.json", "r", encoding="utf-8") as f:
+            questions = [faq["question"] for faq in json.load(f)]
+        plans = synthetic_plans(patients, questions, args.sessions, args.turns, args.seed)
+
+    print(f"Sending {sum(len(plan['turns']) for plan in plans)} messages in {len(plans)} sessions to {args.base_url}")
+    results, wall_seconds = asyncio.run(run_plans(args.base_url, plans, args.concurrency, args.timeout, args.deadline_ms))
+    summary = summarize(results, wall_seconds)
+
+    output = Path(args.output or Path(EnvironmentConstants.LOG_FOLDER_PATH.value) / "benchmarks" / f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "mode": "replay" if args.replay else "synthetic",
+        "args": vars(args),
+        "sessions": len(plans),
+        "summary": summary
+    }, indent=2))
+    print(json.dumps({"results": str(output), **summary}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Stream, filter or summarize the interaction journal.
+
+Run from datasmith_backend/:
+    python -m scripts.read_journal [--folder DIR] [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+        [--session HASH] [--channel message|ws|batch] [--intent INTENT] [--degraded]
+        [--min-latency-ms MS] [--limit N] [--stats]
+
+Matching records are written to stdout as JSON lines (pipe into jq or a file);
+--stats prints counts, per-stage latency percentiles and token totals instead.
+Segments outside --since/--until are skipped without being decompressed.
+"""
+import sys
+import orjson
+import argparse
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+from dotenv import load_dotenv
+
+load_dotenv(".env")
+
+from src.services.interaction_journal import read_journal
+from src.constants.environment_constants import EnvironmentConstants
+
+
+def build_filter(args: argparse.Namespace) -> Callable[[Dict], bool]:
+    def matches(record: Dict) -> bool:
+        return (
+            (not args.session or record.get("session") == args.session)
+            and (not args.channel or record.get("channel") == args.channel)
+            and (not args.intent or record.get("intent") == args.intent)
+            and (not args.degraded or bool(record.get("degraded")))
+            and (args.min_latency_ms is None or record.get("latency_ms", {}).get("total", 0) >= args.min_latency_ms)
+        )
+    return matches
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def summarize(records: Iterable[Dict]) -> Dict:
+    """Counts, latency p50/p95/max per stage and token totals"""
+    count = 0
+    sessions = set()
+    counts: Dict[str, Dict[str, int]] = {"channel": {}, "intent": {}, "degraded": {}}
+    stages: Dict[str, List[float]] = {}
+    tokens = {"prompt": 0, "completion": 0}
+    faq_hits = 0
+    record_hits = 0
+    for record in records:
+        count += 1
+        sessions.add(record.get("session"))
+        faq_hits += bool(record.get("faq_hit"))
+        record_hits += bool(record.get("record_hit"))
+        for key in ("channel", "intent"):
+            counts[key][str(record.get(key))] = counts[key].get(str(record.get(key)), 0) + 1
+        for stage in record.get("degraded") or []:
+            counts["degraded"][stage] = counts["degraded"].get(stage, 0) + 1
+        for stage, ms in (record.get("latency_ms") or {}).items():
+            stages.setdefault(stage, []).append(ms)
+        for key in tokens:
+            tokens[key] += (record.get("tokens") or {}).get(key, 0)
+
+    return {
+        "records": count,
+        "sessions": len(sessions - {None}),
+        "faq_hits": faq_hits,
+        "record_hits": record_hits,
+        **counts,
+        "latency_ms": {
+            stage: {
+                "count": len(values),
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "max": max(values)
+            }
+            for stage, values in sorted(stages.items())
+        },
+        "tokens": tokens
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream, filter or summarize interaction journal segments")
+    parser.add_argument("--folder", default=EnvironmentConstants.JOURNAL_FOLDER_PATH.value, help="journal folder")
+    parser.add_argument("--since", help="first day to read (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last day to read (YYYY-MM-DD)")
+    parser.add_argument("--session", help="session pseudonym")
+    parser.add_argument("--channel", choices=["message", "ws", "batch"])
+    parser.add_argument("--intent")
+    parser.add_argument("--degraded", action="store_true", help="only turns that degraded a stage")
+    parser.add_argument("--min-latency-ms", type=float, help="only turns at least this slow end to end")
+    parser.add_argument("--limit", type=int, help="stop after this many matching records")
+    parser.add_argument("--stats", action="store_true", help="print a summary instead of the records")
+    args = parser.parse_args()
+
+    matches = build_filter(args)
+    records = (record for record in read_journal(Path(args.folder), args.since, args.until) if matches(record))
+    if args.limit is not None:
+        records = (record for position, record in zip(range(args.limit), records))
+
+    if args.stats:
+        print(orjson.dumps(summarize(records), option=orjson.OPT_INDENT_2).decode())
+        return
+
+    out = sys.stdout.buffer
+    try:
+        for record in records:
+            out.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+    except BrokenPipeError:
+        # piped into head or similar
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Warm the FAQ answer store for every care profile in patients.json.
+
+Run from datasmith_backend/ after discharges are written or the knowledge base is rebuilt:
+    python -m scripts.warm_faq_store [--force]
+"""
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv(".env")
+
+from src.utils.logger import Logger
+from src.tools.patient_db import PatientDatabase
+from src.tools.rag_tool import RAGTool
+from src.tools.web_search import WebSearchTool
+from src.services.embedding_service import EmbeddingService
+from src.services.intent_router import IntentRouter
+from src.services.faq_store import FAQStore
+from src.agents.clinical import ClinicalAgent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute FAQ answers per diagnosis/medication profile")
+    parser.add_argument("--force", action="store_true", help="regenerate answers that are still current")
+    args = parser.parse_args()
+
+    Logger.configure()
+    try:
+        patient_db = PatientDatabase()
+        rag_tool = RAGTool()
+        embedding_service = EmbeddingService(rag_tool.embedding_model)
+        intent_router = IntentRouter(embedding_service)
+        faq_store = FAQStore(embedding_service, rag_tool, patient_db)
+        clinical_agent = ClinicalAgent(rag_tool, WebSearchTool(), intent_router, faq_store)
+
+        summary = faq_store.warm(clinical_agent, force=args.force)
+        print(summary)
+    finally:
+        Logger.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,148 @@
-from typing import Dict, List
+import time
+from typing import Callable, Dict, List, Optional
+from opentelemetry import trace
 from src.tools.rag_tool import RAGTool
 from src.tools.web_search import WebSearchTool
-from src.services.llm_service import LLMService
+from src.services.llm_service import LLMService, CLINICAL_FALLBACK_RESPONSE
+from src.services.intent_router import IntentRouter
+from src.services.faq_store import FAQStore
+from src.services.record_responder import RecordResponder, RECORD_INTENT
+from src.constants.intent_constants import IntentConstant
+from src.constants.degraded_stage_constants import DegradedStageConstant
+from src.constants.environment_constants import EnvironmentConstants
 from src.utils.logger import Logger
+from src.utils.tracing import tracer, traced
+from src.utils.deadline import Deadline
+from src.services.interaction_journal import InteractionJournal
+from src.services.prefetch_service import PrefetchService
+
+
+def _elapsed_ms(since: float) -> float:
+    return round((time.perf_counter() - since) * 1000, 1)
 
 
 class ClinicalAgent:
-    def __init__(self, rag_tool: RAGTool, web_search_tool: WebSearchTool):
+    def __init__(
+        self,
+        rag_tool: RAGTool,
+        web_search_tool: WebSearchTool,
+        intent_router: IntentRouter,
+        faq_store: Optional[FAQStore] = None,
+        journal: Optional[InteractionJournal] = None,
+        prefetch_service: Optional[PrefetchService] = None,
+        record_responder: Optional[RecordResponder] = None
+    ):
         self.rag_tool = rag_tool
         self.web_search_tool = web_search_tool
+        self.intent_router = intent_router
+        self.faq_store = faq_store
+        self.journal = journal
+        self.prefetch_service = prefetch_service
+        self.record_responder = record_responder
         self.llm = LLMService()
         Logger.log_info_message("Clinical Agent initialized")
     
-    def handle_medical_query(self, query: str, patient_data: Dict) -> Dict:
+    @traced("clinical.handle_medical_query")
+    def handle_medical_query(
+        self,
+        query: str,
+        patient_data: Dict,
+        classification: Optional[Dict] = None,
+        rag_results: Optional[List[Dict]] = None,
+        use_faq_store: bool = True,
+        use_record_answers: bool = True,
+        on_partial: Optional[Callable[[str], None]] = None,
+        deadline: Optional[Deadline] = None,
+        session_id: Optional[str] = None
+    ) -> Dict:
+        """Answer a medical question; classification/retrieval may be precomputed, on_partial streams the answer.
+
+        Questions that only look up the discharge record are answered from
+        templates before anything else runs. With a deadline, optional stages
+        are skipped or shortened as the budget runs out and recorded in
+        deadline.degraded. With a session_id, retrieval
+        prefetched for the session is used when the question is close to it.
+        Besides the answer, the result carries per-stage latency, token counts
+        and retrieval IDs for the interaction journal.
+        """
         
         Logger.log_info_message(f"Handling medical query for patient: {patient_data['patient_name']}")
         
-        
-        rag_results = self.rag_tool.search(query)
-        
-        
-        web_keywords = ['latest', 'recent', 'new', 'current', '2024', '2025', 'research']
-        needs_web_search = any(keyword in query.lower() for keyword in web_keywords)
+        started = time.perf_counter()
+        latency_ms = {}
+        span = trace.get_current_span()
+        
+        if use_record_answers and self.record_responder is not None:
+            stage_started = time.perf_counter()
+            record_answer = self.record_responder.answer(query, patient_data)
+            latency_ms["record"] = _elapsed_ms(stage_started)
+            span.set_attribute("record.hit", record_answer is not None)
+            if record_answer:
+                span.set_attribute("record.fields", record_answer["fields"])
+                latency_ms["total"] = _elapsed_ms(started)
+                return {
+                    "response": record_answer["response"],
+                    "sources": {"rag": [], "web": [], "record": record_answer["fields"]},
+                    "intent": RECORD_INTENT,
+                    "faq_hit": False,
+                    "record_hit": True,
+                    "latency_ms": latency_ms
+                }
+        
+        if classification is None:
+            with tracer.start_as_current_span("intent.classify"):
+                stage_started = time.perf_counter()
+                classification = self.intent_router.classify(query)
+                latency_ms["intent"] = _elapsed_ms(stage_started)
+        span.set_attribute("intent", str(classification["intent"].value))
+        span.set_attribute("intent.score", float(classification["score"]))
+        
+        # Precomputed answers for common questions skip retrieval and generation entirely
+        if use_faq_store and self.faq_store and classification["intent"] != IntentConstant.RECENT_INFO:
+            with tracer.start_as_current_span("faq.lookup"):
+                stage_started = time.perf_counter()
+                cached = self.faq_store.lookup(classification["embedding"], patient_data)
+                latency_ms["faq"] = _elapsed_ms(stage_started)
+            span.set_attribute("faq.hit", cached is not None)
+            if cached:
+                latency_ms["total"] = _elapsed_ms(started)
+                return {
+                    "response": cached["response"],
+                    "sources": cached["sources"],
+                    "intent": classification["intent"].value,
+                    "faq_hit": True,
+                    "latency_ms": latency_ms
+                }
+        
+        if rag_results is None and deadline is not None and deadline.expired():
+            deadline.degrade(DegradedStageConstant.RETRIEVAL_SKIPPED.value)
+            rag_results = []
+        
+        if rag_results is None:
+            stage_started = time.perf_counter()
+            search = lambda: self.rag_tool.search(
+                query,
+                query_embedding=classification["embedding"],
+                diagnosis=patient_data.get("primary_diagnosis")
+            )
+            if self.prefetch_service is not None:
+                rag_results = self.prefetch_service.retrieve(session_id, classification["embedding"], search)
+            else:
+                rag_results = search()
+            latency_ms["retrieval"] = _elapsed_ms(stage_started)
+        
+        
+        needs_web_search = classification["intent"] == IntentConstant.RECENT_INFO
         
         web_results = []
         if needs_web_search:
-            web_results = self.web_search_tool.search(query)
+            if deadline is not None and deadline.remaining() < EnvironmentConstants.WEB_SEARCH_MIN_BUDGET_SECONDS.value:
+                # recent-info questions still get an answer from the reference book
+                deadline.degrade(DegradedStageConstant.WEB_SEARCH_SKIPPED.value)
+            else:
+                stage_started = time.perf_counter()
+                web_results = self.web_search_tool.search(query, deadline=deadline)
+                latency_ms["web_search"] = _elapsed_ms(stage_started)
         
        
         context_parts = []
@@ -42,7 +159,7 @@ class ClinicalAgent:
         if rag_results:
             context_parts.append("\n**Medical Reference Information:**")
             for i, result in enumerate(rag_results, 1):
-                context_parts.append(f"\n[Source {i} - Chunk {result['chunk_index']}]")
+                context_parts.append(f"\n[Source {i} - {self.rag_tool.format_citation(result)}]")
                 context_parts.append(result['content'][:500])
         
         
@@ -54,6 +171,9 @@ class ClinicalAgent:
                 context_parts.append(f"Summary: {result['snippet'][:300]}")
         
         full_context = "\n".join(context_parts)
+        span.set_attribute("clinical.rag_results", len(rag_results) if rag_results else 0)
+        span.set_attribute("clinical.web_results", len(web_results))
+        span.set_attribute("clinical.context_chars", len(full_context))
         
         
         system_prompt = f"""You are a clinical medical AI assistant specializing in post-discharge care.
@@ -69,25 +189,54 @@ IMPORTANT:
 
 {full_context}"""
         
-        response_text = self.llm.generate_clinical_response(
-            system_prompt,
-            f"Patient Question: {query}"
-        )
+        tokens = {}
+        if deadline is not None and deadline.remaining() < EnvironmentConstants.LLM_MIN_BUDGET_SECONDS.value:
+            deadline.degrade(DegradedStageConstant.LLM_SKIPPED.value)
+            response_text = CLINICAL_FALLBACK_RESPONSE
+        else:
+            stage_started = time.perf_counter()
+            response_text = self.llm.generate_clinical_response(
+                system_prompt,
+                f"Patient Question: {query}",
+                on_partial=on_partial,
+                deadline=deadline,
+                usage=tokens
+            )
+            latency_ms["llm"] = _elapsed_ms(stage_started)
         
      
         response_text += "\n\n**Disclaimer:** This information is for educational purposes only. Always consult your healthcare provider for medical advice specific to your situation."
         
        
         sources = {
-            "rag": [f"Chunk {r['chunk_index']}" for r in rag_results] if rag_results else [],
+            "rag": [self.rag_tool.format_citation(r) for r in rag_results] if rag_results else [],
             "web": [{"title": r['title'], "url": r['url']} for r in web_results] if web_results else []
         }
+        if deadline is not None:
+            trace.get_current_span().set_attribute("clinical.degraded", deadline.degraded)
+        
+        latency_ms["total"] = _elapsed_ms(started)
         
         return {
             "response": response_text,
-            "sources": sources
+            "sources": sources,
+            "intent": classification["intent"].value,
+            "faq_hit": False,
+            "latency_ms": latency_ms,
+            "tokens": tokens or None,
+            "retrieval_ids": [r["id"] for r in rag_results] if rag_results else [],
+            "degraded": list(deadline.degraded) if deadline is not None else None
         }
     
-    def log_interaction(self, query: str, response: str, patient_name: str):
-       
-        Logger.log_info_message(f"Clinical interaction logged for patient: {patient_name}")
\ No newline at end of file
+    def log_interaction(
+        self,
+        query: str,
+        result: Dict,
+        patient_data: Dict,
+        session_id: Optional[str] = None,
+        channel: str = "message",
+        stage: str = "conversation"
+    ):
+        """Journal a clinical turn (redacted, off the request path)"""
+        if self.journal is not None:
+            self.journal.record(query, result, patient_data, session_id, channel, stage, agent="clinical")
\ No newline at end of file
@@ -1,12 +1,18 @@
-from typing import Dict
+from typing import Dict, Optional
+from opentelemetry import trace
 from src.tools.patient_db import PatientDatabase
 from src.services.llm_service import LLMService
+from src.services.intent_router import IntentRouter
+from src.constants.intent_constants import IntentConstant
 from src.utils.logger import Logger
+from src.utils.tracing import traced
+from src.utils.deadline import Deadline
 
 
 class ReceptionistAgent:
-    def __init__(self, patient_db: PatientDatabase):
+    def __init__(self, patient_db: PatientDatabase, intent_router: IntentRouter):
         self.patient_db = patient_db
+        self.intent_router = intent_router
         self.llm = LLMService()
         Logger.log_info_message("Receptionist Agent initialized")
     
@@ -18,7 +24,8 @@ I'm here to help you with any questions about your discharge instructions and re
 
 May I have your full name please?"""
     
-    def process_patient_name(self, message: str, session_id: str) -> Dict:
+    @traced("receptionist.identify_patient")
+    def process_patient_name(self, message: str, session_id: str, deadline: Optional[Deadline] = None) -> Dict:
         """Process patient name and retrieve their information"""
         Logger.log_info_message(f"Processing patient name: {message}")
         
@@ -45,7 +52,8 @@ If no name is found, respond with 'NO_NAME_FOUND'."""
             
             extracted = self.llm.generate_receptionist_response(
                 system_prompt,
-                message
+                message,
+                deadline=deadline
             ).strip()
             
             if extracted != "NO_NAME_FOUND":
@@ -74,25 +82,34 @@ Here are some test patients you can try:
 - Emily Davis"""
             }
     
-    def handle_general_query(self, message: str, session_id: str) -> Dict:
+    @traced("receptionist.small_talk")
+    def answer_small_talk(self, message: str) -> Optional[str]:
+        """Answer greetings and thanks from templates, or None if the message needs an agent"""
+        intent = self.intent_router.classify(message)["intent"]
+        trace.get_current_span().set_attribute("intent", intent.value)
+        return self.intent_router.small_talk_response(intent)
+    
+    @traced("receptionist.route")
+    def handle_general_query(self, message: str, session_id: str, deadline: Optional[Deadline] = None) -> Dict:
         """Handle general queries and route medical questions to clinical agent"""
         
         
-        medical_keywords = [
-            'pain', 'medication', 'symptom', 'doctor', 'treatment',
-            'side effect', 'dosage', 'kidney', 'blood', 'pressure',
-            'swelling', 'diet', 'exercise', 'headache', 'nausea'
-        ]
-        
-        message_lower = message.lower()
-        is_medical = any(keyword in message_lower for keyword in medical_keywords)
+        intent = self.intent_router.classify(message)["intent"]
+        trace.get_current_span().set_attribute("intent", intent.value)
         
-        if is_medical:
+        if intent in (IntentConstant.MEDICAL, IntentConstant.RECENT_INFO):
             return {
                 "route_to_clinical": True,
                 "response": "Let me connect you with our clinical specialist who can better answer your medical question..."
             }
         
+        small_talk = self.intent_router.small_talk_response(intent)
+        if small_talk:
+            return {
+                "route_to_clinical": False,
+                "response": small_talk
+            }
+        
         
         system_prompt = """You are a friendly receptionist at a medical facility.
 Respond warmly and professionally to general queries.
@@ -101,7 +118,8 @@ Keep responses brief and conversational."""
         
         response = self.llm.generate_receptionist_response(
             system_prompt,
-            message
+            message,
+            deadline=deadline
         )
         
         return {
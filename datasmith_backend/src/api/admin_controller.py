@@ -0,0 +1,165 @@
+import hmac
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from src.schemas import IndexActivateRequest, ProfileStartRequest, MemorySnapshotRequest
+from src.utils.logger import Logger
+from src.utils.index_artifacts import IndexArtifactError
+from src.services.profiler_service import ProfilerBusyError
+from src.api.chat_controller import (
+    rag_tool, patient_db, faq_store, profiler_service, session_states, admission_controller, interaction_journal, prefetch_service
+)
+from src.constants.http_constants import HttpConstant
+from src.constants.environment_constants import EnvironmentConstants
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin routes do not exist unless ADMIN_TOKEN is set"""
+    admin_token = EnvironmentConstants.ADMIN_TOKEN.value
+    if not admin_token:
+        raise HTTPException(status_code=HttpConstant.NOT_FOUND.value, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=HttpConstant.FORBIDDEN.value, detail="Invalid admin token")
+
+
+def require_profiling():
+    """Profiling routes only exist in the APP_MODEs listed in PROFILING_APP_MODES"""
+    if not profiler_service.enabled:
+        raise HTTPException(status_code=HttpConstant.NOT_FOUND.value, detail="Not Found")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/index")
+async def get_index():
+
+    return {
+        "active_version": rag_tool.index_version,
+        "manifest": rag_tool.index_manifest,
+        "available_versions": await asyncio.to_thread(rag_tool.artifacts.versions)
+    }
+
+@router.post("/index/activate")
+async def activate_index(request: IndexActivateRequest):
+
+    try:
+        # unpacking and opening the new index happens off the event loop; live searches keep using the old one
+        result = await asyncio.to_thread(rag_tool.activate_version, request.version)
+    except IndexArtifactError as e:
+        Logger.log_error_message(e, f"Index activation failed: {request.version or 'latest'}")
+        raise HTTPException(status_code=HttpConstant.BAD_REQUEST.value, detail=str(e))
+
+    if result["swapped"]:
+        # answers and prefetched retrieval from the previous index must stop being served
+        await asyncio.to_thread(faq_store.refresh_knowledge_version)
+        prefetch_service.clear()
+    return result
+
+@router.get("/index/shards")
+async def get_index_shards():
+
+    return {
+        "active_version": rag_tool.index_version,
+        "shards": await asyncio.to_thread(rag_tool.shard_status)
+    }
+
+@router.get("/patients")
+async def get_patients_status():
+
+    return patient_db.status()
+
+@router.post("/patients/reload")
+async def reload_patients():
+
+    # the file watcher normally does this; useful when watching is disabled
+    result = await asyncio.to_thread(patient_db.reload)
+    if "error" in result:
+        raise HTTPException(status_code=HttpConstant.BAD_REQUEST.value, detail=result["error"])
+    return result
+
+@router.get("/admission")
+async def get_admission():
+
+    # per worker: each uvicorn worker admits and sheds on its own
+    return admission_controller.status()
+
+@router.get("/journal")
+async def get_journal():
+
+    return interaction_journal.stats()
+
+@router.get("/prefetch")
+async def get_prefetch():
+
+    return prefetch_service.status()
+
+@router.get("/profile", dependencies=[Depends(require_profiling)])
+async def get_profile_status():
+
+    return {**profiler_service.status(), "sessions": len(session_states)}
+
+@router.post("/profile/start", dependencies=[Depends(require_profiling)])
+async def start_profile(request: ProfileStartRequest):
+
+    try:
+        return profiler_service.start(
+            request.mode,
+            requests=request.requests,
+            seconds=request.seconds,
+            sample_rate=request.sample_rate,
+            interval_ms=request.interval_ms
+        )
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=HttpConstant.CONFLICT.value, detail=str(e))
+
+@router.post("/profile/stop", dependencies=[Depends(require_profiling)])
+async def stop_profile():
+
+    result = profiler_service.stop()
+    if result is None:
+        raise HTTPException(status_code=HttpConstant.NOT_FOUND.value, detail="No profiling results yet")
+    return {key: value for key, value in result.items() if key != "pstats"}
+
+@router.get("/profile/result", dependencies=[Depends(require_profiling)])
+async def get_profile_result(format: str = "json"):
+
+    result = profiler_service.last_result()
+    if result is None:
+        raise HTTPException(status_code=HttpConstant.NOT_FOUND.value, detail="No profiling results yet")
+
+    if format == "collapsed":
+        # feed straight into flamegraph.pl or speedscope
+        if "collapsed" not in result:
+            raise HTTPException(status_code=HttpConstant.BAD_REQUEST.value, detail="Collapsed stacks need mode=sampler")
+        return PlainTextResponse(result["collapsed"])
+    if format == "pstats":
+        # load with pstats.Stats(<file>) or snakeviz
+        if "pstats" not in result:
+            raise HTTPException(status_code=HttpConstant.BAD_REQUEST.value, detail="pstats output needs mode=cprofile")
+        return Response(
+            result["pstats"],
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": 'attachment; filename="message.prof"'}
+        )
+    return {key: value for key, value in result.items() if key != "pstats"}
+
+@router.post("/profile/memory/snapshot", dependencies=[Depends(require_profiling)])
+async def take_memory_snapshot(request: MemorySnapshotRequest):
+
+    # session count is recorded with each snapshot to line up growth in session_states
+    labels = {"label": request.label, "sessions": len(session_states)}
+    return await asyncio.to_thread(profiler_service.take_snapshot, labels)
+
+@router.get("/profile/memory/diff", dependencies=[Depends(require_profiling)])
+async def get_memory_diff(limit: int = 25, key_type: str = "lineno", path: Optional[str] = None):
+
+    if key_type not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=HttpConstant.BAD_REQUEST.value, detail="key_type must be lineno, filename or traceback")
+    return await asyncio.to_thread(profiler_service.snapshot_diff, limit, key_type, path)
+
+@router.post("/profile/memory/stop", dependencies=[Depends(require_profiling)])
+async def stop_memory_tracing():
+
+    return profiler_service.stop_tracemalloc()
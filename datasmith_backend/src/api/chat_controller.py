@@ -1,11 +1,32 @@
-from fastapi import APIRouter
-from src.schemas import ChatRequest, ChatResponse
+import asyncio
+import orjson
+from datetime import date
+from typing import Callable, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from src.schemas import ChatRequest, ChatResponse, BatchQuestionRequest
 from src.utils.logger import Logger
-from src.tools.patient_db import PatientDatabase
+from src.utils.http_cache import compute_version, conditional_response, etag_matches
+from src.utils.tracing import tracer
+from src.utils.deadline import Deadline
+from src.utils.admission import AdmissionController
+from opentelemetry import trace
+from src.tools.patient_db import PatientDatabase, PATIENT_FIELDS, PATIENT_FIELD_ALIASES, DEFAULT_LISTING_FIELDS
 from src.tools.rag_tool import RAGTool
 from src.tools.web_search import WebSearchTool
 from src.agents.receptionist import ReceptionistAgent
 from src.agents.clinical import ClinicalAgent
+from src.services.embedding_service import EmbeddingService
+from src.services.intent_router import IntentRouter
+from src.services.batch_service import BatchQuestionService
+from src.services.faq_store import FAQStore
+from src.services.profiler_service import ProfilerService
+from src.services.interaction_journal import InteractionJournal
+from src.services.prefetch_service import PrefetchService
+from src.services.record_responder import RecordResponder
+from src.constants.environment_constants import EnvironmentConstants
+from src.constants.http_constants import HttpConstant
 
 router = APIRouter()
 
@@ -14,46 +35,239 @@ patient_db = PatientDatabase()
 rag_tool = RAGTool()
 web_search_tool = WebSearchTool()
 
+#routing reuses the embedding model already loaded by the RAG tool
+embedding_service = EmbeddingService(rag_tool.embedding_model)
+intent_router = IntentRouter(embedding_service)
+faq_store = FAQStore(embedding_service, rag_tool, patient_db)
+interaction_journal = InteractionJournal()
+admission_controller = AdmissionController()
+#speculative retrieval backs off while admitted turns (/message, /batch, WebSocket) are in flight
+prefetch_service = PrefetchService(embedding_service, rag_tool, lambda: admission_controller.in_flight)
+record_responder = RecordResponder()
+
 
 #Agent init
-receptionist_agent = ReceptionistAgent(patient_db)
-clinical_agent = ClinicalAgent(rag_tool, web_search_tool)
+receptionist_agent = ReceptionistAgent(patient_db, intent_router)
+clinical_agent = ClinicalAgent(
+    rag_tool, web_search_tool, intent_router, faq_store, interaction_journal, prefetch_service, record_responder
+)
+batch_service = BatchQuestionService(patient_db, embedding_service, intent_router, rag_tool, clinical_agent, admission_controller)
+profiler_service = ProfilerService()
 
 #session state management 
 session_states = {}
 
-@router.post("/message", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    
-    Logger.log_info_message(f"Chat received - Session: {request.session_id}, Message: {request.message[:50]}")
+def _get_session(session_id: str) -> dict:
     
-    session_id = request.session_id
-    message = request.message.strip()
-
     if session_id not in session_states:
         session_states[session_id] = {
             "stage": "greeting",
             "patient_identified": False,
             "patient_data": None,
+            "patient_version": None,
+            "patient_db_version": None,
             "current_agent": "receptionist"
         }
+    return session_states[session_id]
+
+
+def _refresh_patient(session: dict, session_id: str):
+    """After a patients.json reload, move the session onto its patient's current record.
+
+    A patient no longer in the file keeps the record the session already has,
+    so a conversation is never cut off by an edit to the file.
+    """
+    if session["patient_db_version"] == patient_db.version:
+        return
+    session["patient_db_version"] = patient_db.version
+    current = patient_db.get_patient(session["patient_data"]["patient_name"])
+    if current is None:
+        return
+    version = compute_version(current)
+    if version != session["patient_version"]:
+        session.update({"patient_data": current, "patient_version": version})
+        prefetch_service.start(session_id, current)
+
+@router.post("/message", response_model=ChatResponse)
+async def chat(request: ChatRequest, http_request: Request):
+    
+    Logger.log_info_message(f"Chat received - Session: {request.session_id}, Message: {request.message[:50]}")
+    deadline = Deadline.for_request(request.deadline_ms, getattr(http_request.state, "arrived_at", None))
+    
+    with tracer.start_as_current_span("chat.message") as span:
+        span.set_attribute("chat.message_chars", len(request.message))
+        span.set_attribute("chat.compact", request.compact)
+        with tracer.start_as_current_span("session.lookup") as lookup_span:
+            lookup_span.set_attribute("session.new", request.session_id not in session_states)
+            session = _get_session(request.session_id)
+        
+        # agents block on embeddings, Chroma and Groq, so keep them off the event loop;
+        # to_thread copies the context, so spans opened there nest under this one
+        chat_response = await asyncio.to_thread(
+            profiler_service.run, _process_turn, session, request.message.strip(), request.session_id,
+            deadline=deadline
+        )
+        chat_response.degraded = deadline.degraded or None
+        span.set_attribute("chat.agent", chat_response.agent)
+        span.set_attribute("chat.stage", session["stage"])
+        span.set_attribute("chat.degraded", deadline.degraded)
+        return ORJSONResponse(_chat_payload(chat_response, session, request))
 
-    session = session_states[session_id]
 
+@router.websocket("/ws/{session_id}")
+async def chat_socket(websocket: WebSocket, session_id: str):
+    
+    await websocket.accept()
+    Logger.log_info_message(f"WebSocket connected - Session: {session_id}")
+    
+    session = _get_session(session_id)
+    loop = asyncio.get_running_loop()
+    # bounded outbox: a slow client eventually pauses generation instead of growing memory
+    outbox: asyncio.Queue = asyncio.Queue(maxsize=EnvironmentConstants.WS_OUTBOX_SIZE.value)
+    sender = asyncio.create_task(_socket_sender(websocket, outbox))
+    heartbeat = asyncio.create_task(_socket_heartbeat(outbox))
+    turn: Optional[asyncio.Task] = None
+    
+    try:
+        while True:
+            text = await asyncio.wait_for(
+                websocket.receive_text(),
+                timeout=EnvironmentConstants.WS_IDLE_TIMEOUT.value
+            )
+            try:
+                data = orjson.loads(text)
+            except orjson.JSONDecodeError:
+                data = None
+            if not isinstance(data, dict):
+                await outbox.put({"type": "error", "error": "invalid_message", "message": "Frames must be JSON objects."})
+                continue
+            if data.get("type") == "pong":
+                continue
+            
+            if turn is not None and not turn.done():
+                # one turn in flight per socket; the client retries once the reply arrives
+                await outbox.put({"type": "error", "error": "busy", "message": "Previous message is still being processed."})
+                continue
+            
+            try:
+                # the socket's session wins over any session_id in the frame
+                request = ChatRequest(session_id=session_id, **{key: value for key, value in data.items() if key not in ("type", "session_id")})
+            except ValidationError as e:
+                await outbox.put({"type": "error", "error": "invalid_message", "message": str(e)})
+                continue
+            
+            turn = asyncio.create_task(_socket_turn(request, session, outbox, loop))
+    
+    except (WebSocketDisconnect, asyncio.TimeoutError):
+        pass
+    except Exception as e:
+        Logger.log_error_message(e, f"WebSocket error - Session: {session_id}")
+    finally:
+        for task in (turn, sender, heartbeat):
+            if task is not None:
+                task.cancel()
+        Logger.log_info_message(f"WebSocket closed - Session: {session_id}")
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass
+
+
+async def _socket_turn(request: ChatRequest, session: dict, outbox: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+    
+    def on_partial(delta: str):
+        # runs on the worker thread; blocks while the outbox is full (backpressure)
+        asyncio.run_coroutine_threadsafe(
+            outbox.put({"type": "partial", "delta": delta}), loop
+        ).result(timeout=EnvironmentConstants.WS_SEND_TIMEOUT.value)
+    
+    # the budget starts when the frame arrives, so waiting for a slot counts against it
+    deadline = Deadline.for_request(request.deadline_ms)
+    # each turn takes an admission slot like a /message request; the socket itself holds none
+    reason = await admission_controller.acquire()
+    if reason is not None:
+        await outbox.put({
+            "type": "error",
+            "error": "busy",
+            "reason": reason,
+            "retry_after": admission_controller.retry_after(),
+            "message": "The assistant is busy. Please try again shortly."
+        })
+        return
+    
+    try:
+        with tracer.start_as_current_span("chat.ws_turn") as span:
+            span.set_attribute("chat.message_chars", len(request.message))
+            # the slot is held until the worker thread finishes, even if the socket closes first
+            chat_response = await admission_controller.run_in_thread(
+                _process_turn, session, request.message.strip(), request.session_id, on_partial, deadline, "ws"
+            )
+            chat_response.degraded = deadline.degraded or None
+            span.set_attribute("chat.agent", chat_response.agent)
+            span.set_attribute("chat.degraded", deadline.degraded)
+    except Exception as e:
+        Logger.log_error_message(e, f"WebSocket turn failed - Session: {request.session_id}")
+        await outbox.put({"type": "error", "error": "internal", "message": "Internal server error. Please try again."})
+        return
+    await outbox.put({"type": "response", **_chat_payload(chat_response, session, request)})
+
+
+async def _socket_sender(websocket: WebSocket, outbox: asyncio.Queue):
+    
+    while True:
+        message = await outbox.get()
+        await websocket.send_text(orjson.dumps(message).decode())
+
+
+async def _socket_heartbeat(outbox: asyncio.Queue):
+    
+    while True:
+        await asyncio.sleep(EnvironmentConstants.WS_HEARTBEAT_INTERVAL.value)
+        await outbox.put({"type": "ping"})
+
+
+def _chat_payload(chat_response: ChatResponse, session: dict, request: ChatRequest) -> dict:
+    """Attach the patient version; in compact mode drop nulls and patient_data the client already has"""
+    chat_response.patient_version = session.get("patient_version")
+    if request.compact and request.patient_version and request.patient_version == chat_response.patient_version:
+        chat_response.patient_data = None
+    return chat_response.model_dump(exclude_none=request.compact)
+
+
+def _process_turn(
+    session: dict,
+    message: str,
+    session_id: str,
+    on_partial: Optional[Callable[[str], None]] = None,
+    deadline: Optional[Deadline] = None,
+    channel: str = "message"
+) -> ChatResponse:
+    
+    if session["patient_identified"]:
+        _refresh_patient(session, session_id)
+    
     if message.lower() == "start" and session["stage"] == "greeting":
         greeting = receptionist_agent.greet_patient()
         session["stage"] = "awaiting_name"
         return ChatResponse(response=greeting, agent="receptionist")
 
+    # clients that already showed the cached /greeting skip the "start" round trip
+    if session["stage"] == "greeting":
+        session["stage"] = "awaiting_name"
+
 
     if session["stage"] == "awaiting_name":
-        result = receptionist_agent.process_patient_name(message, session_id)
+        result = receptionist_agent.process_patient_name(message, session_id, deadline)
+        trace.get_current_span().set_attribute("patient.found", result["found"])
         if result["found"]:
             session.update({
                 "patient_identified": True,
                 "patient_data": result["patient_data"],
+                "patient_version": compute_version(result["patient_data"]),
+                "patient_db_version": patient_db.version,
                 "stage": "conversation"
             })
+            prefetch_service.start(session_id, result["patient_data"])
         return ChatResponse(
             response=result["response"], 
             agent="receptionist", 
@@ -64,7 +278,11 @@ async def chat(request: ChatRequest):
     elif session["stage"] == "conversation":
        
         if session["current_agent"] == "receptionist":
-            result = receptionist_agent.handle_general_query(message, session_id)
+            # discharge-record lookups go to the clinical agent's templates whatever the intent router would say
+            if record_responder.match(message):
+                result = {"route_to_clinical": True}
+            else:
+                result = receptionist_agent.handle_general_query(message, session_id, deadline)
             
             
             if result["route_to_clinical"]:
@@ -72,12 +290,17 @@ async def chat(request: ChatRequest):
                
                 clinical_result = clinical_agent.handle_medical_query(
                     message, 
-                    session["patient_data"]
+                    session["patient_data"],
+                    on_partial=on_partial,
+                    deadline=deadline,
+                    session_id=session_id
                 )
                 clinical_agent.log_interaction(
                     message, 
-                    clinical_result["response"], 
-                    session["patient_data"]["patient_name"]
+                    clinical_result, 
+                    session["patient_data"],
+                    session_id=session_id,
+                    channel=channel
                 )
                 return ChatResponse(
                     response=clinical_result["response"],
@@ -94,11 +317,27 @@ async def chat(request: ChatRequest):
 
         
         elif session["current_agent"] == "clinical":
-            result = clinical_agent.handle_medical_query(message, session["patient_data"])
+            small_talk = None if record_responder.match(message) else receptionist_agent.answer_small_talk(message)
+            if small_talk:
+                return ChatResponse(
+                    response=small_talk,
+                    agent="receptionist",
+                    patient_data=session["patient_data"]
+                )
+            
+            result = clinical_agent.handle_medical_query(
+                message,
+                session["patient_data"],
+                on_partial=on_partial,
+                deadline=deadline,
+                session_id=session_id
+            )
             clinical_agent.log_interaction(
                 message, 
-                result["response"], 
-                session["patient_data"]["patient_name"]
+                result, 
+                session["patient_data"],
+                session_id=session_id,
+                channel=channel
             )
             return ChatResponse(
                 response=result["response"],
@@ -113,23 +352,34 @@ async def chat(request: ChatRequest):
         agent="system"
     )
 
+@router.post("/batch")
+async def batch_questions(request: BatchQuestionRequest):
+    
+    # answers stream back as NDJSON, one line per item, in completion order
+    max_concurrency = request.max_concurrency or EnvironmentConstants.BATCH_DEFAULT_CONCURRENCY.value
+    return StreamingResponse(
+        batch_service.stream_answers(request.items, max_concurrency),
+        media_type="application/x-ndjson"
+    )
+
 @router.post("/session/{session_id}/reset")
 async def reset_session(session_id: str):
     
     if session_id in session_states:
         del session_states[session_id]
         Logger.log_info_message(f"Session reset: {session_id}")
+    prefetch_service.cancel(session_id)
     return {"status": "success", "message": "Session reset successfully"}
 
 @router.get("/session/{session_id}")
-async def get_session(session_id: str):
+async def get_session(session_id: str, request: Request):
     
     if session_id in session_states:
-        return {
+        return conditional_response(request, {
             "session_id": session_id,
             "session": session_states[session_id]
-        }
-    return {"session_id": session_id, "session": None}
+        })
+    return conditional_response(request, {"session_id": session_id, "session": None})
 
 @router.get("/greeting")
 async def get_greeting():
@@ -139,15 +389,43 @@ async def get_greeting():
     }
 
 @router.get("/patients")
-async def list_patients():
-  
-    return {
-        "patients": [
-            {
-                "name": p["patient_name"],
-                "diagnosis": p["primary_diagnosis"],
-                "discharge_date": p["discharge_date"]
-            }
-            for p in patient_db.patients
-        ]
-    }
\ No newline at end of file
+async def list_patients(
+    request: Request,
+    limit: int = Query(EnvironmentConstants.PATIENTS_PAGE_SIZE.value, ge=1, le=EnvironmentConstants.PATIENTS_MAX_PAGE_SIZE.value),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    name: Optional[str] = Query(None, description="prefix of the full name or of any word in it"),
+    diagnosis: Optional[str] = Query(None, description="case-insensitive substring of the primary diagnosis"),
+    discharged_from: Optional[date] = None,
+    discharged_to: Optional[date] = None,
+    fields: Optional[str] = Query(None, description="comma-separated fields to return")
+):
+    
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else list(DEFAULT_LISTING_FIELDS)
+    unknown = [field for field in selected if field not in PATIENT_FIELDS and field not in PATIENT_FIELD_ALIASES]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=HttpConstant.BAD_REQUEST.value,
+            detail=f"Unknown fields: {', '.join(unknown) or fields}; allowed: {', '.join([*PATIENT_FIELD_ALIASES, *PATIENT_FIELDS])}"
+        )
+    
+    # a page only changes with the database, so its version and the query make the ETag;
+    # it is checked before the page is built so a revalidation costs no index lookup
+    etag = f'"{compute_version([patient_db.version, str(request.query_params)])}"'
+    if etag_matches(request, etag):
+        return Response(status_code=HttpConstant.NOT_MODIFIED.value, headers={"ETag": etag})
+    try:
+        page = patient_db.list_patients(
+            limit,
+            cursor=cursor,
+            name_prefix=name,
+            diagnosis=diagnosis,
+            discharged_from=discharged_from.isoformat() if discharged_from else None,
+            discharged_to=discharged_to.isoformat() if discharged_to else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=HttpConstant.BAD_REQUEST.value, detail=str(e))
+    
+    # a reload between the check and the listing moves the page onto a newer version
+    etag = f'"{compute_version([page.version, str(request.query_params)])}"'
+    # records are serialized as the body is sent, never held as one list
+    return StreamingResponse(page.iter_json(selected), media_type="application/json", headers={"ETag": etag})
\ No newline at end of file
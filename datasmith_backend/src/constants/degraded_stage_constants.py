@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class DegradedStageConstant(str, Enum):
+    RETRIEVAL_SKIPPED = "retrieval_skipped"
+    WEB_SEARCH_SKIPPED = "web_search_skipped"
+    WEB_SEARCH_FAILED = "web_search_failed"
+    LLM_TOKENS_REDUCED = "llm_tokens_reduced"
+    LLM_TRUNCATED = "llm_truncated"
+    LLM_SKIPPED = "llm_skipped"
+    LLM_FAILED = "llm_failed"
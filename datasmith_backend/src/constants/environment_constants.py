@@ -9,14 +9,27 @@ class EnvironmentConstants(Enum):
     
     # API Keys
     GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
     
     # Paths
     LOG_FOLDER_PATH = os.getenv("LOG_FOLDER_PATH", "src/logs")
     DATA_FOLDER_PATH = os.getenv("DATA_FOLDER_PATH", "src/data")
     VECTOR_DB_PATH = os.getenv("VECTOR_DB_PATH", "src/vector_db")
     
+    # Logging
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 50 * 1024 * 1024))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", 256))
+    LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 0.5))
+    LOG_COMPRESSION_LEVEL = int(os.getenv("LOG_COMPRESSION_LEVEL", 3))
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "INFO=1.0")
+    
     # Database Files
     PATIENTS_JSON_PATH = os.getenv("PATIENTS_JSON_PATH", "src/data/patients.json")
+    PATIENTS_WATCH_ENABLED = os.getenv("PATIENTS_WATCH_ENABLED", "true")
+    PATIENTS_WATCH_DEBOUNCE_MS = int(os.getenv("PATIENTS_WATCH_DEBOUNCE_MS", 500))
+    PATIENTS_PAGE_SIZE = int(os.getenv("PATIENTS_PAGE_SIZE", 100))
+    PATIENTS_MAX_PAGE_SIZE = int(os.getenv("PATIENTS_MAX_PAGE_SIZE", 1000))
     NEPHROLOGY_PDF_PATH = os.getenv("NEPHROLOGY_PDF_PATH", "src/data/nephrology_book.pdf")
     
     # LLM Models (Groq - Free)
@@ -25,12 +38,111 @@ class EnvironmentConstants(Enum):
     
     # Vector DB
     VECTOR_COLLECTION_NAME = os.getenv("VECTOR_COLLECTION_NAME", "nephrology_docs")
+    KNOWLEDGE_SHARDS_PATH = os.getenv("KNOWLEDGE_SHARDS_PATH", "src/data/knowledge_shards.json")
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     
+    # Index Artifacts
+    INDEX_ARTIFACT_PATH = os.getenv("INDEX_ARTIFACT_PATH", "src/index_artifacts")
+    INDEX_INSTALL_PATH = os.getenv("INDEX_INSTALL_PATH", "src/vector_db/releases")
+    INDEX_VERSION = os.getenv("INDEX_VERSION", "")
+    INDEX_COMPRESSION_LEVEL = int(os.getenv("INDEX_COMPRESSION_LEVEL", 10))
+    
     # RAG Settings
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 1000))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 200))
     RAG_TOP_K = int(os.getenv("RAG_TOP_K", 3))
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 256))
+    SECTION_FILTER_TOP_N = int(os.getenv("SECTION_FILTER_TOP_N", 3))
+    SECTION_FILTER_MIN_SIMILARITY = float(os.getenv("SECTION_FILTER_MIN_SIMILARITY", 0.3))
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 2048))
+    SHARD_MIN_SIMILARITY = float(os.getenv("SHARD_MIN_SIMILARITY", 0.35))
+    SHARD_SEARCH_WORKERS = int(os.getenv("SHARD_SEARCH_WORKERS", 4))
+    SHARD_STATS_WINDOW = int(os.getenv("SHARD_STATS_WINDOW", 1024))
+    
+    # Ingestion Dedupe
+    DEDUPE_ENABLED = os.getenv("DEDUPE_ENABLED", "true")
+    DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", 0.85))
+    DEDUPE_NUM_PERM = int(os.getenv("DEDUPE_NUM_PERM", 128))
+    DEDUPE_SHINGLE_SIZE = int(os.getenv("DEDUPE_SHINGLE_SIZE", 5))
+    RECURRING_LINE_MIN_COUNT = int(os.getenv("RECURRING_LINE_MIN_COUNT", 5))
+    RECURRING_LINE_PAGE_RATIO = float(os.getenv("RECURRING_LINE_PAGE_RATIO", 0.05))
+    RECURRING_LINE_MAX_CHARS = int(os.getenv("RECURRING_LINE_MAX_CHARS", 100))
+    
+    # Retrieval Prefetch
+    PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true")
+    PREFETCH_MAX_QUERIES = int(os.getenv("PREFETCH_MAX_QUERIES", 6))
+    PREFETCH_MAX_SESSIONS = int(os.getenv("PREFETCH_MAX_SESSIONS", 1000))
+    PREFETCH_QUEUE_SIZE = int(os.getenv("PREFETCH_QUEUE_SIZE", 32))
+    PREFETCH_MAX_LIVE_REQUESTS = int(os.getenv("PREFETCH_MAX_LIVE_REQUESTS", 2))
+    PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", 1800))
+    PREFETCH_REUSE_SIMILARITY = float(os.getenv("PREFETCH_REUSE_SIMILARITY", 0.9))
+    PREFETCH_MERGE_SIMILARITY = float(os.getenv("PREFETCH_MERGE_SIMILARITY", 0.75))
+    
+    # Intent Routing
+    INTENT_MIN_SIMILARITY = float(os.getenv("INTENT_MIN_SIMILARITY", 0.35))
+    
+    # Record Answers
+    RECORD_ANSWERS_ENABLED = os.getenv("RECORD_ANSWERS_ENABLED", "true")
+    RECORD_ANSWER_MAX_CHARS = int(os.getenv("RECORD_ANSWER_MAX_CHARS", 160))
+    
+    # FAQ Answer Store
+    FAQ_STORE_PATH = os.getenv("FAQ_STORE_PATH", "src/data/faq_store.sqlite3")
+    FAQ_QUESTIONS_PATH = os.getenv("FAQ_QUESTIONS_PATH", "src/data/faq_questions.json")
+    FAQ_MIN_SIMILARITY = float(os.getenv("FAQ_MIN_SIMILARITY", 0.85))
+    
+    # WebSocket Chat
+    WS_HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", 20))
+    WS_IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", 90))
+    WS_OUTBOX_SIZE = int(os.getenv("WS_OUTBOX_SIZE", 64))
+    WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", 30))
+    
+    # Batch Q&A
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 5000))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 8))
+    BATCH_DEFAULT_CONCURRENCY = int(os.getenv("BATCH_DEFAULT_CONCURRENCY", 4))
+    
+    # Admission Control (per worker)
+    ADMISSION_PATHS = os.getenv("ADMISSION_PATHS", "/api/v1/chat/message")
+    ADMISSION_INITIAL_CONCURRENCY = int(os.getenv("ADMISSION_INITIAL_CONCURRENCY", 8))
+    ADMISSION_MIN_CONCURRENCY = int(os.getenv("ADMISSION_MIN_CONCURRENCY", 2))
+    ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", 32))
+    ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 16))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", 5))
+    ADMISSION_LATENCY_TARGET_SECONDS = float(os.getenv("ADMISSION_LATENCY_TARGET_SECONDS", 20))
+    ADMISSION_ADJUST_EVERY = int(os.getenv("ADMISSION_ADJUST_EVERY", 20))
+    ADMISSION_RETRY_AFTER_MAX_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_MAX_SECONDS", 30))
+    
+    # Request Deadline
+    REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", 30))
+    REQUEST_DEADLINE_MAX_SECONDS = float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", 120))
+    WEB_SEARCH_TIMEOUT_SECONDS = float(os.getenv("WEB_SEARCH_TIMEOUT_SECONDS", 5))
+    WEB_SEARCH_MIN_BUDGET_SECONDS = float(os.getenv("WEB_SEARCH_MIN_BUDGET_SECONDS", 12))
+    LLM_MIN_BUDGET_SECONDS = float(os.getenv("LLM_MIN_BUDGET_SECONDS", 2))
+    LLM_TOKENS_PER_SECOND = float(os.getenv("LLM_TOKENS_PER_SECOND", 150))
+    LLM_LATENCY_OVERHEAD_SECONDS = float(os.getenv("LLM_LATENCY_OVERHEAD_SECONDS", 1))
+    LLM_MIN_TOKENS = int(os.getenv("LLM_MIN_TOKENS", 200))
+    
+    # Tracing
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "file")  # file | console | otlp | none
+    TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", 1.0))
+    TRACE_FOLDER_PATH = os.getenv("TRACE_FOLDER_PATH", "src/logs/traces")
+    
+    # Interaction Journal
+    JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "true")
+    JOURNAL_FOLDER_PATH = os.getenv("JOURNAL_FOLDER_PATH", "src/logs/journal")
+    JOURNAL_SEGMENT_BYTES = int(os.getenv("JOURNAL_SEGMENT_BYTES", 16 * 1024 * 1024))
+    JOURNAL_STORE_QUESTIONS = os.getenv("JOURNAL_STORE_QUESTIONS", "true")  # redacted question text, needed for replay
+    JOURNAL_HASH_KEY = os.getenv("JOURNAL_HASH_KEY", "")  # empty: a random key per process
+    
+    # Profiling
+    PROFILING_APP_MODES = os.getenv("PROFILING_APP_MODES", "development,test")
+    PROFILE_DEFAULT_REQUESTS = int(os.getenv("PROFILE_DEFAULT_REQUESTS", 20))
+    PROFILE_MAX_REQUESTS = int(os.getenv("PROFILE_MAX_REQUESTS", 1000))
+    PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 600))
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5))
+    TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", 10))
+    TRACEMALLOC_MAX_SNAPSHOTS = int(os.getenv("TRACEMALLOC_MAX_SNAPSHOTS", 5))
     
     # Web Search
-    WEB_SEARCH_RESULTS = int(os.getenv("WEB_SEARCH_RESULTS", 3))
\ No newline at end of file
+    WEB_SEARCH_RESULTS = int(os.getenv("WEB_SEARCH_RESULTS", 3))
+    WEB_SEARCH_URL = os.getenv("WEB_SEARCH_URL", "")  # empty: DuckDuckGo
\ No newline at end of file
@@ -5,10 +5,12 @@ class HttpConstant(int, Enum):
     OK = 200
     SUCCESS_CREATE = 201
     NO_CONTENT = 204
+    NOT_MODIFIED = 304
     BAD_REQUEST = 400
     UNAUTHORIZED = 401
     FORBIDDEN = 403
     NOT_FOUND = 404
     INTERNAL_SERVER_ERROR = 500
+    SERVICE_UNAVAILABLE = 503
     CONFLICT = 409
     INVALID_TOKEN = 498
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class IntentConstant(str, Enum):
+    MEDICAL = "medical"
+    RECENT_INFO = "recent_info"
+    GREETING = "greeting"
+    THANKS = "thanks"
+    ADMIN = "admin"
@@ -1,3 +1,6 @@
 from .chat import ChatRequest, ChatResponse, ResetRequest
+from .batch import BatchQuestionItem, BatchQuestionRequest
+from .admin import IndexActivateRequest, ProfileStartRequest, MemorySnapshotRequest
 
-__all__ = ["ChatRequest", "ChatResponse", "ResetRequest"]
+__all__ = ["ChatRequest", "ChatResponse", "ResetRequest", "BatchQuestionItem", "BatchQuestionRequest", "IndexActivateRequest",
+           "ProfileStartRequest", "MemorySnapshotRequest"]
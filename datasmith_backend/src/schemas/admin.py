@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from src.constants.environment_constants import EnvironmentConstants
+
+
+class IndexActivateRequest(BaseModel):
+    version: Optional[str] = None  # latest artifact when omitted
+
+class ProfileStartRequest(BaseModel):
+    mode: Literal["cprofile", "sampler"] = "sampler"
+    requests: Optional[int] = Field(None, ge=1, le=EnvironmentConstants.PROFILE_MAX_REQUESTS.value)
+    seconds: Optional[float] = Field(None, gt=0, le=EnvironmentConstants.PROFILE_MAX_SECONDS.value)
+    sample_rate: float = Field(1.0, gt=0, le=1)
+    interval_ms: Optional[float] = Field(None, ge=1, le=1000)
+
+class MemorySnapshotRequest(BaseModel):
+    label: Optional[str] = None
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from src.constants.environment_constants import EnvironmentConstants
+
+
+class BatchQuestionItem(BaseModel):
+    patient_name: str
+    question: str
+
+class BatchQuestionRequest(BaseModel):
+    items: List[BatchQuestionItem] = Field(..., min_length=1, max_length=EnvironmentConstants.BATCH_MAX_ITEMS.value)
+    max_concurrency: Optional[int] = Field(None, ge=1, le=EnvironmentConstants.BATCH_MAX_CONCURRENCY.value)
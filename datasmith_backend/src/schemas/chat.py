@@ -1,17 +1,24 @@
-from pydantic import BaseModel
-from typing import Optional, Dict
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, List
 
 
 class ChatRequest(BaseModel):
     message: str
     session_id: str
     patient_name: Optional[str] = None
+    # compact mode omits null fields and skips patient_data the client already holds
+    compact: bool = False
+    patient_version: Optional[str] = None
+    # time budget for the whole turn; capped by REQUEST_DEADLINE_MAX_SECONDS
+    deadline_ms: Optional[int] = Field(None, ge=100)
 
 class ChatResponse(BaseModel):
     response: str
     agent: str
     patient_data: Optional[Dict] = None
+    patient_version: Optional[str] = None
     sources: Optional[Dict] = None
+    degraded: Optional[List[str]] = None
 
 class ResetRequest(BaseModel):
     session_id: str
\ No newline at end of file
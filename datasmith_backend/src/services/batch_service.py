@@ -0,0 +1,134 @@
+import time
+import asyncio
+import orjson
+from typing import AsyncIterator, Dict, List, Optional
+from src.utils.logger import Logger
+from src.utils.admission import AdmissionController
+from src.tools.rag_tool import RAGTool
+from src.tools.patient_db import PatientDatabase
+from src.agents.clinical import ClinicalAgent
+from src.schemas.batch import BatchQuestionItem
+from src.services.intent_router import IntentRouter
+from src.services.embedding_service import EmbeddingService
+
+
+class BatchQuestionService:
+    def __init__(
+        self,
+        patient_db: PatientDatabase,
+        embedding_service: EmbeddingService,
+        intent_router: IntentRouter,
+        rag_tool: RAGTool,
+        clinical_agent: ClinicalAgent,
+        admission_controller: AdmissionController
+    ):
+        self.patient_db = patient_db
+        self.embedding_service = embedding_service
+        self.intent_router = intent_router
+        self.rag_tool = rag_tool
+        self.clinical_agent = clinical_agent
+        self.admission_controller = admission_controller
+        Logger.log_info_message("Batch Question Service initialized")
+
+    async def stream_answers(self, items: List[BatchQuestionItem], max_concurrency: int) -> AsyncIterator[bytes]:
+        """Yield one NDJSON line per item, in completion order"""
+        started = time.perf_counter()
+        Logger.log_info_message(f"Batch received - {len(items)} questions, concurrency {max_concurrency}")
+
+        # Resolve each distinct patient once, straight from the database
+        patients: Dict[str, Optional[Dict]] = {}
+        for item in items:
+            key = item.patient_name.strip().lower()
+            if key not in patients:
+                patients[key] = self.patient_db.find_patient_by_name(item.patient_name)
+
+        resolved = []
+        for index, item in enumerate(items):
+            patient = patients[item.patient_name.strip().lower()]
+            if patient is None:
+                yield self._line(index, item, error="Patient not found")
+            else:
+                resolved.append((index, item, patient))
+
+        if not resolved:
+            return
+
+        # One forward pass for every question, one Chroma call per diagnosis
+        questions = [item.question for _, item, _ in resolved]
+        try:
+            embeddings = await asyncio.to_thread(self.embedding_service.encode_batch, questions)
+            rag_results = await asyncio.to_thread(self._search_by_diagnosis, embeddings, resolved)
+        except Exception as e:
+            Logger.log_error_message(e, "Error preparing batch retrieval")
+            for index, item, _ in resolved:
+                yield self._line(index, item, error="Retrieval failed")
+            return
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def answer(position: int) -> bytes:
+            index, item, patient = resolved[position]
+            async with semaphore:
+                # every answer takes an admission slot like a /message turn, so the per-worker cap bounds LLM calls;
+                # item latencies stay out of the adaptive window so a large batch cannot steer the limit for live turns
+                reason = await self.admission_controller.acquire()
+                if reason is not None:
+                    return self._line(index, item, error=f"Assistant busy ({reason}), retry this question")
+                try:
+                    result = await self.admission_controller.run_in_thread(
+                        self.clinical_agent.handle_medical_query,
+                        item.question,
+                        patient,
+                        self.intent_router.classify_embedding(embeddings[position]),
+                        rag_results[position],
+                        record_latency=False
+                    )
+                except Exception as e:
+                    Logger.log_error_message(e, f"Error answering batch item {index}")
+                    return self._line(index, item, error="Answer generation failed")
+            self.clinical_agent.log_interaction(item.question, result, patient, channel="batch")
+            return self._line(index, item, result=result, patient_name=patient["patient_name"])
+
+        tasks = [asyncio.create_task(answer(position)) for position in range(len(resolved))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away: do not start LLM calls nobody will read
+            for task in tasks:
+                task.cancel()
+
+        Logger.log_info_message(f"Batch completed - {len(items)} questions in {time.perf_counter() - started:.1f}s")
+
+    def _search_by_diagnosis(self, embeddings, resolved: List) -> List[List[Dict]]:
+        """Section filters depend on the diagnosis, so questions are grouped by it"""
+        groups: Dict[str, List[int]] = {}
+        for position, (_, _, patient) in enumerate(resolved):
+            groups.setdefault(patient["primary_diagnosis"], []).append(position)
+
+        rag_results: List[List[Dict]] = [[] for _ in resolved]
+        for diagnosis, positions in groups.items():
+            for position, results in zip(positions, self.rag_tool.search_batch(embeddings[positions], diagnosis=diagnosis)):
+                rag_results[position] = results
+        return rag_results
+
+    @staticmethod
+    def _line(
+        index: int,
+        item: BatchQuestionItem,
+        result: Optional[Dict] = None,
+        patient_name: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> bytes:
+        record = {
+            "index": index,
+            "patient_name": patient_name or item.patient_name,
+            "question": item.question,
+            "status": "error" if error else "ok",
+        }
+        if error:
+            record["error"] = error
+        else:
+            record["response"] = result["response"]
+            record["sources"] = result["sources"]
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
@@ -0,0 +1,39 @@
+import numpy as np
+from functools import lru_cache
+from typing import List
+from sentence_transformers import SentenceTransformer
+from src.utils.logger import Logger
+from src.constants.environment_constants import EnvironmentConstants
+
+
+class EmbeddingService:
+    def __init__(self, embedding_model: SentenceTransformer):
+        self.embedding_model = embedding_model
+        self._encode_cached = lru_cache(maxsize=EnvironmentConstants.EMBEDDING_CACHE_SIZE.value)(self._encode_one)
+        Logger.log_info_message("Embedding Service initialized")
+
+    @staticmethod
+    def _normalize_text(text: str) -> str:
+        # MiniLM is uncased, so folding case and whitespace only improves cache hits
+        return " ".join(text.lower().split())
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        embedding = self.embedding_model.encode(
+            [text],
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )[0].astype(np.float32)
+        embedding.setflags(write=False)
+        return embedding
+
+    def encode(self, text: str) -> np.ndarray:
+        """Unit-length embedding for a single message, cached per normalized text"""
+        return self._encode_cached(self._normalize_text(text))
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Unit-length embeddings for many texts in one forward pass"""
+        return self.embedding_model.encode(
+            [self._normalize_text(text) for text in texts],
+            normalize_embeddings=True,
+            show_progress_bar=False
+        ).astype(np.float32)
@@ -0,0 +1,202 @@
+import json
+import time
+import sqlite3
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from src.utils.logger import Logger
+from src.utils.http_cache import compute_version
+from src.tools.rag_tool import RAGTool
+from src.tools.patient_db import PatientDatabase
+from src.services.embedding_service import EmbeddingService
+from src.services.llm_service import CLINICAL_FALLBACK_RESPONSE
+from src.constants.environment_constants import EnvironmentConstants
+
+
+class FAQStore:
+    """Precomputed answers to common questions, keyed by care profile.
+
+    A care profile is the diagnosis, medication list and dietary restrictions of
+    a patient, so every patient sharing them shares the answers. Rows are tagged
+    with the knowledge-base version and the FAQ question text, and only rows
+    matching the current ones are ever served. A patients.json reload evicts the
+    profiles no patient has any more before the next lookup.
+    """
+
+    def __init__(self, embedding_service: EmbeddingService, rag_tool: RAGTool, patient_db: PatientDatabase):
+        self.embedding_service = embedding_service
+        self.rag_tool = rag_tool
+        self.patient_db = patient_db
+        self.store_path = Path(EnvironmentConstants.FAQ_STORE_PATH.value)
+        self.min_similarity = EnvironmentConstants.FAQ_MIN_SIMILARITY.value
+
+        self.faqs = self._load_faqs()
+        self.faq_versions = {faq["id"]: compute_version(faq["question"]) for faq in self.faqs}
+        self.faq_embeddings = (
+            self.embedding_service.encode_batch([faq["question"] for faq in self.faqs])
+            if self.faqs else np.zeros((0, 0), dtype=np.float32)
+        )
+
+        self._lock = threading.Lock()
+        self._connection = self._connect()
+        self.kb_version = self.rag_tool.knowledge_version()
+        self.invalidate_stale()
+        Logger.log_info_message(f"FAQ Store initialized with {len(self.faqs)} questions")
+
+    def _load_faqs(self) -> List[Dict]:
+        """Load the configurable FAQ question set"""
+        faq_path = Path(EnvironmentConstants.FAQ_QUESTIONS_PATH.value)
+        try:
+            with open(faq_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            Logger.log_error_message(e, f"Error loading FAQ questions from {faq_path}")
+            return []
+
+    def _connect(self) -> sqlite3.Connection:
+        self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.store_path), check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS faq_answers (
+                profile_key TEXT NOT NULL,
+                faq_id TEXT NOT NULL,
+                faq_version TEXT NOT NULL,
+                kb_version TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (profile_key, faq_id)
+            )
+        """)
+        connection.commit()
+        return connection
+
+    @staticmethod
+    def profile_key(patient_data: Dict) -> str:
+        return compute_version({
+            "diagnosis": patient_data["primary_diagnosis"],
+            "medications": sorted(patient_data["medications"]),
+            "dietary_restrictions": patient_data.get("dietary_restrictions")
+        })
+
+    def _current_profile_keys(self) -> Set[str]:
+        return {self.profile_key(patient) for patient in self.patient_db.get_all_patients()}
+
+    def invalidate_stale(self) -> int:
+        """Drop answers built from another knowledge base, an edited FAQ, or for profiles no longer in the patient records"""
+        # read before the records, so a reload racing this pass is caught by the next lookup
+        self.patients_version = self.patient_db.version
+        profile_keys = self._current_profile_keys()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT profile_key, faq_id, faq_version, kb_version FROM faq_answers"
+            ).fetchall()
+            stale = [
+                (profile_key, faq_id)
+                for profile_key, faq_id, faq_version, kb_version in rows
+                if kb_version != self.kb_version
+                or faq_version != self.faq_versions.get(faq_id)
+                or profile_key not in profile_keys
+            ]
+            self._connection.executemany("DELETE FROM faq_answers WHERE profile_key = ? AND faq_id = ?", stale)
+            self._connection.commit()
+
+        if stale:
+            Logger.log_info_message(f"FAQ Store invalidated {len(stale)} stale answers")
+        return len(stale)
+
+    def refresh_knowledge_version(self):
+        """Call after the knowledge base changes so older answers stop being served"""
+        self.kb_version = self.rag_tool.knowledge_version()
+        self.invalidate_stale()
+
+    def lookup(self, query_embedding: np.ndarray, patient_data: Dict) -> Optional[Dict]:
+        """Return a stored answer if the query is close enough to an FAQ question"""
+        if not self.faqs:
+            return None
+        if self.patient_db.version != self.patients_version:
+            self.invalidate_stale()
+
+        scores = self.faq_embeddings @ query_embedding
+        best = int(np.argmax(scores))
+        if scores[best] < self.min_similarity:
+            return None
+
+        faq_id = self.faqs[best]["id"]
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT answer, sources FROM faq_answers "
+                "WHERE profile_key = ? AND faq_id = ? AND faq_version = ? AND kb_version = ?",
+                (self.profile_key(patient_data), faq_id, self.faq_versions[faq_id], self.kb_version)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        Logger.log_info_message(f"FAQ Store hit: {faq_id} (score={scores[best]:.2f})")
+        return {
+            "response": row[0],
+            "sources": json.loads(row[1]),
+            "faq_id": faq_id
+        }
+
+    def warm(self, clinical_agent, force: bool = False) -> Dict:
+        """Generate missing answers for every distinct care profile in the patient records"""
+        self.invalidate_stale()
+
+        profiles = {}
+        for patient in self.patient_db.get_all_patients():
+            profiles.setdefault(self.profile_key(patient), patient)
+
+        with self._lock:
+            # invalidate_stale() above left only rows that are still current
+            existing = set(self._connection.execute(
+                "SELECT profile_key, faq_id FROM faq_answers"
+            ).fetchall()) if not force else set()
+
+        generated = 0
+        skipped = 0
+        failed = 0
+        for profile_key, patient in profiles.items():
+            # answers are shared across patients, so they must not carry anyone's name
+            profile_patient = {
+                "patient_name": "Patient",
+                "primary_diagnosis": patient["primary_diagnosis"],
+                "medications": patient["medications"],
+                "dietary_restrictions": patient.get("dietary_restrictions", "None specified")
+            }
+            for faq in self.faqs:
+                if (profile_key, faq["id"]) in existing:
+                    skipped += 1
+                    continue
+
+                # the profile holds only part of a record, so every answer comes from the clinical pipeline
+                result = clinical_agent.handle_medical_query(
+                    faq["question"], profile_patient, use_faq_store=False, use_record_answers=False
+                )
+                if result["response"].startswith(CLINICAL_FALLBACK_RESPONSE):
+                    # never persist an apology; the next warm-up run retries it
+                    failed += 1
+                    continue
+                with self._lock:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO faq_answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            profile_key,
+                            faq["id"],
+                            self.faq_versions[faq["id"]],
+                            self.kb_version,
+                            result["response"],
+                            json.dumps(result["sources"]),
+                            time.time()
+                        )
+                    )
+                    self._connection.commit()
+                generated += 1
+
+        Logger.log_info_message(
+            f"FAQ Store warmed: {len(profiles)} profiles, {generated} generated, {skipped} already current, {failed} failed"
+        )
+        return {"profiles": len(profiles), "generated": generated, "skipped": skipped, "failed": failed}
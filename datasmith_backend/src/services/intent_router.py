@@ -0,0 +1,114 @@
+import time
+import numpy as np
+from typing import Dict, List, Optional
+from src.utils.logger import Logger
+from src.services.embedding_service import EmbeddingService
+from src.constants.intent_constants import IntentConstant
+from src.constants.environment_constants import EnvironmentConstants
+
+
+# Example utterances per intent; each intent is represented by the centroid of these
+INTENT_EXAMPLES: Dict[IntentConstant, List[str]] = {
+    IntentConstant.MEDICAL: [
+        "I have pain in my lower back",
+        "my ankles are puffy",
+        "my legs are swollen",
+        "can I take ibuprofen with my medication",
+        "what are the side effects of furosemide",
+        "I feel dizzy when I stand up",
+        "my blood pressure is high today",
+        "is it normal to feel tired after discharge",
+        "what should I eat with kidney disease",
+        "how much water should I drink",
+        "I missed a dose of my medicine",
+        "I have a headache and nausea",
+        "I am not urinating much",
+        "can I exercise after leaving the hospital",
+        "what does my diagnosis mean",
+        "I noticed blood in my urine",
+        "I feel short of breath",
+        "should I be worried about this symptom",
+    ],
+    IntentConstant.RECENT_INFO: [
+        "what is the latest research on kidney disease",
+        "are there any new treatments for chronic kidney disease",
+        "recent studies about dialysis",
+        "current guidelines for managing nephrotic syndrome",
+        "new drugs approved for kidney failure this year",
+        "any clinical trials for polycystic kidney disease in 2025",
+        "latest news about kidney transplants",
+    ],
+    IntentConstant.GREETING: [
+        "hello",
+        "hi there",
+        "good morning",
+        "hey",
+        "good evening",
+        "how are you",
+    ],
+    IntentConstant.THANKS: [
+        "thank you",
+        "thanks a lot",
+        "that was helpful",
+        "great, thanks",
+        "ok thank you so much",
+        "bye",
+        "goodbye, have a nice day",
+    ],
+    IntentConstant.ADMIN: [
+        "how do I reset this conversation",
+        "who are you",
+        "what can you help me with",
+        "can I talk to a real person",
+        "how do I book an appointment",
+        "what are your opening hours",
+        "how do I change my contact details",
+    ],
+}
+
+SMALL_TALK_RESPONSES: Dict[IntentConstant, str] = {
+    IntentConstant.GREETING: "Hello! I'm here to help with your discharge instructions and recovery. What would you like to know?",
+    IntentConstant.THANKS: "You're welcome! If you have any other questions about your recovery, just ask. Take care!",
+}
+
+
+class IntentRouter:
+    def __init__(self, embedding_service: EmbeddingService):
+        self.embedding_service = embedding_service
+        self.min_similarity = EnvironmentConstants.INTENT_MIN_SIMILARITY.value
+        self.intents = list(INTENT_EXAMPLES.keys())
+        self.centroids = self._build_centroids()
+        Logger.log_info_message(f"Intent Router initialized with {len(self.intents)} intents")
+
+    def _build_centroids(self) -> np.ndarray:
+        """Precompute one unit-length centroid per intent (rows follow self.intents)"""
+        centroids = []
+        for intent in self.intents:
+            centroid = self.embedding_service.encode_batch(INTENT_EXAMPLES[intent]).mean(axis=0)
+            centroids.append(centroid / np.linalg.norm(centroid))
+        return np.vstack(centroids).astype(np.float32)
+
+    def classify(self, message: str) -> Dict:
+        """Route a message to the closest intent centroid"""
+        return self.classify_embedding(self.embedding_service.encode(message))
+
+    def classify_embedding(self, embedding: np.ndarray) -> Dict:
+        """Route an already-encoded, unit-length message embedding"""
+        started = time.perf_counter()
+        scores = self.centroids @ embedding
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        # Low-confidence messages fall back to ADMIN, which the receptionist LLM answers
+        intent = self.intents[best] if score >= self.min_similarity else IntentConstant.ADMIN
+        elapsed_us = (time.perf_counter() - started) * 1_000_000
+
+        Logger.log_info_message(f"Intent routed: {intent.value} (score={score:.2f}, {elapsed_us:.0f}us)")
+        return {
+            "intent": intent,
+            "score": score,
+            "embedding": embedding
+        }
+
+    def small_talk_response(self, intent: IntentConstant) -> Optional[str]:
+        """Template reply for small talk, or None if the intent needs an agent"""
+        return SMALL_TALK_RESPONSES.get(intent)
@@ -0,0 +1,149 @@
+import io
+import os
+import re
+import time
+import orjson
+import hashlib
+import zstandard
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from src.utils.logger import Logger
+from src.utils.rotating_writer import RotatingZstdWriter
+from src.constants.environment_constants import EnvironmentConstants
+
+
+JOURNAL_BASE_NAME = "interactions"
+PATIENT_PLACEHOLDER = "[PATIENT]"
+
+# identifiers a patient may type into a question; clinical terms are kept
+_REDACTIONS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+"), "[EMAIL]"),
+    (re.compile(r"\b\d{1,4}[/-]\d{1,2}[/-]\d{1,4}\b"), "[DATE]"),
+    (re.compile(r"\+?\d[\d\s().-]{7,}\d"), "[PHONE]"),
+    (re.compile(r"\b\d{5,}\b"), "[NUMBER]")
+]
+
+
+def _serialize(record: Dict) -> bytes:
+    return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def redact(text: str, patient_name: Optional[str] = None) -> str:
+    """Replace the patient's name (and its parts) and contact/date/record numbers with placeholders"""
+    if patient_name:
+        parts = sorted({patient_name, *patient_name.split()}, key=len, reverse=True)
+        for part in parts:
+            if len(part) >= 3:
+                text = re.sub(rf"\b{re.escape(part)}\b", PATIENT_PLACEHOLDER, text, flags=re.IGNORECASE)
+    for pattern, placeholder in _REDACTIONS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+class InteractionJournal:
+    """Append-only journal of clinical turns for audit and load-test replay.
+
+    Records are queued without blocking and written in batches by a
+    RotatingZstdWriter; full segments are zstd-compressed into
+    ``<JOURNAL_FOLDER_PATH>/<YYYY-MM-DD>/``. Sessions and patients are stored
+    as keyed hashes and question text is redacted; responses are never stored.
+    """
+
+    def __init__(self):
+        self.enabled = EnvironmentConstants.JOURNAL_ENABLED.value.lower() == "true"
+        self.store_questions = EnvironmentConstants.JOURNAL_STORE_QUESTIONS.value.lower() == "true"
+        # sessions live in process memory, so a per-process key loses nothing by default
+        self._key = EnvironmentConstants.JOURNAL_HASH_KEY.value.encode() or os.urandom(32)
+        self.writer = None
+        if self.enabled:
+            self.writer = RotatingZstdWriter(
+                folder=Path(EnvironmentConstants.JOURNAL_FOLDER_PATH.value),
+                base_name=JOURNAL_BASE_NAME,
+                serializer=_serialize,
+                max_bytes=EnvironmentConstants.JOURNAL_SEGMENT_BYTES.value,
+                queue_size=EnvironmentConstants.LOG_QUEUE_SIZE.value,
+                batch_size=EnvironmentConstants.LOG_BATCH_SIZE.value,
+                flush_interval=EnvironmentConstants.LOG_FLUSH_INTERVAL.value,
+                compression_level=EnvironmentConstants.LOG_COMPRESSION_LEVEL.value
+            )
+        Logger.log_info_message(f"Interaction Journal initialized (enabled={self.enabled})")
+
+    def pseudonym(self, value: str) -> str:
+        return hashlib.blake2b(value.encode(), key=self._key[:64], digest_size=8).hexdigest()
+
+    def record(
+        self,
+        query: str,
+        result: Dict,
+        patient_data: Dict,
+        session_id: Optional[str],
+        channel: str,
+        stage: str,
+        agent: str
+    ) -> bool:
+        """Queue one turn; returns False when the journal is off or its queue is full"""
+        if self.writer is None:
+            return False
+
+        patient_name = patient_data.get("patient_name", "")
+        record = {
+            "ts": round(time.time(), 3),
+            "session": self.pseudonym(session_id) if session_id else None,
+            "patient": self.pseudonym(patient_name.strip().lower()),
+            "channel": channel,
+            "stage": stage,
+            "agent": agent,
+            "intent": result.get("intent"),
+            "faq_hit": result.get("faq_hit", False),
+            "record_hit": result.get("record_hit", False),
+            "degraded": result.get("degraded") or None,
+            "latency_ms": result.get("latency_ms", {}),
+            "tokens": result.get("tokens"),
+            "retrieval_ids": result.get("retrieval_ids", []),
+            "web_results": len(result.get("sources", {}).get("web", [])),
+            "question": redact(query, patient_name) if self.store_questions else None,
+            "question_chars": len(query),
+            "response_chars": len(result.get("response", ""))
+        }
+        return self.writer.write(record)
+
+    def stats(self) -> Dict:
+        return {"enabled": self.enabled, **(self.writer.stats() if self.writer else {})}
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def journal_segments(folder: Path, since: Optional[str] = None, until: Optional[str] = None) -> List[Path]:
+    """Compressed segments in write order, then the active file; since/until (YYYY-MM-DD) skip whole day folders"""
+    folder = Path(folder)
+    segments = []
+    for day in sorted(path for path in folder.iterdir() if path.is_dir()) if folder.exists() else []:
+        if (since and day.name < since) or (until and day.name > until):
+            continue
+        segments.extend(sorted(day.glob(f"{JOURNAL_BASE_NAME}-*.jsonl.zst")))
+    active = folder / f"{JOURNAL_BASE_NAME}.jsonl"
+    if active.exists():
+        # the writer rotates at midnight, so the active file holds one day at most
+        day = datetime.fromtimestamp(active.stat().st_mtime).strftime("%Y-%m-%d")
+        if not ((since and day < since) or (until and day > until)):
+            segments.append(active)
+    return segments
+
+
+def read_segment(path: Path) -> Iterator[Dict]:
+    """Stream records from one segment without decompressing it to disk; a torn last line is skipped"""
+    with open(path, "rb") as f:
+        lines = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(f)) if path.suffix == ".zst" else f
+        for line in lines:
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue
+
+
+def read_journal(folder: Path, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict]:
+    for path in journal_segments(folder, since, until):
+        yield from read_segment(path)
@@ -1,9 +1,17 @@
+import time
 from groq import Groq
-from typing import List, Dict
+from opentelemetry import trace
+from typing import Callable, List, Dict, Optional
 from src.utils.logger import Logger
+from src.utils.tracing import traced, mark_error
+from src.utils.deadline import Deadline
+from src.constants.degraded_stage_constants import DegradedStageConstant
 from src.constants.environment_constants import EnvironmentConstants
 
 
+CLINICAL_FALLBACK_RESPONSE = "I apologize, I'm having trouble generating a medical response right now. Please consult your healthcare provider."
+
+
 class LLMService:
     def __init__(self):
         self.client = Groq(api_key=EnvironmentConstants.GROQ_API_KEY.value)
@@ -13,54 +21,155 @@ class LLMService:
         Logger.log_info_message(f"Receptionist Model: {self.receptionist_model}")
         Logger.log_info_message(f"Clinical Model: {self.clinical_model}")
     
+    @staticmethod
+    def _record_request(model: str, messages: List[Dict[str, str]], max_tokens: int, temperature: float):
+        """Prompt size and request settings on the current span; message text is never recorded"""
+        span = trace.get_current_span()
+        span.set_attribute("gen_ai.system", "groq")
+        span.set_attribute("gen_ai.request.model", model)
+        span.set_attribute("gen_ai.request.max_tokens", max_tokens)
+        span.set_attribute("gen_ai.request.temperature", temperature)
+        span.set_attribute("llm.prompt.messages", len(messages))
+        span.set_attribute("llm.prompt.chars", sum(len(message["content"]) for message in messages))
+    
+    @staticmethod
+    def _record_usage(usage, response_text: Optional[str], counts: Optional[Dict] = None):
+        """Token usage and response size on the current span; ``counts`` receives the token numbers too"""
+        span = trace.get_current_span()
+        if usage is not None:
+            span.set_attribute("gen_ai.usage.input_tokens", usage.prompt_tokens)
+            span.set_attribute("gen_ai.usage.output_tokens", usage.completion_tokens)
+            if counts is not None:
+                counts.update(prompt=usage.prompt_tokens, completion=usage.completion_tokens)
+        if response_text is not None:
+            span.set_attribute("llm.response.chars", len(response_text))
+    
+    @traced("llm.receptionist")
     def generate_receptionist_response(
         self, 
         system_prompt: str, 
         user_message: str,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        deadline: Optional[Deadline] = None
     ) -> str:
-      
+        """Generate a receptionist reply; with a deadline the single attempt times out when the budget is spent"""
+        
+        client = self.client
+        if deadline is not None:
+            client = self.client.with_options(max_retries=0, timeout=deadline.remaining())
+        
         try:
-            response = self.client.chat.completions.create(
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ]
+            self._record_request(self.receptionist_model, messages, 500, temperature)
+            response = client.chat.completions.create(
                 model=self.receptionist_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
+                messages=messages,
                 temperature=temperature,
                 max_tokens=500
             )
             
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            self._record_usage(getattr(response, "usage", None), content)
+            return content
         
         except Exception as e:
+            mark_error(e)
+            if deadline is not None:
+                deadline.degrade(DegradedStageConstant.LLM_FAILED.value)
             Logger.log_error_message(e, "Error in receptionist LLM generation")
             return "I apologize, I'm having trouble processing your request right now. Please try again."
     
+    @traced("llm.clinical")
     def generate_clinical_response(
         self, 
         system_prompt: str, 
         user_message: str,
-        temperature: float = 0.3
+        temperature: float = 0.3,
+        on_partial: Optional[Callable[[str], None]] = None,
+        deadline: Optional[Deadline] = None,
+        usage: Optional[Dict] = None
     ) -> str:
+        """Generate a clinical answer; with on_partial, stream it and report each text delta.
+
+        With a deadline the call times out when the budget is spent, and
+        max_tokens shrinks to what can be generated in the time left. A
+        ``usage`` dict is filled with prompt/completion token counts when the
+        API reports them.
+        """
        
+        max_tokens = 1500
+        client = self.client
+        if deadline is not None:
+            budget = deadline.remaining()
+            affordable = int(
+                (budget - EnvironmentConstants.LLM_LATENCY_OVERHEAD_SECONDS.value)
+                * EnvironmentConstants.LLM_TOKENS_PER_SECOND.value
+            )
+            if affordable < max_tokens:
+                max_tokens = max(affordable, EnvironmentConstants.LLM_MIN_TOKENS.value)
+                deadline.degrade(DegradedStageConstant.LLM_TOKENS_REDUCED.value)
+            # a retry would start after the budget is gone, so the one attempt gets all of it
+            client = self.client.with_options(max_retries=0, timeout=budget)
+        
         try:
-            response = self.client.chat.completions.create(
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ]
+            self._record_request(self.clinical_model, messages, max_tokens, temperature)
+            trace.get_current_span().set_attribute("llm.stream", on_partial is not None)
+            started = time.perf_counter()
+            response = client.chat.completions.create(
                 model=self.clinical_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
+                messages=messages,
                 temperature=temperature,
-                max_tokens=1500
+                max_tokens=max_tokens,
+                stream=on_partial is not None
             )
             
-            return response.choices[0].message.content
+            if on_partial is None:
+                content = response.choices[0].message.content
+                self._record_usage(getattr(response, "usage", None), content, usage)
+                return content
+            
+            parts = []
+            reported = None
+            try:
+                for chunk in response:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        if not parts:
+                            trace.get_current_span().set_attribute(
+                                "llm.time_to_first_token_ms", round((time.perf_counter() - started) * 1000, 1)
+                            )
+                        parts.append(delta)
+                        on_partial(delta)
+                    # Groq reports usage on the final chunk
+                    x_groq = getattr(chunk, "x_groq", None)
+                    if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                        reported = x_groq.usage
+                    if deadline is not None and deadline.expired():
+                        # keep what was streamed so far rather than blowing the budget
+                        deadline.degrade(DegradedStageConstant.LLM_TRUNCATED.value)
+                        break
+            finally:
+                # an abandoned stream would keep its connection out of the pool until the server finishes
+                response.close()
+            content = "".join(parts)
+            self._record_usage(reported, content, usage)
+            return content
         
         except Exception as e:
+            mark_error(e)
+            if deadline is not None:
+                deadline.degrade(DegradedStageConstant.LLM_FAILED.value)
             Logger.log_error_message(e, "Error in clinical LLM generation")
-            return "I apologize, I'm having trouble generating a medical response right now. Please consult your healthcare provider."
+            return CLINICAL_FALLBACK_RESPONSE
     
+    @traced("llm.with_context")
     def generate_with_context(
         self,
         system_prompt: str,
@@ -75,6 +184,7 @@ class LLMService:
         try:
             formatted_messages = [{"role": "system", "content": system_prompt}]
             formatted_messages.extend(messages)
+            self._record_request(model, formatted_messages, max_tokens, temperature)
             
             response = self.client.chat.completions.create(
                 model=model,
@@ -83,8 +193,11 @@ class LLMService:
                 max_tokens=max_tokens
             )
             
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            self._record_usage(getattr(response, "usage", None), content)
+            return content
         
         except Exception as e:
+            mark_error(e)
             Logger.log_error_message(e, f"Error in {model_type} LLM generation with context")
             return "I apologize, I'm having trouble processing your request."
\ No newline at end of file
@@ -0,0 +1,227 @@
+import re
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from opentelemetry import trace
+from src.utils.logger import Logger
+from src.tools.rag_tool import RAGTool
+from src.services.embedding_service import EmbeddingService
+from src.constants.environment_constants import EnvironmentConstants
+
+
+_DIAGNOSIS_QUERIES = [
+    "{diagnosis} diet and fluid restrictions after discharge",
+    "{diagnosis} warning signs and when to seek emergency care",
+    "{diagnosis} recovery and follow-up care at home"
+]
+_WARNING_SIGNS_QUERY = "{warning_signs} in {diagnosis}"
+_MEDICATION_QUERY = "{medication} side effects and precautions"
+
+
+class _PrefetchEntry:
+    def __init__(self):
+        self.created = time.monotonic()
+        self.cancelled = threading.Event()
+        self.future: Optional[Future] = None
+        # (query embeddings, results per query, chunk embeddings by result id), set in one assignment once all exist
+        self.prefetched = None
+
+
+class PrefetchService:
+    """Speculative retrieval for a patient as soon as they are identified.
+
+    A single background thread embeds a few diagnosis-, warning-sign- and
+    medication-derived queries and searches them in one batch; results are
+    kept per session. It never competes with live requests: a prefetch is
+    skipped when more than PREFETCH_MAX_LIVE_REQUESTS admitted requests
+    (/message, /batch and WebSocket turns) are in flight, the job queue is
+    bounded, and a live question that arrives before the prefetch is ready
+    cancels it and searches on its own. Queries that came back empty are not
+    kept, and results from an index that has since been swapped are dropped.
+    The retrieved chunks are embedded too, so a merge with a live search can
+    rank them by their distance to the live question.
+    """
+
+    def __init__(self, embedding_service: EmbeddingService, rag_tool: RAGTool, live_requests: Callable[[], int]):
+        self.embedding_service = embedding_service
+        self.rag_tool = rag_tool
+        self.live_requests = live_requests
+        self.enabled = EnvironmentConstants.PREFETCH_ENABLED.value.lower() == "true"
+        self.max_queries = int(EnvironmentConstants.PREFETCH_MAX_QUERIES.value)
+        self.max_sessions = int(EnvironmentConstants.PREFETCH_MAX_SESSIONS.value)
+        self.queue_size = int(EnvironmentConstants.PREFETCH_QUEUE_SIZE.value)
+        self.max_live_requests = int(EnvironmentConstants.PREFETCH_MAX_LIVE_REQUESTS.value)
+        self.ttl = EnvironmentConstants.PREFETCH_TTL_SECONDS.value
+        self.reuse_similarity = EnvironmentConstants.PREFETCH_REUSE_SIMILARITY.value
+        self.merge_similarity = EnvironmentConstants.PREFETCH_MERGE_SIMILARITY.value
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._entries: "OrderedDict[str, _PrefetchEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.counts = {
+            "started": 0, "completed": 0, "failed": 0, "skipped_busy": 0, "dropped": 0, "cancelled": 0,
+            "reused": 0, "merged": 0, "missed": 0
+        }
+        Logger.log_info_message(f"Prefetch Service initialized (enabled={self.enabled})")
+
+    def _busy(self) -> bool:
+        return self.live_requests() > self.max_live_requests
+
+    def queries_for(self, patient: Dict) -> List[str]:
+        """Retrieval queries a newly identified patient is likely to need, most general first"""
+        diagnosis = patient["primary_diagnosis"]
+        queries = [template.format(diagnosis=diagnosis) for template in _DIAGNOSIS_QUERIES]
+        if patient.get("warning_signs"):
+            queries.append(_WARNING_SIGNS_QUERY.format(warning_signs=patient["warning_signs"], diagnosis=diagnosis))
+        for medication in patient.get("medications", []):
+            # "Furosemide 20mg twice daily" -> "Furosemide"
+            name = re.split(r"\s+\d", medication, maxsplit=1)[0].strip()
+            if name:
+                queries.append(_MEDICATION_QUERY.format(medication=name))
+        return queries[:self.max_queries]
+
+    def start(self, session_id: str, patient: Dict):
+        """Queue a prefetch for the session's patient, replacing any earlier one"""
+        if not self.enabled:
+            return
+        self.cancel(session_id)
+        if self._busy():
+            self.counts["skipped_busy"] += 1
+            return
+
+        with self._lock:
+            if self._pending >= self.queue_size:
+                self.counts["dropped"] += 1
+                return
+            entry = _PrefetchEntry()
+            self._entries[session_id] = entry
+            while len(self._entries) > self.max_sessions:
+                _, evicted = self._entries.popitem(last=False)
+                evicted.cancelled.set()
+            self._pending += 1
+            self.counts["started"] += 1
+        entry.future = self._executor.submit(self._run, session_id, entry, patient)
+
+    def _discard(self, session_id: str, entry: _PrefetchEntry):
+        with self._lock:
+            if self._entries.get(session_id) is entry:
+                del self._entries[session_id]
+
+    def _run(self, session_id: str, entry: _PrefetchEntry, patient: Dict):
+        try:
+            # checked again at every step: the session may be gone or traffic may have arrived
+            if entry.cancelled.is_set() or self._busy():
+                return
+            queries = self.queries_for(patient)
+            embeddings = self.embedding_service.encode_batch(queries)
+            if entry.cancelled.is_set() or self._busy():
+                return
+            index_version = self.rag_tool.index_version
+            results = self.rag_tool.search_batch(embeddings, diagnosis=patient.get("primary_diagnosis"))
+            if entry.cancelled.is_set():
+                return
+            # search_batch answers a failure with empty rows; an empty row must not stand in for a live search
+            kept = [row for row, rows in enumerate(results) if rows]
+            if not kept or self.rag_tool.index_version != index_version:
+                self._discard(session_id, entry)
+                self.counts["failed"] += 1
+                return
+            chunks = {result["id"]: result["content"] for row in kept for result in results[row]}
+            if entry.cancelled.is_set() or self._busy():
+                return
+            chunk_embeddings = dict(zip(chunks, self.embedding_service.encode_batch(list(chunks.values()))))
+            entry.prefetched = (embeddings[kept], [results[row] for row in kept], chunk_embeddings)
+            self.counts["completed"] += 1
+        except Exception as e:
+            self._discard(session_id, entry)
+            self.counts["failed"] += 1
+            Logger.log_error_message(e, "Retrieval prefetch failed")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _cancel_entry(self, entry: _PrefetchEntry):
+        entry.cancelled.set()
+        if entry.future is not None and entry.future.cancel():
+            # never started, so _run will not release its queue slot
+            with self._lock:
+                self._pending -= 1
+        self.counts["cancelled"] += 1
+
+    def cancel(self, session_id: str):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is not None and entry.prefetched is None:
+            self._cancel_entry(entry)
+
+    def clear(self):
+        """Drop every session's prefetch, e.g. once the index it was retrieved from is swapped out"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            if entry.prefetched is None:
+                self._cancel_entry(entry)
+        Logger.log_info_message(f"Cleared {len(entries)} prefetched sessions")
+
+    def retrieve(self, session_id: Optional[str], query_embedding: np.ndarray, search: Callable[[], List[Dict]]) -> List[Dict]:
+        """Retrieval for a live question: prefetched results when a prefetched query is near enough, merged with
+        a live search when it is only close, otherwise the live search alone.
+
+        Merged prefetched hits are re-scored against the question, since their
+        search distances were measured from the prefetched query.
+        """
+        span = trace.get_current_span()
+        with self._lock:
+            entry = self._entries.get(session_id) if session_id else None
+        if entry is not None and entry.prefetched is None:
+            # still running or queued: do not let it race the live search
+            self.cancel(session_id)
+            entry = None
+        if entry is None or time.monotonic() - entry.created > self.ttl:
+            span.set_attribute("prefetch.outcome", "none")
+            return search()
+
+        embeddings, results, chunk_embeddings = entry.prefetched
+        scores = embeddings @ query_embedding
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        span.set_attribute("prefetch.similarity", similarity)
+
+        if similarity >= self.reuse_similarity:
+            self.counts["reused"] += 1
+            span.set_attribute("prefetch.outcome", "reused")
+            return results[best]
+
+        live = search()
+        if similarity < self.merge_similarity:
+            self.counts["missed"] += 1
+            span.set_attribute("prefetch.outcome", "missed")
+            return live
+
+        self.counts["merged"] += 1
+        span.set_attribute("prefetch.outcome", "merged")
+        seen = {result["id"] for result in live}
+        # 1 - cosine to the question, the scale of the live results' normalized_distance
+        merged = live + [
+            {**result, "normalized_distance": float(1 - chunk_embeddings[result["id"]] @ query_embedding)}
+            for result in results[best] if result["id"] not in seen
+        ]
+        merged.sort(key=lambda result: result["normalized_distance"] if result["normalized_distance"] is not None else float("inf"))
+        return merged[:max(len(live), EnvironmentConstants.RAG_TOP_K.value)]
+
+    def status(self) -> Dict:
+        with self._lock:
+            sessions = len(self._entries)
+            ready = sum(1 for entry in self._entries.values() if entry.prefetched is not None)
+        return {
+            "enabled": self.enabled,
+            "sessions": sessions,
+            "ready": ready,
+            "pending": self._pending,
+            "counts": dict(self.counts)
+        }
@@ -0,0 +1,298 @@
+import io
+import os
+import sys
+import time
+import random
+import marshal
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter, deque
+from typing import Callable, Dict, Optional
+from src.utils.logger import Logger
+from src.constants.environment_constants import EnvironmentConstants
+
+
+class ProfilerBusyError(Exception):
+    pass
+
+
+def _collapse_stack(frame) -> str:
+    """Root-first ``file:function`` frames joined by ';' (flamegraph.pl / speedscope input)"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _ProfileSession:
+    """One profiling run, bounded by a request count or a time window"""
+
+    def __init__(
+        self,
+        mode: str,
+        max_requests: Optional[int],
+        seconds: Optional[float],
+        sample_rate: float,
+        interval: float,
+        on_finish: Callable
+    ):
+        self.mode = mode
+        self.max_requests = max_requests
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.on_finish = on_finish
+        self.started_at = time.time()
+        self.started = time.monotonic()
+
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.completed = 0
+        self.finished = False
+
+        self.stats: Optional[pstats.Stats] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._threads: Dict[int, int] = {}
+        self._sampler: Optional[threading.Thread] = None
+        if mode == "sampler":
+            self._sampler = threading.Thread(target=self._sample_loop, name="stack-sampler", daemon=True)
+            self._sampler.start()
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def admit(self) -> bool:
+        with self._lock:
+            if self.finished or self.expired():
+                return False
+            if self.max_requests is not None and self.admitted >= self.max_requests:
+                return False
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return False
+            self.admitted += 1
+            return True
+
+    def profile_call(self, func: Callable, *args, **kwargs):
+        if self.mode == "cprofile":
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                with self._lock:
+                    if self.stats is None:
+                        self.stats = pstats.Stats(profile)
+                    else:
+                        self.stats.add(profile)
+                    self.completed += 1
+
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._threads[ident] -= 1
+                if not self._threads[ident]:
+                    del self._threads[ident]
+                self.completed += 1
+
+    def done(self) -> bool:
+        if self.expired():
+            return True
+        return self.max_requests is not None and self.completed >= self.max_requests
+
+    def _sample_loop(self):
+        while not self.finished:
+            with self._lock:
+                idents = list(self._threads)
+            if idents:
+                frames = sys._current_frames()
+                stacks = [_collapse_stack(frames[ident]) for ident in idents if ident in frames]
+                del frames
+                with self._lock:
+                    self.stacks.update(stacks)
+                    self.samples += len(stacks)
+            if self.expired():
+                # time-window runs end here even when no request is in flight
+                self.on_finish(self)
+                return
+            time.sleep(self.interval)
+
+    def result(self) -> Dict:
+        result = {
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "duration_seconds": round(time.monotonic() - self.started, 3),
+            "requests_profiled": self.completed,
+        }
+        if self.mode == "sampler":
+            with self._lock:
+                result["samples"] = self.samples
+                result["collapsed"] = "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+        elif self.stats is not None:
+            output = io.StringIO()
+            self.stats.stream = output
+            self.stats.sort_stats("cumulative").print_stats(40)
+            result["top"] = output.getvalue()
+            result["pstats"] = marshal.dumps(self.stats.stats)
+        return result
+
+    def status(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "max_requests": self.max_requests,
+            "seconds_left": round(max(self.deadline - time.monotonic(), 0), 1) if self.deadline else None,
+            "requests_profiled": self.completed,
+            "in_flight": self.admitted - self.completed,
+        }
+
+
+class ProfilerService:
+    """On-demand cProfile / stack sampling of chat turns plus tracemalloc snapshots.
+
+    Nothing is installed until a session is started: the request path only
+    reads ``self._session``, so the profiler costs one attribute lookup when off.
+    """
+
+    def __init__(self):
+        app_modes = [mode.strip().lower() for mode in EnvironmentConstants.PROFILING_APP_MODES.value.split(",")]
+        self.enabled = EnvironmentConstants.APP_MODE.value.lower() in app_modes
+        self._lock = threading.Lock()
+        self._session: Optional[_ProfileSession] = None
+        self._last_result: Optional[Dict] = None
+        self._snapshots: deque = deque(maxlen=int(EnvironmentConstants.TRACEMALLOC_MAX_SNAPSHOTS.value))
+        Logger.log_info_message(f"Profiler Service initialized ({'enabled' if self.enabled else 'disabled'})")
+
+    def run(self, func: Callable, *args, **kwargs):
+        """Call func, profiling it if a session is running and admits it"""
+        session = self._session
+        if session is None:
+            return func(*args, **kwargs)
+        if not session.admit():
+            if session.done():
+                # a time window that ran out between requests
+                self._finish(session)
+            return func(*args, **kwargs)
+        try:
+            return session.profile_call(func, *args, **kwargs)
+        finally:
+            if session.done():
+                self._finish(session)
+
+    def start(
+        self,
+        mode: str,
+        requests: Optional[int] = None,
+        seconds: Optional[float] = None,
+        sample_rate: float = 1.0,
+        interval_ms: Optional[float] = None
+    ) -> Dict:
+        with self._lock:
+            if self._session is not None:
+                raise ProfilerBusyError("A profiling session is already running")
+            if requests is None and seconds is None:
+                requests = int(EnvironmentConstants.PROFILE_DEFAULT_REQUESTS.value)
+            interval = (interval_ms or EnvironmentConstants.PROFILE_SAMPLE_INTERVAL_MS.value) / 1000
+            self._session = _ProfileSession(mode, requests, seconds, sample_rate, interval, self._finish)
+            Logger.log_info_message(f"Profiling started: {mode}, requests={requests}, seconds={seconds}, sample_rate={sample_rate}")
+            return self._session.status()
+
+    def stop(self) -> Optional[Dict]:
+        session = self._session
+        if session is not None:
+            self._finish(session)
+        return self._last_result
+
+    def _finish(self, session: _ProfileSession):
+        with self._lock:
+            if session.finished:
+                return
+            session.finished = True
+            if self._session is session:
+                self._session = None
+        self._last_result = session.result()
+        Logger.log_info_message(
+            f"Profiling finished: {session.mode}, {self._last_result['requests_profiled']} requests "
+            f"in {self._last_result['duration_seconds']}s"
+        )
+
+    def status(self) -> Dict:
+        session = self._session
+        last = self._last_result
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "enabled": self.enabled,
+            "session": session.status() if session else None,
+            "last_result": {key: last[key] for key in ("mode", "started_at", "duration_seconds", "requests_profiled")} if last else None,
+            "tracemalloc": {
+                "tracing": tracemalloc.is_tracing(),
+                "snapshots": len(self._snapshots),
+                "traced_current_bytes": current,
+                "traced_peak_bytes": peak
+            }
+        }
+
+    def last_result(self) -> Optional[Dict]:
+        return self._last_result
+
+    def take_snapshot(self, labels: Optional[Dict] = None) -> Dict:
+        """Start tracemalloc on first use and keep a bounded history of snapshots"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(EnvironmentConstants.TRACEMALLOC_FRAMES.value)
+            Logger.log_info_message("tracemalloc started")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        self._snapshots.append({"taken_at": time.time(), "snapshot": snapshot, "labels": labels or {}})
+        return {
+            "snapshots": len(self._snapshots),
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "labels": labels or {}
+        }
+
+    def snapshot_diff(self, limit: int = 25, key_type: str = "lineno", path_filter: Optional[str] = None) -> Dict:
+        """Largest allocation growth between the two most recent snapshots"""
+        if len(self._snapshots) < 2:
+            return {"error": "Take at least two snapshots first", "snapshots": len(self._snapshots)}
+
+        older, newer = self._snapshots[-2], self._snapshots[-1]
+        old_snapshot, new_snapshot = older["snapshot"], newer["snapshot"]
+        if path_filter:
+            filters = (tracemalloc.Filter(True, f"*{path_filter}*"),)
+            old_snapshot = old_snapshot.filter_traces(filters)
+            new_snapshot = new_snapshot.filter_traces(filters)
+
+        stats = new_snapshot.compare_to(old_snapshot, key_type)
+        return {
+            "seconds_between": round(newer["taken_at"] - older["taken_at"], 3),
+            "labels": {"before": older["labels"], "after": newer["labels"]},
+            "total_size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top": [self._format_stat(stat) for stat in stats[:limit]]
+        }
+
+    @staticmethod
+    def _format_stat(stat) -> Dict:
+        return {
+            "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            "size_bytes": stat.size,
+            "size_diff_bytes": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff
+        }
+
+    def stop_tracemalloc(self) -> Dict:
+        """Drop snapshots and stop tracing so allocations are free again"""
+        self._snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            Logger.log_info_message("tracemalloc stopped")
+        return {"tracing": False}
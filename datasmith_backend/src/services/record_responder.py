@@ -0,0 +1,137 @@
+import re
+from typing import Dict, List, Optional
+from src.utils.logger import Logger
+from src.constants.environment_constants import EnvironmentConstants
+
+
+RECORD_INTENT = "record"
+
+# Questions that only ask what a discharge-record field says, phrased as a lookup of the
+# patient's own record ("what are my medications"). The lookup must end the lowercased
+# question (trailing punctuation stripped, a few filler words allowed): anything after it,
+# as in "what are my pills for", asks something the record does not answer.
+_MEDS = r"(medications?|medicines?|meds|pills|tablets|prescriptions?)"
+_DIET = r"(diet|dietary\s+restrictions?|diet\s+restrictions?|fluid\s+(limits?|restrictions?)|(salt|sodium)\s+(limits?|restrictions?))"
+_VISIT = r"(follow[\s-]?up|appointment|check[\s-]?up|clinic\s+visit)(\s+(appointment|visit))?"
+_PER_DAY = r"(\s+(per|a|each|every)\s+day|\s+daily)?"
+_END = r"(\s+(again|please|now|today|currently|right\s+now|exactly))*$"
+RECORD_QUESTIONS: Dict[str, List[str]] = {
+    "follow_up": [
+        r"\b(when|what|what\s+time|what\s+day|what\s+date)\s+is\s+my\s+(next\s+)?" + _VISIT + _END,
+        r"\bwhen\s+(do|should)\s+i\s+(see|go\s+back\s+to|return\s+to)\s+(the|my)\s+(doctor|nephrologist|specialist|clinic)" + _END,
+        r"\bwhen\s+(do|should)\s+i\s+(have|book|schedule)\s+(a|my)\s+" + _VISIT + _END,
+        r"\b(tell|remind)\s+me\s+(about\s+|of\s+)?my\s+(next\s+)?" + _VISIT + _END,
+        r"^(my\s+)?(next\s+)?follow[\s-]?ups?" + _END,
+    ],
+    "medications": [
+        r"\bwhat\s+(are|were)\s+my\s+" + _MEDS + _END,
+        r"\b(what|which)\s+" + _MEDS + r"\s+(am|was|do|should)\s+i\s+(on|taking|take|prescribed|supposed\s+to\s+take)" + _END,
+        r"\b(list|tell\s+me|remind\s+me\s+of)\s+(about\s+)?my\s+" + _MEDS + _END,
+        r"^(my\s+)?" + _MEDS + _END,
+    ],
+    "dietary_restrictions": [
+        r"\bwhat\s+(is|are)\s+my\s+" + _DIET + _END,
+        r"\bwhat\s+diet\s+(am\s+i|should\s+i\s+be|do\s+i\s+need\s+to\s+be)\s+on" + _END,
+        r"\bhow\s+much\s+(water|fluids?|liquids?|salt|sodium)\s+((can|should|may)\s+i\s+(have|drink|eat|take|use)|am\s+i\s+allowed(\s+to\s+(have|drink|eat))?)" + _PER_DAY + _END,
+        r"\bwhat\s+(can|can't|cannot|should|shouldn't)\s+i\s+(eat|drink)(\s+(and|or)\s+(eat|drink))?" + _END,
+        r"\b(do\s+i\s+have|are\s+there)\s+(any\s+)?(dietary|diet|food|fluid)\s+restrictions?" + _END,
+        r"\b(tell|remind)\s+me\s+(about\s+|of\s+)?my\s+" + _DIET + _END,
+    ],
+    "warning_signs": [
+        r"\bwhat\s+(are|were)\s+(my\s+|the\s+)?(warning|danger)\s+signs" + _END,
+        r"\bwhat\s+are\s+(my|the)\s+red\s+flags" + _END,
+        r"\bwhat\s+(warning\s+signs|danger\s+signs|symptoms|signs)\s+should\s+i\s+(watch|look\s+out)\s+for" + _END,
+        r"\bwhen\s+should\s+i\s+(call\s+(my|the)\s+(doctor|care\s+team)|go\s+to\s+(the\s+)?(er|emergency|hospital)|seek\s+(emergency\s+)?(help|care))" + _END,
+    ],
+    "discharge_instructions": [
+        r"\bwhat\s+(are|were)\s+my\s+(discharge\s+)?instructions" + _END,
+        r"\b(tell|remind)\s+me\s+(about\s+|of\s+)?my\s+(discharge\s+)?instructions" + _END,
+        r"\bwhat\s+(should|do)\s+i\s+(do|monitor|check)\s+(at\s+home|daily|every\s+day|each\s+day)" + _END,
+        r"^(my\s+)?discharge\s+instructions" + _END,
+    ],
+}
+
+# Any mention of a field; a question that mentions a field it is not matched as looking up
+# spans several fields ("what is my follow-up and my diet") and goes to the LLM whole
+RECORD_MENTIONS: Dict[str, str] = {
+    "follow_up": r"\b(follow[\s-]?ups?|appointments?|check[\s-]?ups?|clinic\s+visits?)\b",
+    "medications": r"\b" + _MEDS + r"\b",
+    "dietary_restrictions": r"\b(diet\w*|fluids?|water|liquids?|salt|sodium|food|eat|drink)\b",
+    "warning_signs": r"\b((warning|danger)\s+signs?|red\s+flags?|symptoms)\b",
+    "discharge_instructions": r"\binstructions?\b",
+}
+
+# Asking for judgement, describing a symptom or a situation, or asking about something
+# other than the record itself needs the clinical pipeline, even when a field is mentioned
+OPEN_ENDED_PATTERN = (
+    r"\b(why|if|because|unless|side\s+effects?|interact\w*|safe|okay|ok|dangerous|risks?|miss\w*|forgot|skip\w*|"
+    r"doses?|stop\s+taking|instead|alternatives?|what\s+happens|mean|normal|pain|hurts?|feel\w*|worse|"
+    r"swollen|swelling|fever|temperature|bleed\w*|dizz\w*|nause\w*|vomit\w*|breath\w*|explain|"
+    r"change|reschedule|cancel|move|postpone|"
+    r"(can|may|could)\s+i\s+(eat|drink|take|have|use|skip|stop)\s+(?!(per|a\s+day|each|every|daily)\b)\w+|"
+    r"how\s+(does|do)\s+(it|they|these|this)\s+work)\b"
+)
+
+RECORD_TEMPLATES: Dict[str, str] = {
+    "follow_up": "**Follow-up:** {value}.",
+    "medications": "**Medications:**\n{value}",
+    "dietary_restrictions": "**Dietary restrictions:** {value}.",
+    "warning_signs": (
+        "**Warning signs to watch for:** {value}. If you notice any of these, contact your care team right away, "
+        "and call emergency services if they are severe."
+    ),
+    "discharge_instructions": "**Discharge instructions:** {value}.",
+}
+
+
+class RecordResponder:
+    """Template answers for questions that only look up the patient's discharge record.
+
+    Questions are matched against patterns per record field; a question that
+    matches none, asks for judgement (why, side effects, is it safe...),
+    describes a symptom, mentions a field it does not look up or is longer
+    than RECORD_ANSWER_MAX_CHARS is left to the clinical pipeline, as is one
+    asking about a field the record lacks.
+    """
+
+    def __init__(self):
+        self.enabled = EnvironmentConstants.RECORD_ANSWERS_ENABLED.value.lower() == "true"
+        self.max_chars = int(EnvironmentConstants.RECORD_ANSWER_MAX_CHARS.value)
+        self.questions = {field: [re.compile(pattern) for pattern in patterns] for field, patterns in RECORD_QUESTIONS.items()}
+        self.mentions = {field: re.compile(pattern) for field, pattern in RECORD_MENTIONS.items()}
+        self.open_ended = re.compile(OPEN_ENDED_PATTERN)
+        Logger.log_info_message(f"Record Responder initialized (enabled={self.enabled})")
+
+    def match(self, question: str) -> List[str]:
+        """Record fields the question asks for, in RECORD_QUESTIONS order; empty when it needs the LLM"""
+        if not self.enabled or len(question) > self.max_chars:
+            return []
+        text = " ".join(question.lower().replace("’", "'").split()).rstrip("?.! ").replace("what's", "what is")
+        if self.open_ended.search(text):
+            return []
+        fields = [field for field, patterns in self.questions.items() if any(pattern.search(text) for pattern in patterns)]
+        if any(pattern.search(text) for field, pattern in self.mentions.items() if field not in fields):
+            return []
+        return fields
+
+    @staticmethod
+    def _format(field: str, value) -> str:
+        if isinstance(value, list):
+            value = "\n".join(f"- {item}" for item in value)
+        else:
+            value = str(value).strip().rstrip(".")
+        return RECORD_TEMPLATES[field].format(value=value)
+
+    def answer(self, question: str, patient_data: Dict) -> Optional[Dict]:
+        """The templated answer and the fields it used, or None for the clinical pipeline"""
+        fields = self.match(question)
+        if not fields or any(not patient_data.get(field) for field in fields):
+            return None
+        parts = [self._format(field, patient_data[field]) for field in fields]
+        discharge_date = patient_data.get("discharge_date")
+        response = (
+            (f"From your discharge record ({discharge_date}):\n\n" if discharge_date else "From your discharge record:\n\n")
+            + "\n\n".join(parts)
+            + "\n\nAsk me if you would like more detail on any of this, or contact your healthcare provider with concerns."
+        )
+        return {"response": response, "fields": fields}
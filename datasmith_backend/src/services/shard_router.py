@@ -0,0 +1,62 @@
+import numpy as np
+from typing import Dict, List, Optional
+from sentence_transformers import SentenceTransformer
+from src.utils.logger import Logger
+from src.constants.environment_constants import EnvironmentConstants
+
+
+class ShardRouter:
+    """Pick the knowledge-base shards worth searching for a patient and a question.
+
+    A diagnosis selects shards by keyword (``"diagnoses"`` in the shard config)
+    or, failing that, by similarity to the shard description; the question adds
+    any shard whose description it is close to. Nothing selected means the
+    default shards.
+    """
+
+    def __init__(self, embedding_model: SentenceTransformer, shard_configs: List[Dict]):
+        self.embedding_model = embedding_model
+        self.min_similarity = EnvironmentConstants.SHARD_MIN_SIMILARITY.value
+        self.names = [config["name"] for config in shard_configs]
+        self.keywords = {config["name"]: [keyword.lower() for keyword in config.get("diagnoses", [])] for config in shard_configs}
+        self.defaults = [config["name"] for config in shard_configs if config.get("default")] or self.names[:1]
+        self.centroids = self._build_centroids(embedding_model, shard_configs)
+        self._diagnosis_shards: Dict[str, List[str]] = {}
+        Logger.log_info_message(f"Shard Router initialized with {len(self.names)} shards")
+
+    @staticmethod
+    def _build_centroids(embedding_model: SentenceTransformer, shard_configs: List[Dict]) -> np.ndarray:
+        """One unit-length centroid per shard over its description and diagnosis keywords (rows follow self.names)"""
+        if not shard_configs:
+            return np.zeros((0, 0), dtype=np.float32)
+        centroids = []
+        for config in shard_configs:
+            texts = [config.get("description") or config["name"], *config.get("diagnoses", [])]
+            centroid = embedding_model.encode(texts, normalize_embeddings=True, show_progress_bar=False).mean(axis=0)
+            centroids.append(centroid / np.linalg.norm(centroid))
+        return np.vstack(centroids).astype(np.float32)
+
+    def _similar(self, embedding: np.ndarray) -> List[str]:
+        scores = self.centroids @ embedding
+        return [self.names[i] for i in np.argsort(-scores) if scores[i] >= self.min_similarity]
+
+    def for_diagnosis(self, diagnosis: str) -> List[str]:
+        """Shards covering a diagnosis (cached per diagnosis)"""
+        if diagnosis not in self._diagnosis_shards:
+            lowered = diagnosis.lower()
+            shards = [name for name in self.names if any(keyword in lowered for keyword in self.keywords[name])]
+            if not shards and len(self.centroids):
+                embedding = self.embedding_model.encode([diagnosis], normalize_embeddings=True, show_progress_bar=False)[0]
+                shards = self._similar(np.asarray(embedding, dtype=np.float32))
+            self._diagnosis_shards[diagnosis] = shards
+        return self._diagnosis_shards[diagnosis]
+
+    def route(self, diagnosis: Optional[str] = None, query_embedding: Optional[np.ndarray] = None) -> List[str]:
+        """Shard names to search, diagnosis matches first"""
+        shards = list(self.for_diagnosis(diagnosis)) if diagnosis else []
+        if query_embedding is not None and len(self.centroids):
+            # a kidney patient asking about blood sugar also needs the diabetes shard
+            for name in self._similar(query_embedding):
+                if name not in shards:
+                    shards.append(name)
+        return shards or list(self.defaults)
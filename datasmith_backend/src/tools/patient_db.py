@@ -1,22 +1,221 @@
 import json
-from typing import Optional, Dict, List
+import time
+import base64
+import bisect
+import heapq
+import orjson
+import threading
+from typing import Optional, Dict, Iterator, List, Sequence, Tuple
 from pathlib import Path
+from watchfiles import watch
 from src.utils.logger import Logger
+from src.utils.http_cache import compute_version
 from src.constants.environment_constants import EnvironmentConstants
 
 
+REQUIRED_PATIENT_FIELDS = ("patient_name", "discharge_date", "primary_diagnosis", "medications", "follow_up")
+PATIENT_FIELDS = REQUIRED_PATIENT_FIELDS + ("dietary_restrictions", "warning_signs", "discharge_instructions")
+# listing field -> record field; the default listing keeps its original short names
+PATIENT_FIELD_ALIASES = {"name": "patient_name", "diagnosis": "primary_diagnosis"}
+DEFAULT_LISTING_FIELDS = ("name", "diagnosis", "discharge_date")
+
+_STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def encode_cursor(key: Tuple[str, str, int]) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(key)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, int]:
+    """Raises ValueError for anything encode_cursor did not produce"""
+    try:
+        name, discharge_date, position = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not (isinstance(name, str) and isinstance(discharge_date, str) and isinstance(position, int)):
+        raise ValueError("Invalid cursor")
+    return name, discharge_date, position
+
+
+def _prefix_end(prefix: str) -> str:
+    # the smallest string greater than every string starting with prefix
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _ranks_from(ranks: List[int], start: int) -> Iterator[int]:
+    for i in range(bisect.bisect_left(ranks, start), len(ranks)):
+        yield ranks[i]
+
+
+class _PatientIndex:
+    """One parsed version of patients.json and its lookup indexes, swapped as one unit.
+    
+    Listings run in rank order: lowercased name, then discharge date, then file
+    position. A cursor is the (name, date, position) key of the last record
+    served, so paging carries on in the right place after a reload; only
+    records sharing both name and discharge date can shift across one.
+    """
+    
+    def __init__(self, patients: List[Dict]):
+        self.patients = patients
+        self.by_name: Dict[str, Dict] = {}
+        for patient in patients:
+            # the first record wins, as with the linear exact-match scan
+            self.by_name.setdefault(patient["patient_name"].lower().strip(), patient)
+        
+        self.keys: List[Tuple[str, str, int]] = sorted(
+            (patient["patient_name"].lower().strip(), str(patient["discharge_date"]), position)
+            for position, patient in enumerate(patients)
+        )
+        # rank -> discharge date / lowercased diagnosis, for filtering without touching records
+        self.dates: List[str] = []
+        self.diagnoses: List[str] = []
+        # lowercased diagnosis -> its ranks, ascending
+        self.by_diagnosis: Dict[str, List[int]] = {}
+        # full names and each of their words, sorted, for prefix search: term i belongs to rank term_ranks[i]
+        terms = []
+        for rank, (name, discharge_date, position) in enumerate(self.keys):
+            diagnosis = str(patients[position]["primary_diagnosis"]).lower().strip()
+            self.dates.append(discharge_date)
+            self.diagnoses.append(diagnosis)
+            self.by_diagnosis.setdefault(diagnosis, []).append(rank)
+            terms.extend((term, rank) for term in {name, *name.split()})
+        terms.sort()
+        self.terms = [term for term, _ in terms]
+        self.term_ranks = [rank for _, rank in terms]
+        
+        self.version = compute_version(patients)
+        self.loaded_at = time.time()
+        self.load_seconds = 0.0
+    
+    def patient_at(self, rank: int) -> Dict:
+        return self.patients[self.keys[rank][2]]
+    
+    def matching_ranks(
+        self,
+        after: Optional[Tuple[str, str, int]] = None,
+        name_prefix: Optional[str] = None,
+        diagnosis: Optional[str] = None,
+        discharged_from: Optional[str] = None,
+        discharged_to: Optional[str] = None
+    ) -> Iterator[int]:
+        """Ranks past the cursor key that pass every filter, ascending and lazily.
+        
+        The name prefix (any word of the name, or the full name) or the
+        diagnosis (case-insensitive substring) drives the iteration from its
+        index; the remaining filters are checked per rank.
+        """
+        start = bisect.bisect_right(self.keys, after) if after else 0
+        diagnoses = None
+        if diagnosis:
+            needle = diagnosis.lower().strip()
+            diagnoses = {value for value in self.by_diagnosis if needle in value}
+            if not diagnoses:
+                return
+        
+        if name_prefix and name_prefix.strip():
+            prefix = name_prefix.lower().strip()
+            matched = sorted(set(self.term_ranks[
+                bisect.bisect_left(self.terms, prefix):bisect.bisect_left(self.terms, _prefix_end(prefix))
+            ]))
+            candidates = iter(matched[bisect.bisect_left(matched, start):])
+        elif diagnoses is not None:
+            candidates = heapq.merge(*(_ranks_from(self.by_diagnosis[value], start) for value in diagnoses))
+            # the merge already yields only matching diagnoses
+            diagnoses = None
+        else:
+            candidates = iter(range(start, len(self.keys)))
+        
+        for rank in candidates:
+            if diagnoses is not None and self.diagnoses[rank] not in diagnoses:
+                continue
+            if (discharged_from and self.dates[rank] < discharged_from) or (discharged_to and self.dates[rank] > discharged_to):
+                continue
+            yield rank
+
+
+class PatientPage:
+    """One page of a patient listing, drawn lazily from a single index snapshot.
+    
+    next_cursor is known once iteration has finished: None when the listing is
+    exhausted, else the cursor for the following page.
+    """
+    
+    def __init__(self, index: _PatientIndex, ranks: Iterator[int], limit: int):
+        self.version = index.version
+        self.limit = limit
+        self.count = 0
+        self.next_cursor: Optional[str] = None
+        self._index = index
+        self._ranks = ranks
+    
+    def __iter__(self) -> Iterator[Dict]:
+        last = None
+        for rank in self._ranks:
+            if self.count == self.limit:
+                # one rank past the page proves there is a next one
+                self.next_cursor = encode_cursor(self._index.keys[last])
+                return
+            yield self._index.patient_at(rank)
+            last = rank
+            self.count += 1
+    
+    def iter_json(self, fields: Sequence[str] = DEFAULT_LISTING_FIELDS) -> Iterator[bytes]:
+        """The page as one JSON object, {"patients": [...], "next_cursor": ..., "version": ...},
+        in chunks of about _STREAM_CHUNK_BYTES with each record projected to fields"""
+        sources = [(field, PATIENT_FIELD_ALIASES.get(field, field)) for field in fields]
+        buffer = bytearray(b'{"patients":[')
+        for patient in self:
+            if self.count:
+                buffer += b","
+            buffer += orjson.dumps({field: patient.get(source) for field, source in sources})
+            if len(buffer) >= _STREAM_CHUNK_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b'],"next_cursor":' + orjson.dumps(self.next_cursor) + b',"version":' + orjson.dumps(self.version) + b"}"
+        yield bytes(buffer)
+
+
 class PatientDatabase:
-    def __init__(self):
-        self.patients_path = Path(EnvironmentConstants.PATIENTS_JSON_PATH.value)
-        self.patients = self._load_patients()
+    def __init__(self, patients_path: Optional[Path] = None):
+        self.patients_path = Path(patients_path or EnvironmentConstants.PATIENTS_JSON_PATH.value)
+        started = time.perf_counter()
+        self._index = _PatientIndex(self._load_patients())
+        self._index.load_seconds = round(time.perf_counter() - started, 4)
+        self._reload_lock = threading.Lock()
+        self._stop_watching = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_reload: Optional[Dict] = None
+        self.last_error: Optional[str] = None
         Logger.log_info_message(f"Loaded {len(self.patients)} patients from database")
     
+    @property
+    def patients(self) -> List[Dict]:
+        return self._index.patients
+    
+    @property
+    def version(self) -> str:
+        return self._index.version
+    
+    def _read_patients(self) -> List[Dict]:
+        """Parse and validate the file; raises on a missing, partial or malformed file"""
+        with open(self.patients_path, 'r') as f:
+            patients = json.load(f)
+        if not isinstance(patients, list):
+            raise ValueError("patients.json must hold a list of patient records")
+        for position, patient in enumerate(patients):
+            missing = [field for field in REQUIRED_PATIENT_FIELDS if not isinstance(patient, dict) or field not in patient]
+            if missing:
+                raise ValueError(f"Patient record {position} is missing {', '.join(missing)}")
+        return patients
+    
     def _load_patients(self) -> List[Dict]:
         """Load patients from JSON file"""
         try:
             if self.patients_path.exists():
-                with open(self.patients_path, 'r') as f:
-                    return json.load(f)
+                return self._read_patients()
             else:
                 Logger.log_error_message(
                     Exception("Patients file not found"), 
@@ -27,18 +226,120 @@ class PatientDatabase:
             Logger.log_error_message(e, "Error loading patients database")
             return []
     
+    def reload(self) -> Dict:
+        """Parse and index the file again and swap it in; lookups use the previous index until the swap,
+        and a file that fails to parse leaves it in place"""
+        with self._reload_lock:
+            started = time.perf_counter()
+            previous = self._index
+            try:
+                index = _PatientIndex(self._read_patients())
+            except Exception as e:
+                self.reload_failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                Logger.log_error_message(e, f"Patients reload failed, keeping version {previous.version}")
+                return {"reloaded": False, "version": previous.version, "error": self.last_error}
+            
+            index.load_seconds = round(time.perf_counter() - started, 4)
+            self.last_error = None
+            if index.version == previous.version:
+                return {"reloaded": False, "version": previous.version, "patients": len(previous.patients)}
+            
+            # a single reference assignment: lookups in flight finish on the index they started with
+            self._index = index
+            self.reloads += 1
+            self.last_reload = {
+                "reloaded": True,
+                "version": index.version,
+                "previous_version": previous.version,
+                "patients": len(index.patients),
+                "added": len(index.by_name.keys() - previous.by_name.keys()),
+                "removed": len(previous.by_name.keys() - index.by_name.keys()),
+                "load_seconds": index.load_seconds
+            }
+            Logger.log_info_message(
+                f"Patients reloaded: {len(previous.patients)} -> {len(index.patients)} records in {index.load_seconds}s"
+            )
+            return self.last_reload
+    
+    def start_watching(self):
+        """Reload on every change to patients.json from a background thread; call once from the app lifespan"""
+        if EnvironmentConstants.PATIENTS_WATCH_ENABLED.value.lower() != "true" or self._watcher is not None:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, name="patients-watcher", daemon=True)
+        self._watcher.start()
+    
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+    
+    def _watch(self):
+        # the folder is watched, not the file: writers usually replace it with a rename
+        name = self.patients_path.name
+        Logger.log_info_message(f"Watching {self.patients_path} for changes")
+        try:
+            for _ in watch(
+                self.patients_path.parent,
+                watch_filter=lambda change, path: Path(path).name == name,
+                debounce=int(EnvironmentConstants.PATIENTS_WATCH_DEBOUNCE_MS.value),
+                stop_event=self._stop_watching,
+                recursive=False
+            ):
+                self.reload()
+        except Exception as e:
+            Logger.log_error_message(e, "Patients file watcher stopped")
+    
+    def status(self) -> Dict:
+        index = self._index
+        return {
+            "path": str(self.patients_path),
+            "version": index.version,
+            "patients": len(index.patients),
+            "loaded_at": index.loaded_at,
+            "load_seconds": index.load_seconds,
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+            "last_reload": self.last_reload,
+            "last_error": self.last_error
+        }
+    
+    def get_patient(self, name: str) -> Optional[Dict]:
+        """Exact (case-insensitive) name lookup in the current index"""
+        return self._index.by_name.get(name.lower().strip())
+    
+    def list_patients(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+        diagnosis: Optional[str] = None,
+        discharged_from: Optional[str] = None,
+        discharged_to: Optional[str] = None
+    ) -> PatientPage:
+        """A lazy page of the current index in name order; dates are YYYY-MM-DD, inclusive.
+        Raises ValueError for a malformed cursor."""
+        after = decode_cursor(cursor) if cursor else None
+        index = self._index
+        ranks = index.matching_ranks(after, name_prefix, diagnosis, discharged_from, discharged_to)
+        return PatientPage(index, ranks, limit)
+    
     def find_patient_by_name(self, name: str) -> Optional[Dict]:
       
         name_lower = name.lower().strip()
+        index = self._index
         
         # Exact match first
-        for patient in self.patients:
-            if patient["patient_name"].lower() == name_lower:
-                Logger.log_info_message(f"Found patient (exact match): {patient['patient_name']}")
-                return patient
+        patient = index.by_name.get(name_lower)
+        if patient is not None:
+            Logger.log_info_message(f"Found patient (exact match): {patient['patient_name']}")
+            return patient
         
         # Partial match
-        for patient in self.patients:
+        for patient in index.patients:
             patient_name_lower = patient["patient_name"].lower()
             if name_lower in patient_name_lower or patient_name_lower in name_lower:
                 Logger.log_info_message(f"Found patient (partial match): {patient['patient_name']}")
@@ -1,98 +1,415 @@
 import os
+import json
+import time
 import chromadb
+import threading
+import contextvars
+import numpy as np
 from pathlib import Path
-from typing import List, Dict
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
+from opentelemetry import trace
 from chromadb.config import Settings
+from chromadb.errors import NotFoundError
 from src.utils.logger import Logger
+from src.utils.tracing import tracer, traced, mark_error
+from src.utils.http_cache import compute_version
+from src.utils.chunk_dedupe import dedupe_chunks, recurring_line_threshold, recurring_lines, strip_recurring_lines
+from src.utils.index_artifacts import IndexArtifactStore, IndexArtifactError
+from src.services.shard_router import ShardRouter
 from sentence_transformers import SentenceTransformer
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from src.constants.environment_constants import EnvironmentConstants
 
 # Docling for PDF processing with OCR
 from docling.document_converter import DocumentConverter
+from docling_core.types.doc.labels import DocItemLabel
+from docling_core.types.doc.document import ContentLayer
+
+# Section assigned to chunks that appear before the first heading
+FRONT_MATTER_SECTION = "Front matter"
+
+
+def load_shard_configs() -> List[Dict]:
+    """Knowledge-base shards from KNOWLEDGE_SHARDS_PATH; ``{SETTING}`` placeholders resolve to environment settings"""
+    path = Path(EnvironmentConstants.KNOWLEDGE_SHARDS_PATH.value)
+    if not path.exists():
+        # the single nephrology collection used before sharding
+        return [{
+            "name": "nephrology",
+            "collection": EnvironmentConstants.VECTOR_COLLECTION_NAME.value,
+            "sources": [{"name": "nephrology_book", "path": EnvironmentConstants.NEPHROLOGY_PDF_PATH.value}],
+            "default": True
+        }]
+    
+    settings = {name: member.value for name, member in EnvironmentConstants.__members__.items()}
+    with open(path, "r", encoding="utf-8") as f:
+        configs = json.load(f)
+    for config in configs:
+        config["collection"] = config.get("collection", f"{config['name']}_docs").format_map(settings)
+        for source in config.get("sources", []):
+            source["path"] = source["path"].format_map(settings)
+    return configs
+
+
+def chunking_settings(config: Optional[Dict] = None) -> Dict:
+    """A shard's chunking settings (``"chunking"`` in its config) over the environment defaults"""
+    return {
+        "chunker": "hybrid",
+        "max_tokens": EnvironmentConstants.CHUNK_MAX_TOKENS.value,
+        "chunk_size": EnvironmentConstants.CHUNK_SIZE.value,
+        "chunk_overlap": EnvironmentConstants.CHUNK_OVERLAP.value,
+        "dedupe": EnvironmentConstants.DEDUPE_ENABLED.value.lower() == "true",
+        "dedupe_threshold": EnvironmentConstants.DEDUPE_THRESHOLD.value,
+        **((config or {}).get("chunking") or {})
+    }
+
+
+def collection_metadata(config: Optional[Dict] = None) -> Dict:
+    """Chroma metadata for a shard's collection: cosine space plus its ``"hnsw"`` build and search parameters"""
+    hnsw = (config or {}).get("hnsw") or {}
+    return {"hnsw:space": "cosine", **{f"hnsw:{key}": value for key, value in hnsw.items()}}
+
+
+def _normalize_distance(space: str, distance: Optional[float]) -> Optional[float]:
+    """Map a Chroma distance onto 1 - cosine similarity so shards with different spaces can be merged"""
+    if distance is None:
+        return None
+    if space == "l2":
+        # squared L2 between unit vectors is 2 * (1 - cosine)
+        return distance / 2
+    # cosine is 1 - cosine already; ip is 1 - dot product, the same for unit vectors
+    return distance
+
+
+class _Shard:
+    """One collection of the knowledge base and the section index derived from it"""
+    
+    def __init__(self, name: str, collection):
+        self.name = name
+        self.collection = collection
+        self.space = (collection.metadata or {}).get("hnsw:space", "l2")
+        self.section_titles: List[str] = []
+        self.section_embeddings: Optional[np.ndarray] = None
+        self.diagnosis_sections: Dict[str, List[str]] = {}
+
+
+class _LoadedIndex:
+    """The opened shards and everything derived from them, swapped as one unit"""
+    
+    def __init__(self, client, shards: Dict[str, _Shard], version: Optional[str] = None, manifest: Optional[Dict] = None):
+        self.client = client
+        self.shards = shards
+        self.version = version
+        self.manifest = manifest
+        # searches running on this index; a retired index is closed once the last one finishes
+        self.searches = 0
+        self.retired = False
+
+
+# Chroma major versions whose private per-path system cache _close_client knows the layout of
+_CHROMA_SYSTEM_CACHE_VERSIONS = ("0.", "1.")
+
+
+def _close_client(client):
+    """Stop a Chroma client's system so its SQLite connections and loaded HNSW segments are released"""
+    # Chroma caches one system per path and has no public close (clear_system_cache() stops every client,
+    # the live index's too); drop the cache entry so reopening starts fresh
+    try:
+        if not chromadb.__version__.startswith(_CHROMA_SYSTEM_CACHE_VERSIONS):
+            raise ImportError(f"chromadb {chromadb.__version__}")
+        from chromadb.api.shared_system_client import SharedSystemClient
+        system = SharedSystemClient._identifier_to_system.pop(client._identifier, None)
+    except (ImportError, AttributeError) as e:
+        # left to garbage collection: the old index's files stay open until the client is collected
+        Logger.log_error_message(e, "Cannot close a retired Chroma client on this chromadb version")
+        return
+    if system is not None:
+        system.stop()
+
+
+class _ShardStats:
+    """Rolling per-shard search latency, result and hit counts; a hit is a result that survived the merge"""
+    
+    def __init__(self, window: int):
+        self._window = window
+        self._lock = threading.Lock()
+        self._shards: Dict[str, Dict] = {}
+    
+    def _entry(self, name: str) -> Dict:
+        if name not in self._shards:
+            self._shards[name] = {"searches": 0, "errors": 0, "results": 0, "hits": 0, "latencies_ms": deque(maxlen=self._window)}
+        return self._shards[name]
+    
+    def record_search(self, name: str, elapsed_ms: float, results: int, error: bool = False):
+        with self._lock:
+            entry = self._entry(name)
+            entry["searches"] += 1
+            entry["errors"] += int(error)
+            entry["results"] += results
+            entry["latencies_ms"].append(elapsed_ms)
+    
+    def record_hits(self, hits: Counter):
+        with self._lock:
+            for name, count in hits.items():
+                self._entry(name)["hits"] += count
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            entries = {name: dict(entry, latencies_ms=sorted(entry["latencies_ms"])) for name, entry in self._shards.items()}
+        
+        snapshot = {}
+        for name, entry in entries.items():
+            latencies = entry.pop("latencies_ms")
+            entry["latency_ms"] = {
+                "p50": round(latencies[min(int(0.50 * len(latencies)), len(latencies) - 1)], 2),
+                "p95": round(latencies[min(int(0.95 * len(latencies)), len(latencies) - 1)], 2),
+                "max": round(latencies[-1], 2)
+            } if latencies else None
+            snapshot[name] = entry
+        return snapshot
 
 
 class RAGTool:
-    def __init__(self):
-        self.vector_db_path = Path(EnvironmentConstants.VECTOR_DB_PATH.value)
-        self.pdf_path = Path(EnvironmentConstants.NEPHROLOGY_PDF_PATH.value)
-        self.collection_name = EnvironmentConstants.VECTOR_COLLECTION_NAME.value
+    def __init__(self, vector_db_path: Optional[Path] = None, use_artifacts: bool = True):
+        self.vector_db_path = Path(vector_db_path or EnvironmentConstants.VECTOR_DB_PATH.value)
+        self.shard_configs = load_shard_configs()
+        self.artifacts = IndexArtifactStore(
+            Path(EnvironmentConstants.INDEX_ARTIFACT_PATH.value),
+            Path(EnvironmentConstants.INDEX_INSTALL_PATH.value),
+            compression_level=EnvironmentConstants.INDEX_COMPRESSION_LEVEL.value
+        )
+        self._swap_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self.shard_stats = _ShardStats(EnvironmentConstants.SHARD_STATS_WINDOW.value)
+        # Chroma releases the GIL while it searches, so shards are queried in parallel
+        self._executor = ThreadPoolExecutor(
+            max_workers=EnvironmentConstants.SHARD_SEARCH_WORKERS.value,
+            thread_name_prefix="rag-shard"
+        )
         
         # Initialize embedding model (local, free)
         Logger.log_info_message("Loading embedding model...")
         self.embedding_model = SentenceTransformer(EnvironmentConstants.EMBEDDING_MODEL.value)
+        self.router = ShardRouter(self.embedding_model, self.shard_configs)
+        
+        version = (EnvironmentConstants.INDEX_VERSION.value or self.artifacts.latest_version()) if use_artifacts else None
+        if version:
+            # Released index built offline by scripts/build_index.py
+            self._index = self._open_artifact(version)
+        else:
+            # No released index: build (or reuse) one in-process
+            client = chromadb.PersistentClient(
+                path=str(self.vector_db_path),
+                settings=Settings(anonymized_telemetry=False)
+            )
+            shards = {}
+            for config in self.shard_configs:
+                collection = self._get_or_create_collection(client, config)
+                if collection is not None:
+                    shards[config["name"]] = self._open_shard(config["name"], collection)
+            self._index = _LoadedIndex(client, shards)
         
-        # Initialize ChromaDB
-        self.client = chromadb.PersistentClient(
-            path=str(self.vector_db_path),
-            settings=Settings(anonymized_telemetry=False)
+        Logger.log_info_message(
+            f"RAG Tool initialized. Shards: {self.chunk_counts() or 'none'}, index version: {self.index_version or 'local'}"
         )
+    
+    @property
+    def shards(self) -> Dict[str, _Shard]:
+        return self._index.shards
+    
+    def shard_status(self) -> Dict[str, Dict]:
+        """Per loaded shard: collection, chunks, searches, results, hits and recent latency"""
+        stats = self.shard_stats.snapshot()
+        return {
+            name: {"collection": shard.collection.name, "chunks": shard.collection.count(), **stats.get(name, {})}
+            for name, shard in self._index.shards.items()
+        }
+    
+    def chunk_counts(self) -> Dict[str, int]:
+        """Chunks per loaded shard"""
+        return {name: shard.collection.count() for name, shard in self._index.shards.items()}
+    
+    @property
+    def index_version(self) -> Optional[str]:
+        return self._index.version
+    
+    @property
+    def index_manifest(self) -> Optional[Dict]:
+        return self._index.manifest
+    
+    def knowledge_version(self) -> str:
+        """Fingerprint of the indexed knowledge; changes whenever the index or its sources do"""
+        index = self._index
+        if index.version:
+            return compute_version({"index_version": index.version})
+        
+        shards = {}
+        for config in self.shard_configs:
+            shard = index.shards.get(config["name"])
+            source_stats = [Path(source["path"]).stat() if Path(source["path"]).exists() else None for source in config.get("sources", [])]
+            shards[config["name"]] = {
+                "collection": config["collection"],
+                "count": shard.collection.count() if shard else None,
+                "sources": [[stat.st_size, stat.st_mtime_ns] if stat else None for stat in source_stats]
+            }
+        return compute_version({
+            "shards": shards,
+            "embedding_model": EnvironmentConstants.EMBEDDING_MODEL.value
+        })
+    
+    def _manifest_shards(self, manifest: Dict) -> Dict[str, Dict]:
+        """Shard name -> collection and chunk count; artifacts built before sharding hold one collection"""
+        if "shards" in manifest:
+            return manifest["shards"]
+        return {self.router.defaults[0]: {"collection_name": manifest["collection_name"], "chunk_count": manifest["chunk_count"]}}
+    
+    def _open_shard(self, name: str, collection) -> _Shard:
+        shard = _Shard(name, collection)
+        self._load_sections(shard)
+        return shard
+    
+    def _open_artifact(self, version: str) -> _LoadedIndex:
+        """Install a released index and open it in place"""
+        chroma_path, manifest = self.artifacts.install(version)
+        if manifest["embedding_model"] != EnvironmentConstants.EMBEDDING_MODEL.value:
+            raise IndexArtifactError(
+                f"Index {version} was embedded with {manifest['embedding_model']}, "
+                f"server uses {EnvironmentConstants.EMBEDDING_MODEL.value}"
+            )
         
-        # Initialize Docling converter
-        self.doc_converter = DocumentConverter()
+        client = chromadb.PersistentClient(
+            path=str(chroma_path),
+            settings=Settings(anonymized_telemetry=False, allow_reset=False)
+        )
+        shards = {}
+        try:
+            for name, entry in self._manifest_shards(manifest).items():
+                try:
+                    collection = client.get_collection(name=entry["collection_name"])
+                except NotFoundError as e:
+                    raise IndexArtifactError(
+                        f"Index {version} has no collection {entry['collection_name']} for shard {name}"
+                    ) from e
+                if collection.count() != entry["chunk_count"]:
+                    raise IndexArtifactError(
+                        f"Index {version} shard {name} holds {collection.count()} chunks, manifest says {entry['chunk_count']}"
+                    )
+                shards[name] = self._open_shard(name, collection)
+        except Exception:
+            current = getattr(self, "_index", None)
+            if current is None or current.client._identifier != client._identifier:
+                _close_client(client)
+            raise
         
-        # Get or create collection
-        self.collection = self._get_or_create_collection()
-        Logger.log_info_message(f"RAG Tool initialized. Collection size: {self.collection.count()}")
+        index = _LoadedIndex(client, shards, version=version, manifest=manifest)
+        Logger.log_info_message(f"Loaded index artifact {version} ({manifest['chunk_count']} chunks)")
+        return index
     
-    def _get_or_create_collection(self):
-        """Get existing collection or create new one"""
+    def activate_version(self, version: Optional[str] = None) -> Dict:
+        """Load another released index and swap it in without interrupting searches in flight"""
+        with self._swap_lock:
+            version = version or self.artifacts.latest_version()
+            if not version:
+                raise IndexArtifactError("No index artifacts available")
+            
+            previous = self._index.version
+            if version == previous:
+                return {"version": version, "previous_version": previous, "swapped": False}
+            
+            started = time.perf_counter()
+            index = self._open_artifact(version)
+            
+            # one probe query per shard so the first live request does not pay for loading the HNSW segments
+            probe = self.embedding_model.encode(["kidney"], normalize_embeddings=True)[0]
+            for shard in index.shards.values():
+                shard.collection.query(query_embeddings=[probe.tolist()], n_results=1)
+            
+            # a single reference assignment: searches already running finish on the index they started with
+            with self._index_lock:
+                retired = self._index
+                self._index = index
+            self._release_index(retired, retire=True)
+            load_seconds = round(time.perf_counter() - started, 3)
+            Logger.log_info_message(f"Index swapped from {previous or 'local'} to {version} in {load_seconds}s")
+            return {
+                "version": version,
+                "previous_version": previous,
+                "swapped": True,
+                "chunks": index.manifest["chunk_count"],
+                "load_seconds": load_seconds
+            }
+    
+    def _acquire_index(self) -> _LoadedIndex:
+        """The current index, held open until the matching _release_index"""
+        with self._index_lock:
+            index = self._index
+            index.searches += 1
+            return index
+    
+    def _release_index(self, index: _LoadedIndex, retire: bool = False):
+        """Drop one hold on an index (or retire it after a swap) and close it when it is retired and idle"""
+        with self._index_lock:
+            if retire:
+                index.retired = True
+            else:
+                index.searches -= 1
+            # reactivating a version reuses the Chroma system of the same path, which must stay open
+            idle = index.retired and index.searches == 0 and index.client._identifier != self._index.client._identifier
+        if idle:
+            try:
+                _close_client(index.client)
+                Logger.log_info_message(f"Closed retired index {index.version or 'local'}")
+            except Exception as e:
+                Logger.log_error_message(e, f"Error closing retired index {index.version or 'local'}")
+    
+    def _get_or_create_collection(self, client, config: Dict):
+        """Get a shard's existing collection or build it from its sources; None when it has no sources"""
+        collection_name = config["collection"]
         try:
-            collection = self.client.get_collection(name=self.collection_name)
-            Logger.log_info_message(f"Loaded existing collection: {self.collection_name}")
+            collection = client.get_collection(name=collection_name)
+            Logger.log_info_message(f"Loaded existing collection: {collection_name}")
             return collection
         except:
-            Logger.log_info_message(f"Creating new collection: {self.collection_name}")
-            collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
-            )
-            
-            # Process PDF if it exists
-            if self.pdf_path.exists():
-                self._process_pdf_with_docling(collection)
-            else:
+            sources = [source for source in config.get("sources", []) if Path(source["path"]).exists()]
+            if not sources:
                 Logger.log_error_message(
                     Exception("PDF not found"),
-                    f"Nephrology PDF not found at: {self.pdf_path}"
+                    f"Skipping shard {config['name']}: no source found at {[source['path'] for source in config.get('sources', [])]}"
                 )
+                return None
+            
+            Logger.log_info_message(f"Creating new collection: {collection_name}")
+            collection = client.create_collection(
+                name=collection_name,
+                metadata=collection_metadata(config)
+            )
+            
+            # chunk ids and indexes run on across the shard's sources
+            offset = 0
+            for source in sources:
+                offset += self._process_pdf_with_docling(collection, source, chunking_settings(config), offset)
             
             return collection
     
-    def _process_pdf_with_docling(self, collection):
-        """Process PDF using Docling (handles text + OCR automatically)"""
+    def _process_pdf_with_docling(self, collection, source: Dict, chunking: Dict, offset: int = 0) -> int:
+        """Process PDF using Docling (handles text + OCR automatically); returns the number of chunks added"""
+        pdf_path = Path(source["path"])
         try:
-            Logger.log_info_message(f"Processing PDF with Docling: {self.pdf_path}")
+            Logger.log_info_message(f"Processing PDF with Docling: {pdf_path}")
             Logger.log_info_message("Docling will automatically handle text extraction and OCR...")
             
-            # Convert PDF using Docling
-            result = self.doc_converter.convert(str(self.pdf_path))
+            # Convert PDF using Docling; only index builds pay for loading the converter
+            result = DocumentConverter().convert(str(pdf_path))
             
-            # Extract text from document
-            full_text = result.document.export_to_markdown()
-            
-            if not full_text or len(full_text.strip()) < 100:
+            chunks = self.chunk_document(result.document, source["name"], chunking)
+            if not chunks:
                 Logger.log_error_message(
                     Exception("No text extracted"),
                     "Docling failed to extract meaningful text from PDF"
                 )
-                return
-            
-            Logger.log_info_message(f"Successfully extracted {len(full_text)} characters from PDF")
-            
-            # Split into chunks
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=EnvironmentConstants.CHUNK_SIZE.value,
-                chunk_overlap=EnvironmentConstants.CHUNK_OVERLAP.value,
-                length_function=len,
-                separators=["\n\n", "\n", ". ", " ", ""]
-            )
-            
-            # Create document-like objects for splitting
-            chunks = text_splitter.create_documents(
-                texts=[full_text],
-                metadatas=[{"source": "nephrology_book", "extraction_method": "docling"}]
-            )
+                return 0
             
             Logger.log_info_message(f"Created {len(chunks)} chunks from PDF")
             
@@ -103,21 +420,17 @@ class RAGTool:
             for i in range(0, len(chunks), batch_size):
                 batch = chunks[i:i + batch_size]
                 
-                texts = [chunk.page_content for chunk in batch]
+                texts = [chunk["text"] for chunk in batch]
                 
                 # Generate embeddings
                 Logger.log_info_message(f"Generating embeddings for batch {i//batch_size + 1}/{(len(chunks)-1)//batch_size + 1}...")
                 embeddings = self.embedding_model.encode(texts, show_progress_bar=False).tolist()
                 
                 # Create IDs and metadata
-                ids = [f"doc_{i+j}" for j in range(len(batch))]
+                ids = [f"doc_{offset+i+j}" for j in range(len(batch))]
                 metadatas = [
-                    {
-                        "chunk_index": i+j,
-                        "source": "nephrology_book",
-                        "extraction_method": "docling"
-                    }
-                    for j in range(len(batch))
+                    {"chunk_index": offset+i+j, **chunk["metadata"]}
+                    for j, chunk in enumerate(batch)
                 ]
                 
                 # Add to collection
@@ -135,39 +448,386 @@ class RAGTool:
                     Logger.log_info_message(f"Processed {total_processed}/{len(chunks)} chunks...")
             
             Logger.log_info_message(f"✅ Successfully processed {len(chunks)} chunks into vector database")
+            return total_processed
             
         except Exception as e:
             Logger.log_error_message(e, "Error processing PDF with Docling")
+            return 0
+    
+    @staticmethod
+    def chunk_document(document, source_name: str, chunking: Dict) -> List[Dict]:
+        """Chunk a converted document along its hierarchy (chunker "hybrid"), falling back to flat text splitting.
+
+        With ``"dedupe"`` on, near-duplicate chunks are merged, and flat text
+        first loses body copies of running headers/footers that Docling left
+        out of its furniture layer on some pages. The hybrid chunker works from
+        the body items, which already leave the furniture out.
+        """
+        dedupe = chunking.get("dedupe", False)
+        stripped_lines = 0
+        chunks = []
+        if chunking["chunker"] == "hybrid":
+            chunks = RAGTool._structured_chunks(document, source_name, chunking["max_tokens"])
+        if not chunks:
+            full_text = document.export_to_markdown()
+            if dedupe:
+                full_text, stripped_lines = RAGTool._strip_page_furniture(document, full_text)
+            chunks = RAGTool._flat_chunks(full_text, source_name, chunking["chunk_size"], chunking["chunk_overlap"])
+        
+        if chunks and dedupe:
+            chunks, report = dedupe_chunks(chunks, chunking["dedupe_threshold"])
+            removed = report["chunks_in"] - report["chunks_out"]
+            Logger.log_info_message(
+                f"Dedupe for {source_name}: {stripped_lines} recurring header/footer lines stripped, "
+                f"{report['chunks_in']} -> {report['chunks_out']} chunks "
+                f"({report['exact_duplicates']} exact, {report['near_duplicates']} near duplicates; "
+                f"index {100 * removed / report['chunks_in']:.1f}% smaller)"
+            )
+        return chunks
+    
+    @staticmethod
+    def _strip_page_furniture(document, full_text: str) -> Tuple[str, int]:
+        """Drop from the body markdown the lines Docling found as running headers/footers on enough pages.
+
+        Only furniture text is counted, so a short body line a leaflet repeats
+        on every page ("Key points", a dosage line) is never taken for one.
+        Returns the text and the number of recurring lines stripped.
+        """
+        recurring = recurring_lines(RAGTool._page_texts(document), recurring_line_threshold(document.num_pages()))
+        return strip_recurring_lines(full_text, recurring), len(recurring)
+    
+    @staticmethod
+    def _page_texts(document) -> List[str]:
+        """Furniture text of each page (page headers, footers, page numbers), by item provenance"""
+        pages: Dict[int, List[str]] = {}
+        for item, _ in document.iterate_items(included_content_layers={ContentLayer.FURNITURE}):
+            text = getattr(item, "text", None)
+            if text:
+                for page_no in {prov.page_no for prov in item.prov}:
+                    pages.setdefault(page_no, []).append(text)
+        return ["\n".join(lines) for lines in pages.values()]
+    
+    @staticmethod
+    def _structured_chunks(document, source_name: str, max_tokens: int) -> List[Dict]:
+        """Chunk by chapters, headings and tables, keeping section path and page range as metadata"""
+        try:
+            # needs the docling-core "chunking" extra; imported here so a missing extra only disables this path
+            from docling_core.transforms.chunker.hybrid_chunker import HybridChunker
+            from docling_core.transforms.chunker.tokenizer.huggingface import HuggingFaceTokenizer
+            
+            chunker = HybridChunker(
+                tokenizer=HuggingFaceTokenizer.from_pretrained(
+                    model_name=EnvironmentConstants.EMBEDDING_MODEL.value,
+                    max_tokens=max_tokens
+                ),
+                merge_peers=True
+            )
+            
+            chunks = []
+            for chunk in chunker.chunk(dl_doc=document):
+                headings = chunk.meta.headings or []
+                pages = sorted({prov.page_no for item in chunk.meta.doc_items for prov in item.prov})
+                is_table = any(item.label == DocItemLabel.TABLE for item in chunk.meta.doc_items)
+                
+                metadata = {
+                    "source": source_name,
+                    "extraction_method": "docling_hybrid",
+                    "section": headings[0] if headings else FRONT_MATTER_SECTION,
+                    "section_path": " > ".join(headings) if headings else FRONT_MATTER_SECTION,
+                    "content_type": "table" if is_table else "text"
+                }
+                if pages:
+                    metadata["page_start"] = pages[0]
+                    metadata["page_end"] = pages[-1]
+                
+                # headings are prepended to the text so the embedding carries the section context
+                chunks.append({"text": chunker.contextualize(chunk=chunk), "metadata": metadata})
+            
+            Logger.log_info_message(f"Structure-aware chunking produced {len(chunks)} chunks")
+            return chunks
+        
+        except Exception as e:
+            Logger.log_error_message(e, "Structure-aware chunking failed, falling back to flat text splitting")
+            return []
+    
+    @staticmethod
+    def _flat_chunks(full_text: str, source_name: str, chunk_size: int, chunk_overlap: int) -> List[Dict]:
+        """Split flattened markdown into fixed-size character chunks"""
+        if not full_text or len(full_text.strip()) < 100:
+            return []
+        
+        Logger.log_info_message(f"Successfully extracted {len(full_text)} characters from PDF")
+        
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
+        
+        return [
+            {"text": text, "metadata": {"source": source_name, "extraction_method": "docling"}}
+            for text in text_splitter.split_text(full_text)
+        ]
+    
+    def _load_sections(self, shard: _Shard):
+        """Index the distinct top-level sections in a shard for diagnosis-based filtering"""
+        try:
+            metadatas = shard.collection.get(include=["metadatas"])["metadatas"] or []
+            titles = sorted({m["section"] for m in metadatas if m.get("section") and m["section"] != FRONT_MATTER_SECTION})
+        except Exception as e:
+            Logger.log_error_message(e, f"Error loading section index for shard {shard.name}")
+            titles = []
+        
+        if not titles:
+            return
+        
+        embeddings = self.embedding_model.encode(titles, normalize_embeddings=True, show_progress_bar=False)
+        shard.section_titles = titles
+        shard.section_embeddings = np.asarray(embeddings, dtype=np.float32)
+        Logger.log_info_message(f"Section index for shard {shard.name} loaded with {len(titles)} sections")
+    
+    @staticmethod
+    def _closest_sections(shard: _Shard, embedding: np.ndarray, limit: int) -> List[str]:
+        scores = shard.section_embeddings @ embedding
+        best = np.argsort(-scores)[:limit]
+        return [
+            shard.section_titles[i] for i in best
+            if scores[i] >= EnvironmentConstants.SECTION_FILTER_MIN_SIMILARITY.value
+        ]
     
-    def search(self, query: str, top_k: int = None) -> List[Dict]:
-        """Search for relevant documents"""
+    def sections_for_diagnosis(self, shard: _Shard, diagnosis: str) -> List[str]:
+        """Sections of a shard whose titles are closest to a diagnosis (cached per diagnosis)"""
+        if not shard.section_titles:
+            return []
+        if diagnosis not in shard.diagnosis_sections:
+            embedding = self.embedding_model.encode([diagnosis], normalize_embeddings=True, show_progress_bar=False)[0]
+            shard.diagnosis_sections[diagnosis] = self._closest_sections(
+                shard,
+                np.asarray(embedding, dtype=np.float32),
+                EnvironmentConstants.SECTION_FILTER_TOP_N.value
+            )
+        return shard.diagnosis_sections[diagnosis]
+    
+    def _section_filter(
+        self,
+        shard: _Shard,
+        diagnosis: Optional[str],
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Optional[Dict]:
+        """Chroma where-clause restricting a shard search to diagnosis- and query-relevant sections"""
+        if not diagnosis or not shard.section_titles:
+            return None
+        
+        sections = list(self.sections_for_diagnosis(shard, diagnosis))
+        if query_embedding is not None:
+            # questions often land outside the diagnosis chapter (e.g. drug interactions)
+            for section in self._closest_sections(shard, query_embedding, EnvironmentConstants.SECTION_FILTER_TOP_N.value):
+                if section not in sections:
+                    sections.append(section)
+        
+        if not sections:
+            return None
+        return {"section": {"$in": sections}}
+    
+    def _route(self, index: _LoadedIndex, diagnosis: Optional[str], query_embedding: Optional[np.ndarray] = None) -> List[_Shard]:
+        """Shards picked by the router among those loaded; all of them if none of the picks is"""
+        names = [name for name in self.router.route(diagnosis, query_embedding) if name in index.shards]
+        return [index.shards[name] for name in names] or list(index.shards.values())
+    
+    def _fan_out(self, shards: List[_Shard], search_shard: Callable[[_Shard], List[List[Dict]]], rows: int) -> List[List[List[Dict]]]:
+        """Run search_shard on every shard concurrently; results per shard, then per query"""
+        if len(shards) == 1:
+            return [self._timed_search(shards[0], search_shard, rows)]
+        # each task gets its own copy of the context so its spans nest under the caller's
+        futures = [
+            self._executor.submit(contextvars.copy_context().run, self._timed_search, shard, search_shard, rows)
+            for shard in shards
+        ]
+        return [future.result() for future in futures]
+    
+    def _timed_search(self, shard: _Shard, search_shard: Callable[[_Shard], List[List[Dict]]], rows: int) -> List[List[Dict]]:
+        with tracer.start_as_current_span("rag.shard") as span:
+            span.set_attribute("rag.shard", shard.name)
+            started = time.perf_counter()
+            try:
+                results = search_shard(shard)
+            except Exception as e:
+                # one failing shard must not take the others' results down with it
+                mark_error(e)
+                Logger.log_error_message(e, f"Error searching shard {shard.name}")
+                results = None
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            
+            count = sum(len(row) for row in results) if results else 0
+            span.set_attribute("rag.shard_ms", round(elapsed_ms, 3))
+            span.set_attribute("rag.results", count)
+            self.shard_stats.record_search(shard.name, elapsed_ms, count, error=results is None)
+            return results if results is not None else [[] for _ in range(rows)]
+    
+    def _search_shard(
+        self,
+        shard: _Shard,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        diagnosis: Optional[str],
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[List[Dict]]:
+        """Filtered search of one shard, redoing unfiltered the queries whose sections were too thin"""
+        span = trace.get_current_span()
+        where = self._section_filter(shard, diagnosis, query_embedding)
+        span.set_attribute("rag.sections", len(where["section"]["$in"]) if where else 0)
+        results = self._query(shard, query_embeddings.tolist(), top_k, where)
+        formatted_results = [self._format_results(shard, results, row) for row in range(len(query_embeddings))]
+        
+        short = [row for row, rows in enumerate(formatted_results) if len(rows) < top_k]
+        if where is not None and short:
+            span.set_attribute("rag.unfiltered_fallback", len(short))
+            fallback = self._query(shard, query_embeddings[short].tolist(), top_k, None)
+            for position, row in enumerate(short):
+                formatted_results[row] = self._format_results(shard, fallback, position)
+        return formatted_results
+    
+    def _merge(self, shard_results: List[List[Dict]], top_k: int) -> List[Dict]:
+        """Closest top_k across shards by normalized distance"""
+        merged = sorted(
+            (result for results in shard_results for result in results),
+            key=lambda r: r["normalized_distance"] if r["normalized_distance"] is not None else float("inf")
+        )[:top_k]
+        self.shard_stats.record_hits(Counter(result["shard"] for result in merged))
+        return merged
+    
+    @traced("rag.search")
+    def search(
+        self,
+        query: str,
+        top_k: int = None,
+        query_embedding: Optional[np.ndarray] = None,
+        diagnosis: Optional[str] = None
+    ) -> List[Dict]:
+        """Search the shards routed from the diagnosis and the query, restricted to the sections relevant to the diagnosis when given"""
         if top_k is None:
             top_k = EnvironmentConstants.RAG_TOP_K.value
         
+        span = trace.get_current_span()
+        span.set_attribute("rag.top_k", top_k)
+        span.set_attribute("rag.embedding_reused", query_embedding is not None)
         try:
             # Generate query embedding
-            query_embedding = self.embedding_model.encode([query])[0].tolist()
+            if query_embedding is None:
+                with tracer.start_as_current_span("rag.encode"):
+                    query_embedding = np.asarray(
+                        self.embedding_model.encode([query], normalize_embeddings=True)[0], dtype=np.float32
+                    )
             
-            # Search
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k
-            )
+            # searches run against one index even if a swap lands midway
+            index = self._acquire_index()
+            try:
+                span.set_attribute("rag.index_version", index.version or "local")
+                shards = self._route(index, diagnosis, query_embedding)
+                span.set_attribute("rag.shards", [shard.name for shard in shards])
+                shard_results = self._fan_out(
+                    shards,
+                    lambda shard: self._search_shard(shard, query_embedding[None, :], top_k, diagnosis, query_embedding),
+                    1
+                )
+            finally:
+                self._release_index(index)
+            formatted_results = self._merge([results[0] for results in shard_results], top_k)
             
-            # Format results
-            formatted_results = []
-            if results and results['documents']:
-                for i, doc in enumerate(results['documents'][0]):
-                    formatted_results.append({
-                        "content": doc,
-                        "chunk_index": results['metadatas'][0][i].get('chunk_index', 'Unknown'),
-                        "source": results['metadatas'][0][i].get('source', 'Unknown'),
-                        "distance": results['distances'][0][i] if 'distances' in results else None
-                    })
-            
-            Logger.log_info_message(f"RAG search returned {len(formatted_results)} results")
+            span.set_attribute("rag.results", len(formatted_results))
+            span.set_attribute("rag.distances", [r["distance"] for r in formatted_results if r["distance"] is not None])
+            Logger.log_info_message(
+                f"RAG search returned {len(formatted_results)} results from shards {[shard.name for shard in shards]}"
+            )
             return formatted_results
             
         except Exception as e:
+            mark_error(e)
             Logger.log_error_message(e, "Error in RAG search")
-            return []
\ No newline at end of file
+            return []
+    
+    @traced("rag.search_batch")
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = None,
+        diagnosis: Optional[str] = None
+    ) -> List[List[Dict]]:
+        """Run many queries in a single call per shard, routed and filtered by a shared diagnosis when given"""
+        if top_k is None:
+            top_k = EnvironmentConstants.RAG_TOP_K.value
+        
+        if len(query_embeddings) == 0:
+            return []
+        
+        span = trace.get_current_span()
+        span.set_attribute("rag.top_k", top_k)
+        span.set_attribute("rag.queries", len(query_embeddings))
+        try:
+            index = self._acquire_index()
+            try:
+                shards = self._route(index, diagnosis)
+                span.set_attribute("rag.shards", [shard.name for shard in shards])
+                shard_results = self._fan_out(
+                    shards,
+                    lambda shard: self._search_shard(shard, query_embeddings, top_k, diagnosis),
+                    len(query_embeddings)
+                )
+            finally:
+                self._release_index(index)
+            formatted_results = [
+                self._merge([results[row] for results in shard_results], top_k)
+                for row in range(len(query_embeddings))
+            ]
+            
+            Logger.log_info_message(f"RAG batch search ran {len(query_embeddings)} queries on {len(shards)} shards")
+            return formatted_results
+            
+        except Exception as e:
+            mark_error(e)
+            Logger.log_error_message(e, "Error in RAG batch search")
+            return [[] for _ in range(len(query_embeddings))]
+    
+    @staticmethod
+    @traced("rag.query")
+    def _query(shard: _Shard, query_embeddings: List[List[float]], top_k: int, where: Optional[Dict]) -> Dict:
+        trace.get_current_span().set_attribute("rag.filtered", where is not None)
+        if where is None:
+            return shard.collection.query(query_embeddings=query_embeddings, n_results=top_k)
+        return shard.collection.query(query_embeddings=query_embeddings, n_results=top_k, where=where)
+    
+    @staticmethod
+    def _format_results(shard: _Shard, results: Dict, row: int) -> List[Dict]:
+        """Format one query's results from a Chroma query response"""
+        formatted_results = []
+        if results and results['documents']:
+            for i, doc in enumerate(results['documents'][row]):
+                metadata = results['metadatas'][row][i]
+                distance = results['distances'][row][i] if results.get('distances') else None
+                formatted_results.append({
+                    # chunk ids restart in every shard's collection
+                    "id": f"{shard.name}/{results['ids'][row][i]}",
+                    "content": doc,
+                    "shard": shard.name,
+                    "chunk_index": metadata.get('chunk_index', 'Unknown'),
+                    "source": metadata.get('source', 'Unknown'),
+                    "section_path": metadata.get('section_path'),
+                    "page_start": metadata.get('page_start'),
+                    "page_end": metadata.get('page_end'),
+                    "distance": distance,
+                    "normalized_distance": _normalize_distance(shard.space, distance)
+                })
+        return formatted_results
+    
+    @staticmethod
+    def format_citation(result: Dict) -> str:
+        """Human-readable citation: section path and page range, or the chunk number for older indexes"""
+        if not result.get("section_path"):
+            return f"Chunk {result['chunk_index']}"
+        
+        citation = result["section_path"]
+        if result.get("page_start"):
+            pages = result["page_start"] if result["page_start"] == result["page_end"] else f"{result['page_start']}-{result['page_end']}"
+            citation += f", p. {pages}"
+        return citation
@@ -1,22 +1,55 @@
-from typing import List, Dict
+import httpx
+from typing import List, Dict, Optional
 from duckduckgo_search import DDGS
+from opentelemetry import trace
 from src.utils.logger import Logger
+from src.utils.tracing import traced, mark_error
+from src.utils.deadline import Deadline
+from src.constants.degraded_stage_constants import DegradedStageConstant
 from src.constants.environment_constants import EnvironmentConstants
 
 
 class WebSearchTool:
     def __init__(self):
         self.max_results = EnvironmentConstants.WEB_SEARCH_RESULTS.value
-        Logger.log_info_message("Web Search Tool initialized (DuckDuckGo)")
+        self.search_url = EnvironmentConstants.WEB_SEARCH_URL.value
+        Logger.log_info_message(f"Web Search Tool initialized ({self.search_url or 'DuckDuckGo'})")
     
-    def search(self, query: str) -> List[Dict]:
+    @traced("web.search")
+    def search(self, query: str, deadline: Optional[Deadline] = None) -> List[Dict]:
+        """Search the web; with a deadline the request may only use part of the remaining budget"""
+        
+        span = trace.get_current_span()
+        span.set_attribute("web.max_results", self.max_results)
+        
+        timeout = None
+        if deadline is not None:
+            # leave enough time for the answer to be generated afterwards
+            timeout = deadline.budget(
+                cap=EnvironmentConstants.WEB_SEARCH_TIMEOUT_SECONDS.value,
+                reserve=EnvironmentConstants.LLM_MIN_BUDGET_SECONDS.value
+            )
+            span.set_attribute("web.timeout_s", timeout)
+            if timeout <= 0:
+                deadline.degrade(DegradedStageConstant.WEB_SEARCH_SKIPPED.value)
+                return []
         
         try:
-            with DDGS() as ddgs:
-                results = list(ddgs.text(
-                    query,
-                    max_results=self.max_results
-                ))
+            if self.search_url:
+                # an endpoint answering with DuckDuckGo-shaped results, such as the load harness's stub
+                response = httpx.get(
+                    self.search_url,
+                    params={"q": query, "max_results": self.max_results},
+                    timeout=timeout or EnvironmentConstants.WEB_SEARCH_TIMEOUT_SECONDS.value
+                )
+                response.raise_for_status()
+                results = response.json()[:self.max_results]
+            else:
+                with (DDGS(timeout=timeout) if timeout else DDGS()) as ddgs:
+                    results = list(ddgs.text(
+                        query,
+                        max_results=self.max_results
+                    ))
             
             formatted_results = [
                 {
@@ -28,9 +61,13 @@ class WebSearchTool:
                 for result in results
             ]
             
+            span.set_attribute("web.results", len(formatted_results))
             Logger.log_info_message(f"Web search returned {len(formatted_results)} results")
             return formatted_results
             
         except Exception as e:
+            mark_error(e)
+            if deadline is not None:
+                deadline.degrade(DegradedStageConstant.WEB_SEARCH_FAILED.value)
             Logger.log_error_message(e, "Error in web search")
             return []
\ No newline at end of file
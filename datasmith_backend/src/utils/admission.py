@@ -0,0 +1,191 @@
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+from fastapi.responses import ORJSONResponse
+from src.utils.logger import Logger
+from src.constants.http_constants import HttpConstant
+from src.constants.environment_constants import EnvironmentConstants
+
+
+class AdmissionController:
+    """Per-worker cap on in-flight expensive requests, with a short bounded wait queue.
+
+    The cap adapts AIMD-style: after every ``adjust_every`` completions it drops
+    by a quarter if the window's p90 latency is above the target, and grows by
+    one if requests had to wait while latency stayed on target. Everything here
+    runs on the event loop, so plain counters are enough.
+    """
+
+    def __init__(self):
+        self.paths = {path.strip() for path in EnvironmentConstants.ADMISSION_PATHS.value.split(",") if path.strip()}
+        self.min_limit = int(EnvironmentConstants.ADMISSION_MIN_CONCURRENCY.value)
+        self.max_limit = int(EnvironmentConstants.ADMISSION_MAX_CONCURRENCY.value)
+        self.limit = min(max(int(EnvironmentConstants.ADMISSION_INITIAL_CONCURRENCY.value), self.min_limit), self.max_limit)
+        self.queue_size = int(EnvironmentConstants.ADMISSION_QUEUE_SIZE.value)
+        self.queue_timeout = EnvironmentConstants.ADMISSION_QUEUE_TIMEOUT_SECONDS.value
+        self.latency_target = EnvironmentConstants.ADMISSION_LATENCY_TARGET_SECONDS.value
+        self.adjust_every = int(EnvironmentConstants.ADMISSION_ADJUST_EVERY.value)
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._window: list = []
+        self._saturated = False
+        self._recent: Deque[float] = deque(maxlen=256)
+        self.admitted = 0
+        self.queued = 0
+        self.shed = {"queue_full": 0, "queue_timeout": 0}
+        Logger.log_info_message(f"Admission control initialized (limit={self.limit}, queue={self.queue_size})")
+
+    def guards(self, path: str) -> bool:
+        return path in self.paths
+
+    async def acquire(self) -> Optional[str]:
+        """Wait for a slot; returns None once admitted, or the reason the request was shed"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+
+        self._saturated = True
+        if len(self._waiters) >= self.queue_size:
+            self.shed["queue_full"] += 1
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # the client went away while waiting; give back a slot handed over in the meantime
+            if waiter.done():
+                self.release(None)
+            else:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            raise
+
+        if not waiter.done():
+            self._waiters.remove(waiter)
+            waiter.cancel()
+            self.shed["queue_timeout"] += 1
+            return "queue_timeout"
+        self.admitted += 1
+        return None
+
+    def release(self, latency: Optional[float]):
+        """Free a slot, recording the request latency (None keeps it out of the adaptive window)"""
+        self.in_flight -= 1
+        if latency is not None:
+            self._recent.append(latency)
+            self._window.append(latency)
+            if len(self._window) >= self.adjust_every:
+                self._adjust()
+        self._wake()
+
+    async def run_in_thread(self, fn: Callable, *args, record_latency: bool = True, **kwargs):
+        """Run fn on a worker thread in an already acquired slot, released when the thread finishes.
+
+        Cancelling the caller does not stop the thread, so the slot stays
+        taken until the work it stands for is really done.
+        """
+        started = time.perf_counter()
+        work = asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+
+        def finished(task: asyncio.Future):
+            if not task.cancelled():
+                # retrieved here so an abandoned failure is not reported as never retrieved
+                task.exception()
+            self.release(time.perf_counter() - started if record_latency else None)
+
+        work.add_done_callback(finished)
+        return await asyncio.shield(work)
+
+    def _wake(self):
+        # a slot is handed straight to the oldest waiter so newcomers cannot overtake the queue
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _adjust(self):
+        window = sorted(self._window)
+        p90 = window[min(int(0.9 * len(window)), len(window) - 1)]
+        limit = self.limit
+        if p90 > self.latency_target:
+            limit = max(self.min_limit, math.floor(self.limit * 0.75))
+        elif self._saturated:
+            limit = min(self.max_limit, self.limit + 1)
+
+        if limit != self.limit:
+            Logger.log_info_message(f"Admission limit {self.limit} -> {limit} (p90 {p90:.2f}s, target {self.latency_target}s)")
+            self.limit = limit
+        self._window = []
+        self._saturated = False
+
+    def _latency_percentile(self, q: float) -> Optional[float]:
+        if not self._recent:
+            return None
+        recent = sorted(self._recent)
+        return recent[min(int(q * len(recent)), len(recent) - 1)]
+
+    def retry_after(self) -> int:
+        """Seconds until a retry is likely to get in: one typical request, within bounds"""
+        p50 = self._latency_percentile(0.5) or 1.0
+        return min(max(math.ceil(p50), 1), int(EnvironmentConstants.ADMISSION_RETRY_AFTER_MAX_SECONDS.value))
+
+    def status(self) -> Dict:
+        p50, p90 = self._latency_percentile(0.5), self._latency_percentile(0.9)
+        return {
+            "pid": os.getpid(),
+            "paths": sorted(self.paths),
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+            "latency_seconds": {
+                "p50": round(p50, 3) if p50 is not None else None,
+                "p90": round(p90, 3) if p90 is not None else None,
+                "target": self.latency_target
+            }
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that admits guarded requests through an AdmissionController and sheds the rest with 503"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.controller.guards(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        # the request's deadline counts from here, so time spent queued comes out of the client's budget
+        scope.setdefault("state", {})["arrived_at"] = time.monotonic()
+        reason = await self.controller.acquire()
+        if reason is not None:
+            response = ORJSONResponse(
+                status_code=HttpConstant.SERVICE_UNAVAILABLE.value,
+                content={"message": "The assistant is busy. Please try again shortly.", "reason": reason},
+                headers={"Retry-After": str(self.controller.retry_after())}
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(time.perf_counter() - started)
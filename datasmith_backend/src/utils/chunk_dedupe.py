@@ -0,0 +1,150 @@
+import re
+import mmh3
+import xxhash
+import numpy as np
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+from src.constants.environment_constants import EnvironmentConstants
+
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_DIGITS = re.compile(r"\d+")
+
+
+def _line_key(line: str) -> str:
+    # page and chapter numbers differ between otherwise identical running headers
+    return _DIGITS.sub("#", " ".join(line.lower().split()))
+
+
+def _strippable(line: str) -> bool:
+    """Short plain lines only: markdown headings and table rows are never treated as boilerplate"""
+    stripped = line.strip()
+    return (
+        bool(stripped)
+        and len(stripped) <= int(EnvironmentConstants.RECURRING_LINE_MAX_CHARS.value)
+        and not stripped.startswith(("#", "|"))
+    )
+
+
+def recurring_line_threshold(pages: int) -> int:
+    """Pages a line must appear on to be boilerplate: a share of the pages, never fewer than RECURRING_LINE_MIN_COUNT"""
+    return max(
+        int(EnvironmentConstants.RECURRING_LINE_MIN_COUNT.value),
+        int(EnvironmentConstants.RECURRING_LINE_PAGE_RATIO.value * pages)
+    )
+
+
+def recurring_lines(pages: List[str], min_pages: int) -> Set[str]:
+    """Keys of short lines found on at least min_pages distinct pages (running headers, footers, page numbers).
+
+    A line repeated within one page counts once, so a term a chapter keeps
+    using is not mistaken for a header.
+    """
+    counts = Counter(key for page in pages for key in {_line_key(line) for line in page.splitlines() if _strippable(line)})
+    return {key for key, count in counts.items() if count >= min_pages}
+
+
+def strip_recurring_lines(text: str, recurring: Set[str]) -> str:
+    """Drop the lines of text whose key is in recurring"""
+    if not recurring:
+        return text
+    return "\n".join(line for line in text.splitlines() if not _strippable(line) or _line_key(line) not in recurring)
+
+
+class MinHasher:
+    """MinHash signatures over word shingles; shingles hashed with MurmurHash3, permuted by universal hashing"""
+
+    def __init__(self, num_perm: int, shingle_size: int, seed: int = 1):
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        words = text.lower().split()
+        size = self.shingle_size
+        shingles = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        hashes = np.fromiter((mmh3.hash(shingle, signed=False) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+        # uint64 arithmetic wraps; that is fine for hashing
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+def _lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Band/row split whose S-curve knee sits a little below the threshold, so true matches are rarely missed"""
+    target = threshold * 0.9
+    splits = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(splits, key=lambda split: abs((1 / split[0]) ** (1 / split[1]) - target))
+
+
+def dedupe_chunks(chunks: List[Dict], threshold: float) -> Tuple[List[Dict], Dict]:
+    """Merge exact (xxhash) and near (MinHash/LSH, estimated Jaccard >= threshold) duplicate chunks.
+
+    Each group of duplicates keeps its longest chunk, in document order, with
+    ``duplicates_merged`` in its metadata. Returns the chunks and a report.
+    """
+    parent = list(range(len(chunks)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    # exact duplicates first: cheap, and keeps identical boilerplate out of the LSH buckets
+    first_seen: Dict[int, int] = {}
+    exact = 0
+    for position, chunk in enumerate(chunks):
+        key = xxhash.xxh3_64_intdigest(" ".join(chunk["text"].lower().split()))
+        if key in first_seen:
+            union(first_seen[key], position)
+            exact += 1
+        else:
+            first_seen[key] = position
+
+    num_perm = int(EnvironmentConstants.DEDUPE_NUM_PERM.value)
+    hasher = MinHasher(num_perm, int(EnvironmentConstants.DEDUPE_SHINGLE_SIZE.value))
+    bands, rows = _lsh_bands(num_perm, threshold)
+    signatures: Dict[int, np.ndarray] = {}
+    buckets: Dict[bytes, List[int]] = {}
+    near = 0
+    for position in first_seen.values():
+        signature = signatures[position] = hasher.signature(chunks[position]["text"])
+        for band in range(bands):
+            key = band.to_bytes(2, "little") + signature[band * rows:(band + 1) * rows].tobytes()
+            bucket = buckets.setdefault(key, [])
+            for other in bucket:
+                if find(position) != find(other) and np.mean(signature == signatures[other]) >= threshold:
+                    union(position, other)
+                    near += 1
+            bucket.append(position)
+
+    groups: Dict[int, List[int]] = {}
+    for position in range(len(chunks)):
+        groups.setdefault(find(position), []).append(position)
+
+    kept = []
+    for members in groups.values():
+        # the longest copy usually carries the overlap both neighbours were cut from
+        keeper = max(members, key=lambda position: (len(chunks[position]["text"]), -position))
+        chunk = chunks[keeper]
+        if len(members) > 1:
+            chunk = {**chunk, "metadata": {**chunk["metadata"], "duplicates_merged": len(members) - 1}}
+        kept.append((keeper, chunk))
+    kept.sort(key=lambda item: item[0])
+
+    report = {
+        "chunks_in": len(chunks),
+        "chunks_out": len(kept),
+        "exact_duplicates": exact,
+        "near_duplicates": near,
+        "lsh_bands": bands,
+        "lsh_rows": rows
+    }
+    return [chunk for _, chunk in kept], report
@@ -0,0 +1,37 @@
+import time
+from typing import List, Optional
+from src.constants.environment_constants import EnvironmentConstants
+
+
+class Deadline:
+    """Time budget for one request, handed to every stage that works on it.
+
+    Stages ask for what is left, shrink or skip optional work when it runs
+    low, and record what they gave up in ``degraded`` for the response.
+    """
+
+    def __init__(self, seconds: float, started_at: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = (started_at if started_at is not None else time.monotonic()) + seconds
+        self.degraded: List[str] = []
+
+    @classmethod
+    def for_request(cls, deadline_ms: Optional[int] = None, started_at: Optional[float] = None) -> "Deadline":
+        """Client-requested budget, capped by the server maximum, counted from ``started_at`` (time.monotonic()) when given"""
+        seconds = deadline_ms / 1000 if deadline_ms else EnvironmentConstants.REQUEST_DEADLINE_SECONDS.value
+        return cls(min(seconds, EnvironmentConstants.REQUEST_DEADLINE_MAX_SECONDS.value), started_at)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def budget(self, cap: Optional[float] = None, reserve: float = 0.0) -> float:
+        """Seconds a stage may spend, leaving `reserve` for the stages after it"""
+        available = max(self.remaining() - reserve, 0.0)
+        return min(available, cap) if cap is not None else available
+
+    def degrade(self, stage: str):
+        if stage not in self.degraded:
+            self.degraded.append(stage)
@@ -0,0 +1,28 @@
+import orjson
+import hashlib
+from typing import Any, Optional
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from src.constants.http_constants import HttpConstant
+
+
+def compute_version(payload: Any) -> str:
+    """Stable short content hash used for patient versions and ETags"""
+    serialized = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.blake2b(serialized, digest_size=8).hexdigest()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def conditional_response(request: Request, payload: Any, version: Optional[str] = None) -> Response:
+    """Return 304 when the client already holds this version, else the payload with its ETag"""
+    etag = f'"{version or compute_version(payload)}"'
+    if etag_matches(request, etag):
+        return Response(status_code=HttpConstant.NOT_MODIFIED.value, headers={"ETag": etag})
+    return ORJSONResponse(payload, headers={"ETag": etag})
@@ -0,0 +1,168 @@
+import io
+import os
+import time
+import shutil
+import hashlib
+import tarfile
+import zstandard
+import orjson
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.utils.logger import Logger
+
+
+MANIFEST_NAME = "manifest.json"
+CHROMA_DIR_NAME = "chroma"
+
+
+class IndexArtifactError(Exception):
+    pass
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_checksums(folder: Path) -> Dict[str, str]:
+    return {
+        path.relative_to(folder).as_posix(): sha256_file(path)
+        for path in sorted(folder.rglob("*")) if path.is_file()
+    }
+
+
+def _files_match(folder: Path, checksums: Dict[str, str]) -> bool:
+    """Whether every file listed is in folder with its checksum; files added beside them
+    (SQLite -wal/-shm files Chroma keeps while a server has the index open) are not listed"""
+    return all(
+        (folder / name).is_file() and sha256_file(folder / name) == checksum
+        for name, checksum in checksums.items()
+    )
+
+
+def _write_json_atomic(path: Path, payload: Dict):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, path)
+
+
+class IndexArtifactStore:
+    """Versioned, checksummed vector index releases.
+
+    An artifact is ``<artifact_folder>/rag-index-<version>.tar.zst`` holding the
+    Chroma directory and its manifest, next to a ``.manifest.json`` sidecar that
+    also records the archive checksum. The sidecar is written last, so only
+    complete artifacts are ever listed. Installing unpacks a verified artifact
+    into ``<install_folder>/<version>/``, which servers open and never write to.
+    """
+
+    def __init__(self, artifact_folder: Path, install_folder: Path, compression_level: int = 10):
+        self.artifact_folder = Path(artifact_folder)
+        self.install_folder = Path(install_folder)
+        self.compression_level = compression_level
+
+    def _archive_path(self, version: str) -> Path:
+        return self.artifact_folder / f"rag-index-{version}.tar.zst"
+
+    def _sidecar_path(self, version: str) -> Path:
+        return self.artifact_folder / f"rag-index-{version}.manifest.json"
+
+    def versions(self) -> List[str]:
+        """Complete artifacts, oldest first"""
+        if not self.artifact_folder.exists():
+            return []
+        manifests = [self.read_manifest(path.name[len("rag-index-"):-len(".manifest.json")])
+                     for path in self.artifact_folder.glob("rag-index-*.manifest.json")]
+        return [manifest["version"] for manifest in sorted(manifests, key=lambda m: m["created_at"])]
+
+    def latest_version(self) -> Optional[str]:
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def read_manifest(self, version: str) -> Dict:
+        sidecar = self._sidecar_path(version)
+        if not sidecar.exists():
+            raise IndexArtifactError(f"Index artifact {version} not found in {self.artifact_folder}")
+        return orjson.loads(sidecar.read_bytes())
+
+    def package(self, chroma_folder: Path, version: str, manifest: Dict) -> Path:
+        """Compress a built Chroma directory into a new artifact"""
+        archive_path = self._archive_path(version)
+        if self._sidecar_path(version).exists():
+            raise IndexArtifactError(f"Index artifact {version} already exists")
+
+        self.artifact_folder.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            **manifest,
+            "version": version,
+            "created_at": time.time(),
+            "files": _file_checksums(chroma_folder)
+        }
+
+        tmp_path = archive_path.with_name(f".{archive_path.name}.tmp")
+        compressor = zstandard.ZstdCompressor(level=self.compression_level)
+        with open(tmp_path, "wb") as raw, compressor.stream_writer(raw) as compressed:
+            with tarfile.open(fileobj=compressed, mode="w|") as tar:
+                tar.add(str(chroma_folder), arcname=CHROMA_DIR_NAME)
+                manifest_bytes = orjson.dumps(manifest, option=orjson.OPT_INDENT_2)
+                info = tarfile.TarInfo(MANIFEST_NAME)
+                info.size = len(manifest_bytes)
+                info.mtime = int(manifest["created_at"])
+                tar.addfile(info, io.BytesIO(manifest_bytes))
+        os.replace(tmp_path, archive_path)
+
+        _write_json_atomic(self._sidecar_path(version), {
+            **manifest,
+            "artifact": archive_path.name,
+            "artifact_sha256": sha256_file(archive_path),
+            "artifact_bytes": archive_path.stat().st_size
+        })
+        return archive_path
+
+    def install(self, version: str) -> Tuple[Path, Dict]:
+        """Verify and unpack an artifact, reusing an earlier install only if its files still match; returns its Chroma directory and manifest"""
+        manifest = self.read_manifest(version)
+        target = self.install_folder / version
+        if (target / MANIFEST_NAME).exists():
+            if _files_match(target / CHROMA_DIR_NAME, manifest["files"]):
+                return target / CHROMA_DIR_NAME, manifest
+            # a damaged or edited install is moved aside and unpacked again from the artifact
+            Logger.log_info_message(f"Installed index {version} fails its checksums, reinstalling")
+            discarded = self.install_folder / f".{version}.{os.getpid()}.discarded"
+            try:
+                os.replace(target, discarded)
+            except FileNotFoundError:
+                # another worker moved it aside first
+                pass
+            shutil.rmtree(discarded, ignore_errors=True)
+
+        archive_path = self._archive_path(version)
+        if not archive_path.exists() or sha256_file(archive_path) != manifest["artifact_sha256"]:
+            raise IndexArtifactError(f"Index artifact {version} is missing or fails its checksum")
+
+        self.install_folder.mkdir(parents=True, exist_ok=True)
+        staging = self.install_folder / f".{version}.{os.getpid()}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            decompressor = zstandard.ZstdDecompressor()
+            with open(archive_path, "rb") as raw, decompressor.stream_reader(raw) as decompressed:
+                with tarfile.open(fileobj=decompressed, mode="r|") as tar:
+                    tar.extractall(staging, filter="data")
+
+            if _file_checksums(staging / CHROMA_DIR_NAME) != manifest["files"]:
+                raise IndexArtifactError(f"Index artifact {version} unpacked with mismatching files")
+
+            try:
+                os.replace(staging, target)
+            except OSError:
+                # another worker finished installing the same version first
+                if not (target / MANIFEST_NAME).exists():
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return target / CHROMA_DIR_NAME, manifest
+
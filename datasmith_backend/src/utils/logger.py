@@ -1,57 +1,139 @@
+import sys
+import random
+import orjson
 import traceback
+from pathlib import Path
 from loguru import logger
-from datetime import datetime
+from typing import Dict, Optional
+from src.utils.rotating_writer import RotatingZstdWriter
 from src.constants.environment_constants import EnvironmentConstants
 
 
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "INFO=0.1,DEBUG=0" into {"INFO": 0.1, "DEBUG": 0.0}"""
+    rates = {}
+    for part in spec.split(","):
+        if "=" in part:
+            level, rate = part.split("=", 1)
+            rates[level.strip().upper()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def _serialize_record(record: Dict) -> bytes:
+    """Runs on the writer thread, so traceback formatting stays off the request path"""
+    record["ts"] = record["ts"].isoformat()
+    exc = record.pop("exc", None)
+    if exc is not None:
+        record["exception"] = {
+            "type": type(exc).__name__,
+            "message": str(exc),
+            "traceback": "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+        }
+    return orjson.dumps(record, default=str, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def _console_format(record) -> str:
+    if "exc" in record["extra"]:
+        return "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | {message} | {extra[exc]!r}\n"
+    return "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | {message}\n"
+
+
 class Logger:
-    def __init__(self):
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        folder_path = EnvironmentConstants.LOG_FOLDER_PATH.value
+    _writer: Optional[RotatingZstdWriter] = None
+    _sink_id: Optional[int] = None
+    _sample_rates: Dict[str, float] = {}
+    _sampled_out = 0
+
+    @classmethod
+    def configure(cls):
+        """
+        install the structured JSON file pipeline; call once from the app lifespan
+        """
+        if cls._writer is not None:
+            return
+
         app_mode = EnvironmentConstants.APP_MODE.value
+        cls._sample_rates = _parse_sample_rates(EnvironmentConstants.LOG_SAMPLE_RATES.value)
+        cls._writer = RotatingZstdWriter(
+            folder=Path(EnvironmentConstants.LOG_FOLDER_PATH.value),
+            base_name="app",
+            serializer=_serialize_record,
+            max_bytes=EnvironmentConstants.LOG_MAX_BYTES.value,
+            queue_size=EnvironmentConstants.LOG_QUEUE_SIZE.value,
+            batch_size=EnvironmentConstants.LOG_BATCH_SIZE.value,
+            flush_interval=EnvironmentConstants.LOG_FLUSH_INTERVAL.value,
+            compression_level=EnvironmentConstants.LOG_COMPRESSION_LEVEL.value
+        )
+
+        logger.remove()
+        cls._sink_id = logger.add(
+            cls._json_sink,
+            level="INFO",
+            format="{message}",
+            filter=cls._sample,
+            backtrace=False,
+            diagnose=False,
+            catch=True,
+        )
+        if app_mode != "production":
+            logger.add(sys.stderr, level="INFO", format=_console_format, backtrace=False, diagnose=False)
+
+    @classmethod
+    def shutdown(cls):
+        """
+        flush queued records and stop the background writer
+        """
+        if cls._writer is not None:
+            logger.remove(cls._sink_id)
+            cls._writer.close()
+            cls._writer = None
+
+    @classmethod
+    def stats(cls) -> Dict:
+        stats = cls._writer.stats() if cls._writer else {}
+        stats["sampled_out"] = cls._sampled_out
+        return stats
 
-        if app_mode == "production":
-            logger.remove()
-            logger.add(
-                f"{folder_path}/{current_date}/file_info.log",
-                level="INFO",
-                filter=lambda record: record["level"].name in ["INFO"],
-                backtrace=False,
-                diagnose=False,
-                enqueue=True,
-            )
-            logger.add(
-                f"{folder_path}/{current_date}/file_error.log",
-                level="ERROR",
-                backtrace=False,
-                diagnose=False,
-                enqueue=True,
-            )
-        else:
-            logger.add(
-                f"{folder_path}/{current_date}/file_info.log",
-                level="INFO",
-                filter=lambda record: record["level"].name in ["INFO"],
-            )
-            logger.add(f"{folder_path}/{current_date}/file_error.log", level="ERROR")
+    @classmethod
+    def _sample(cls, record) -> bool:
+        # runs before loguru formats anything, so sampled-out records cost almost nothing
+        rate = cls._sample_rates.get(record["level"].name, 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        cls._sampled_out += 1
+        return False
+
+    @classmethod
+    def _json_sink(cls, message):
+        record = message.record
+        extra = record["extra"]
+        cls._writer.write({
+            "ts": record["time"],
+            "level": record["level"].name,
+            "message": record["message"],
+            "module": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "exc": extra.get("exc"),
+            "extra": {key: value for key, value in extra.items() if key != "exc"} or None,
+        })
 
     @staticmethod
     def log_info_message(log_message):
         """
         get info logs across application
         """
-        logger.info(log_message)
+        logger.opt(depth=1).info(log_message)
 
     @staticmethod
     def log_error_message(ex, log_message=""):
         """
         get error logs across application
         """
-        logger.error(log_message)
-
-        # use traceback for the stack frame in our code which we are interested in.
-        tb_str_full = "".join(traceback.format_exception(type(ex), ex, ex.__traceback__))
-        logger.error(f"Full traceback:\n{tb_str_full}")
+        if Logger._writer is None:
+            # not configured yet (e.g. during import-time tool init): let loguru print the traceback
+            logger.opt(depth=1, exception=ex).error(log_message)
+            return
 
-        # use logger.error() for full traceback including libraries
-        # logger.error(ex)
+        # the traceback is formatted later on the writer thread
+        logger.opt(depth=1).bind(exc=ex).error(log_message)
@@ -0,0 +1,164 @@
+import os
+import queue
+import threading
+import zstandard
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Callable, List, Optional
+
+
+_STOP = object()
+
+
+class RotatingZstdWriter:
+    """Append records to a file from a background thread.
+
+    Records are queued without blocking (they are dropped when the queue is
+    full), serialized and written in batches, and the active file is rotated
+    by size or date into ``<folder>/<YYYY-MM-DD>/`` as a zstd-compressed copy.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        base_name: str,
+        serializer: Callable[[Any], bytes],
+        max_bytes: int,
+        queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        compression_level: int = 3
+    ):
+        self.folder = Path(folder)
+        self.base_name = base_name
+        self.serializer = serializer
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compression_level = compression_level
+
+        self.active_path = self.folder / f"{base_name}.jsonl"
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._file_date: Optional[str] = None
+        self._file_size = 0
+
+        self.written = 0
+        self.dropped = 0
+        self.serialize_errors = 0
+        self.rotations = 0
+
+        self._rotate_stale_active_file()
+        self._thread = threading.Thread(target=self._run, name=f"{base_name}-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record: Any) -> bool:
+        """Queue a record without blocking; returns False if it was dropped"""
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued records and stop the writer thread"""
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "serialize_errors": self.serialize_errors,
+            "rotations": self.rotations
+        }
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(record is _STOP for record in batch)
+            self._write_batch([record for record in batch if record is not _STOP])
+
+            if stop:
+                self._close_file()
+                return
+
+    def _write_batch(self, batch: List[Any]):
+        if not batch:
+            return
+
+        chunks = []
+        for record in batch:
+            try:
+                chunks.append(self.serializer(record))
+            except Exception:
+                self.serialize_errors += 1
+        data = b"".join(chunks)
+
+        try:
+            today = datetime.now().strftime("%Y-%m-%d")
+            if self._file is not None and (self._file_date != today or self._file_size >= self.max_bytes):
+                self._rotate()
+            if self._file is None:
+                self._open(today)
+
+            self._file.write(data)
+            self._file.flush()
+            self._file_size += len(data)
+            self.written += len(chunks)
+        except OSError:
+            # A failing disk must never take the application down with it
+            self.dropped += len(chunks)
+
+    def _open(self, file_date: str):
+        self._file = open(self.active_path, "ab")
+        self._file_date = file_date
+        self._file_size = self._file.tell()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        file_date = self._file_date
+        self._close_file()
+        self._compress_active_file(file_date)
+
+    def _rotate_stale_active_file(self):
+        """Compress a leftover active file from a previous day before appending to it"""
+        if not self.active_path.exists():
+            return
+        file_date = datetime.fromtimestamp(self.active_path.stat().st_mtime).strftime("%Y-%m-%d")
+        if file_date != datetime.now().strftime("%Y-%m-%d"):
+            self._compress_active_file(file_date)
+
+    def _compress_active_file(self, file_date: str):
+        target_folder = self.folder / file_date
+        target_folder.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%H%M%S%f")
+        rotated_path = target_folder / f"{self.base_name}-{stamp}.jsonl"
+        os.replace(self.active_path, rotated_path)
+
+        compressor = zstandard.ZstdCompressor(level=self.compression_level)
+        with open(rotated_path, "rb") as source, open(f"{rotated_path}.zst", "wb") as target:
+            compressor.copy_stream(source, target)
+        rotated_path.unlink()
+        self.rotations += 1
@@ -0,0 +1,122 @@
+import orjson
+import functools
+from pathlib import Path
+from typing import Sequence
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
+from src.utils.rotating_writer import RotatingZstdWriter
+from src.constants.environment_constants import EnvironmentConstants
+
+
+# Until configure_tracing() installs a provider this is a no-op tracer
+tracer = trace.get_tracer("post-discharge-assistant")
+
+_provider = None
+
+
+def traced(name: str):
+    """Run the decorated function inside a span; attributes are set via trace.get_current_span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def mark_error(ex: Exception):
+    """Record a handled exception on the current span (unhandled ones are recorded automatically)"""
+    span = trace.get_current_span()
+    span.record_exception(ex)
+    span.set_status(Status(StatusCode.ERROR, type(ex).__name__))
+
+
+def _serialize_span(span) -> bytes:
+    """Runs on the writer thread"""
+    context = span.get_span_context()
+    return orjson.dumps({
+        "trace_id": f"{context.trace_id:032x}",
+        "span_id": f"{context.span_id:016x}",
+        "parent_id": f"{span.parent.span_id:016x}" if span.parent else None,
+        "name": span.name,
+        "start": span.start_time,
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+        "events": [
+            {"name": event.name, "attributes": dict(event.attributes or {})}
+            for event in span.events
+        ] or None
+    }, default=str, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def _file_exporter():
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class FileSpanExporter(SpanExporter):
+        """Queue finished spans for the rotating zstd writer; export never blocks a request"""
+
+        def __init__(self):
+            self.writer = RotatingZstdWriter(
+                folder=Path(EnvironmentConstants.TRACE_FOLDER_PATH.value),
+                base_name="traces",
+                serializer=_serialize_span,
+                max_bytes=EnvironmentConstants.LOG_MAX_BYTES.value,
+                queue_size=EnvironmentConstants.LOG_QUEUE_SIZE.value,
+                batch_size=EnvironmentConstants.LOG_BATCH_SIZE.value,
+                flush_interval=EnvironmentConstants.LOG_FLUSH_INTERVAL.value,
+                compression_level=EnvironmentConstants.LOG_COMPRESSION_LEVEL.value
+            )
+
+        def export(self, spans: Sequence) -> "SpanExportResult":
+            for span in spans:
+                self.writer.write(span)
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            self.writer.close()
+
+    return FileSpanExporter()
+
+
+def configure_tracing():
+    """Install the SDK tracer provider and exporter chosen by TRACE_EXPORTER; call once from the app lifespan"""
+    global _provider
+    exporter_name = EnvironmentConstants.TRACE_EXPORTER.value.lower()
+    if _provider is not None or exporter_name == "none":
+        return
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor, ConsoleSpanExporter
+
+    provider = TracerProvider(
+        resource=Resource.create({
+            "service.name": "post-discharge-assistant",
+            "deployment.environment": EnvironmentConstants.APP_MODE.value
+        }),
+        sampler=ParentBased(TraceIdRatioBased(EnvironmentConstants.TRACE_SAMPLE_RATIO.value))
+    )
+
+    if exporter_name == "console":
+        provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+    elif exporter_name == "otlp":
+        # endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    else:
+        # the file exporter only enqueues, so it can run inline on span end
+        provider.add_span_processor(SimpleSpanProcessor(_file_exporter()))
+
+    trace.set_tracer_provider(provider)
+    _provider = provider
+
+
+def shutdown_tracing():
+    """Flush and stop the exporters"""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
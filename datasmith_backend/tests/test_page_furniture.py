@@ -0,0 +1,67 @@
+from docling_core.types.doc.base import BoundingBox, Size
+from docling_core.types.doc.document import ContentLayer, DoclingDocument, ProvenanceItem
+from docling_core.types.doc.labels import DocItemLabel
+from src.tools.rag_tool import RAGTool
+
+
+PAGES = 8
+HEADER = "Kidney Care Handbook"
+DOSAGE = "Furosemide 20mg twice daily"
+
+
+def _add(document: DoclingDocument, page: int, label: DocItemLabel, text: str, furniture: bool = False):
+    prov = ProvenanceItem(page_no=page, bbox=BoundingBox(l=0, t=0, r=100, b=10), charspan=(0, len(text)))
+    document.add_text(
+        label=label,
+        text=text,
+        prov=prov,
+        content_layer=ContentLayer.FURNITURE if furniture else None
+    )
+
+
+def sample_document() -> DoclingDocument:
+    """A leaflet whose running header Docling missed on the last two pages, with body lines repeated on every page"""
+    document = DoclingDocument(name="sample")
+    for page in range(1, PAGES + 1):
+        document.add_page(page_no=page, size=Size(width=600, height=800))
+        if page <= PAGES - 2:
+            _add(document, page, DocItemLabel.PAGE_HEADER, HEADER, furniture=True)
+        else:
+            _add(document, page, DocItemLabel.TEXT, HEADER)
+        _add(document, page, DocItemLabel.TEXT, "Key points")
+        _add(document, page, DocItemLabel.TEXT, DOSAGE)
+        _add(document, page, DocItemLabel.TEXT, f"Page {page} explains how to keep fluid intake within limits.")
+        _add(document, page, DocItemLabel.PAGE_FOOTER, f"Page {page} of {PAGES}", furniture=True)
+    return document
+
+
+def test_page_texts_hold_only_furniture():
+    pages = RAGTool._page_texts(sample_document())
+    assert len(pages) == PAGES
+    assert all("Key points" not in page and DOSAGE not in page for page in pages)
+    assert sum(HEADER in page for page in pages) == PAGES - 2
+
+
+def test_only_headers_and_footers_are_stripped():
+    document = sample_document()
+    body = document.export_to_markdown()
+    assert body.count(HEADER) == 2
+
+    stripped, recurring = RAGTool._strip_page_furniture(document, body)
+
+    assert recurring == 2
+    assert HEADER not in stripped
+    assert stripped.count("Key points") == PAGES
+    assert stripped.count(DOSAGE) == PAGES
+    for page in range(1, PAGES + 1):
+        assert f"Page {page} explains how to keep fluid intake within limits." in stripped
+
+
+def test_body_only_document_is_left_alone():
+    document = DoclingDocument(name="plain")
+    for page in range(1, PAGES + 1):
+        document.add_page(page_no=page, size=Size(width=600, height=800))
+        _add(document, page, DocItemLabel.TEXT, "Key points")
+        _add(document, page, DocItemLabel.TEXT, DOSAGE)
+    body = document.export_to_markdown()
+    assert RAGTool._strip_page_furniture(document, body) == (body, 0)
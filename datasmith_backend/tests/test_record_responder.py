@@ -0,0 +1,87 @@
+import pytest
+from src.services.record_responder import RecordResponder
+
+
+PATIENT = {
+    "patient_name": "John Smith",
+    "discharge_date": "2024-01-15",
+    "primary_diagnosis": "Chronic Kidney Disease Stage 3",
+    "medications": ["Lisinopril 10mg daily", "Furosemide 20mg twice daily"],
+    "dietary_restrictions": "Low sodium (2g/day), fluid restriction (1.5L/day)",
+    "follow_up": "Nephrology clinic in 2 weeks",
+    "warning_signs": "Swelling, shortness of breath, decreased urine output",
+    "discharge_instructions": "Monitor blood pressure daily, weigh yourself daily"
+}
+
+# question -> record fields it looks up; an empty list leaves it to the clinical pipeline
+QUESTIONS = [
+    # lookups of the patient's own record
+    ("What are my medications?", ["medications"]),
+    ("Which medicines am I taking?", ["medications"]),
+    ("Remind me of my meds", ["medications"]),
+    ("Medications?", ["medications"]),
+    ("What is my diet?", ["dietary_restrictions"]),
+    ("What are my dietary restrictions?", ["dietary_restrictions"]),
+    ("How much water can I drink?", ["dietary_restrictions"]),
+    ("What can I eat?", ["dietary_restrictions"]),
+    ("Do I have any fluid restrictions?", ["dietary_restrictions"]),
+    ("When is my follow-up?", ["follow_up"]),
+    ("When is my next appointment?", ["follow_up"]),
+    ("When should I see the nephrologist?", ["follow_up"]),
+    ("What are my warning signs?", ["warning_signs"]),
+    ("What symptoms should I watch for?", ["warning_signs"]),
+    ("When should I call my doctor?", ["warning_signs"]),
+    ("What are my discharge instructions?", ["discharge_instructions"]),
+    ("What should I do at home?", ["discharge_instructions"]),
+    ("what’s my diet", ["dietary_restrictions"]),
+    ("what time is my follow up", ["follow_up"]),
+    ("How much salt can I have per day?", ["dietary_restrictions"]),
+    # open-ended questions that mention a record field
+    ("What should I do if I miss a dose of my medication?", []),
+    ("What are my pills for?", []),
+    ("What is my follow-up and my diet?", []),
+    ("Besides my medications, what is my diet?", []),
+    ("Can I have salt?", []),
+    ("I forgot to take my pills this morning", []),
+    ("What are the side effects of my medications?", []),
+    ("Can I take ibuprofen with my medications?", []),
+    ("Can I eat bananas on my diet?", []),
+    ("What is the Mediterranean diet?", []),
+    ("Why is my diet low in sodium?", []),
+    ("Is it okay to drink coffee?", []),
+    ("Should I change my follow-up appointment because I have a fever?", []),
+    ("Can I move my follow-up to next month?", []),
+    ("What are the warning signs of a heart attack?", []),
+    ("When should I call my doctor about my swelling?", []),
+    ("My legs are swollen, what should I do?", []),
+    ("What does chronic kidney disease mean?", []),
+    ("Hello", []),
+]
+
+
+@pytest.fixture(scope="module")
+def responder():
+    return RecordResponder()
+
+
+@pytest.mark.parametrize("question, fields", QUESTIONS)
+def test_match(responder, question, fields):
+    assert responder.match(question) == fields
+
+
+def test_answer_uses_the_record(responder):
+    result = responder.answer("What are my medications?", PATIENT)
+    assert result["fields"] == ["medications"]
+    assert "(2024-01-15)" in result["response"]
+    assert "- Furosemide 20mg twice daily" in result["response"]
+
+
+def test_answer_without_discharge_date(responder):
+    patient = {key: value for key, value in PATIENT.items() if key != "discharge_date"}
+    result = responder.answer("What is my diet?", patient)
+    assert result["response"].startswith("From your discharge record:")
+
+
+def test_missing_field_goes_to_the_pipeline(responder):
+    patient = {key: value for key, value in PATIENT.items() if key != "follow_up"}
+    assert responder.answer("When is my follow-up?", patient) is None
@@ -1,7 +1,9 @@
 import streamlit as st
 import requests
+import time
 import uuid
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configure page
 st.set_page_config(
@@ -13,6 +15,109 @@ st.set_page_config(
 # API endpoint - FIXED to match FastAPI routes
 API_BASE = "http://localhost:8000/api/v1/chat"
 
+# (connect, read) timeouts in seconds; clinical answers can take a while to generate
+LOOKUP_TIMEOUT = (3.05, 10)
+MESSAGE_TIMEOUT = (3.05, 120)
+
+# Only the most recent messages are rendered with expanders on every rerun
+HISTORY_WINDOW = 20
+
+# A busy backend (503) is retried once, after its Retry-After but never longer than this
+BUSY_RETRY_MAX_SECONDS = 10
+
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """One pooled keep-alive HTTP session shared by every rerun and browser tab"""
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, allowed_methods=["GET"], status_forcelist=[502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_patients() -> list:
+    response = get_http_session().get(f"{API_BASE}/patients", timeout=LOOKUP_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["patients"]
+
+
+@st.cache_data(show_spinner=False)
+def fetch_greeting() -> str:
+    response = get_http_session().get(f"{API_BASE}/greeting", timeout=LOOKUP_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["greeting"]
+
+
+def post_message(payload: dict) -> requests.Response:
+    """POST a chat message; when admission control sheds it (503), wait out Retry-After and try once more.
+
+    Messages are not retried by the pooled session, which only retries GETs.
+    """
+    response = get_http_session().post(f"{API_BASE}/message", json=payload, timeout=MESSAGE_TIMEOUT)
+    if response.status_code != 503:
+        return response
+    try:
+        wait = int(response.headers.get("Retry-After", 1))
+    except ValueError:
+        wait = 1
+    wait = min(max(wait, 1), BUSY_RETRY_MAX_SECONDS)
+    notice = st.empty()
+    notice.info(f"⏳ The assistant is busy, retrying in {wait} s...")
+    time.sleep(wait)
+    notice.empty()
+    return get_http_session().post(f"{API_BASE}/message", json=payload, timeout=MESSAGE_TIMEOUT)
+
+
+def format_sources(sources) -> str:
+    """Build the sources markdown once, when the reply arrives, instead of on every rerun"""
+    if not sources or not (sources.get("rag") or sources.get("web")):
+        return ""
+    lines = []
+    if sources.get("rag"):
+        lines.append("**Medical Knowledge Base:**")
+        lines.extend(f"- {source}" for source in sources["rag"][:2])
+    if sources.get("web"):
+        lines.append("**Web Search Results:**")
+        lines.extend(f"- [{result['title']}]({result['url']})" for result in sources["web"][:2])
+    return "\n".join(lines)
+
+
+def render_patient_data(data, expanded=False):
+    with st.expander("📄 Patient Discharge Information", expanded=expanded):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"**Discharge Date:** {data['discharge_date']}")
+            st.markdown(f"**Diagnosis:** {data['primary_diagnosis']}")
+            st.markdown(f"**Follow-up:** {data['follow_up']}")
+        with col2:
+            st.markdown("**Medications:**")
+            st.markdown("\n".join(f"- {med}" for med in data['medications']))
+
+
+def render_message(message, detailed=True, expanded=False):
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+        if not detailed:
+            return
+
+        # Show patient info on the message that identified the patient
+        if message.get("show_patient_data") and st.session_state.patient_data:
+            render_patient_data(st.session_state.patient_data, expanded=expanded)
+
+        if message.get("sources_md"):
+            with st.expander("📚 Sources"):
+                st.markdown(message["sources_md"])
+
+
+def render_patient_badge(placeholder):
+    data = st.session_state.patient_data
+    if data:
+        placeholder.success(f"✅ Patient Identified\n\n**Name:** {data['patient_name']}\n\n**Diagnosis:** {data['primary_diagnosis']}")
+
+
 # Initialize session state
 if "session_id" not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
@@ -20,6 +125,8 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "patient_data" not in st.session_state:
     st.session_state.patient_data = None
+if "patient_version" not in st.session_state:
+    st.session_state.patient_version = None
 if "conversation_started" not in st.session_state:
     st.session_state.conversation_started = False
 
@@ -30,185 +137,122 @@ st.markdown("---")
 # Sidebar with information
 with st.sidebar:
     st.header("ℹ️ System Information")
-    
+
     st.info("""
-    **Disclaimer:**  
-    This is an AI assistant for educational purposes only.  
+    **Disclaimer:**
+    This is an AI assistant for educational purposes only.
     Always consult healthcare professionals for medical advice.
     """)
-    
+
     st.markdown("### 🤖 Multi-Agent System")
     st.markdown("""
     - **Receptionist Agent**: Handles patient identification and general queries
     - **Clinical AI Agent**: Provides medical information using RAG and web search
     """)
-    
-    if st.session_state.patient_data:
-        st.success("✅ Patient Identified")
-        st.markdown(f"**Name:** {st.session_state.patient_data['patient_name']}")
-        st.markdown(f"**Diagnosis:** {st.session_state.patient_data['primary_diagnosis']}")
-    
+
+    # Placeholder so the badge can be filled in during the same run that identifies the patient
+    patient_badge = st.empty()
+    render_patient_badge(patient_badge)
+
     st.markdown("---")
-    
+
     # Reset button
     if st.button("🔄 Start New Conversation"):
         try:
-            requests.post(f"{API_BASE}/session/{st.session_state.session_id}/reset")
-        except:
+            get_http_session().post(
+                f"{API_BASE}/session/{st.session_state.session_id}/reset",
+                timeout=LOOKUP_TIMEOUT
+            )
+        except requests.exceptions.RequestException:
             pass
         st.session_state.session_id = str(uuid.uuid4())
         st.session_state.messages = []
         st.session_state.patient_data = None
+        st.session_state.patient_version = None
         st.session_state.conversation_started = False
         st.rerun()
-    
+
     # Test patients
     with st.expander("📋 Test Patients"):
-        st.markdown("""
-        Try these names:
-        - John Smith
-        - Mary Johnson
-        - Robert Williams
-        - Patricia Brown
-        - Michael Davis
-        """)
+        try:
+            st.markdown("Try these names:\n" + "\n".join(f"- {p['name']}" for p in fetch_patients()[:5]))
+        except requests.exceptions.RequestException:
+            st.markdown("Patient list unavailable.")
 
 # Main chat interface
 st.markdown("### 💬 Chat Interface")
 
-# Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
-        
-        # Show patient info if available
-        if message.get("patient_data") and message["role"] == "assistant":
-            with st.expander("📄 Patient Discharge Information"):
-                data = message["patient_data"]
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown(f"**Discharge Date:** {data['discharge_date']}")
-                    st.markdown(f"**Diagnosis:** {data['primary_diagnosis']}")
-                    st.markdown(f"**Follow-up:** {data['follow_up']}")
-                with col2:
-                    st.markdown(f"**Medications:**")
-                    for med in data['medications']:
-                        st.markdown(f"- {med}")
-        
-        # Show sources if available
-        if message.get("sources"):
-            sources = message["sources"]
-            if sources.get("rag") or sources.get("web"):
-                with st.expander("📚 Sources"):
-                    if sources.get("rag"):
-                        st.markdown("**Medical Knowledge Base:**")
-                        for source in sources["rag"][:2]:
-                            st.markdown(f"- {source}")
-                    if sources.get("web"):
-                        st.markdown("**Web Search Results:**")
-                        for result in sources["web"][:2]:
-                            st.markdown(f"- [{result['title']}]({result['url']})")
-
-# Start conversation automatically
+# Start conversation with the cached greeting; no request to /message needed
 if not st.session_state.conversation_started:
     try:
-        response = requests.post(
-            f"{API_BASE}/message",
-            json={
-                "message": "start",
-                "session_id": st.session_state.session_id
-            }
-        )
-        if response.status_code == 200:
-            data = response.json()
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": data["response"]
-            })
-            st.session_state.conversation_started = True
-            st.rerun()
-    except Exception as e:
+        st.session_state.messages.append({"role": "assistant", "content": fetch_greeting()})
+        st.session_state.conversation_started = True
+    except requests.exceptions.RequestException as e:
         st.error(f"Error connecting to backend: {e}")
         st.info(f"Make sure the backend server is running on {API_BASE}")
 
+# Display chat messages; older ones are hidden behind a toggle so each rerun costs the same
+messages = st.session_state.messages
+hidden = max(len(messages) - HISTORY_WINDOW, 0)
+if hidden and st.toggle(f"Show {hidden} earlier messages", key="show_earlier_messages"):
+    for message in messages[:hidden]:
+        render_message(message, detailed=False)
+for message in messages[hidden:]:
+    render_message(message)
+
 # Chat input
 if prompt := st.chat_input("Type your message here..."):
-    # Add user message to chat
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    
-    # Display user message
-    with st.chat_message("user"):
-        st.markdown(prompt)
-    
+    user_message = {"role": "user", "content": prompt}
+    st.session_state.messages.append(user_message)
+    render_message(user_message)
+
     # Get response from API
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                response = requests.post(
-                    f"{API_BASE}/message",
-                    json={
-                        "message": prompt,
-                        "session_id": st.session_state.session_id
-                    }
+    with st.spinner("Thinking..."):
+        try:
+            response = post_message({
+                "message": prompt,
+                "session_id": st.session_state.session_id,
+                "compact": True,
+                "patient_version": st.session_state.patient_version
+            })
+
+            if response.status_code == 200:
+                data = response.json()
+
+                # Patient data is only sent when it changes; keep the single latest copy
+                if data.get("patient_data"):
+                    st.session_state.patient_data = data["patient_data"]
+                    st.session_state.patient_version = data.get("patient_version")
+                    render_patient_badge(patient_badge)
+
+                assistant_message = {
+                    "role": "assistant",
+                    "content": data["response"],
+                    "agent": data.get("agent"),
+                    "show_patient_data": bool(data.get("patient_data")) and data.get("agent") == "receptionist",
+                    "sources_md": format_sources(data.get("sources"))
+                }
+                st.session_state.messages.append(assistant_message)
+
+                # Rendered once here; the next rerun picks it up from history
+                render_message(assistant_message, expanded=True)
+            elif response.status_code == 503:
+                retry_after = response.headers.get("Retry-After")
+                st.warning(
+                    "🚦 The assistant is busy right now. Please send your message again"
+                    + (f" in about {retry_after} s." if retry_after else " shortly.")
                 )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Display response
-                    st.markdown(data["response"])
-                    
-                    # Store patient data if received
-                    if data.get("patient_data"):
-                        st.session_state.patient_data = data["patient_data"]
-                    
-                    # Add assistant message to chat
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": data["response"],
-                        "agent": data.get("agent"),
-                        "patient_data": data.get("patient_data"),
-                        "sources": data.get("sources")
-                    })
-                    
-                    # Show patient info if just identified
-                    if data.get("patient_data") and data.get("agent") == "receptionist":
-                        with st.expander("📄 Patient Discharge Information", expanded=True):
-                            pdata = data["patient_data"]
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.markdown(f"**Discharge Date:** {pdata['discharge_date']}")
-                                st.markdown(f"**Diagnosis:** {pdata['primary_diagnosis']}")
-                                st.markdown(f"**Follow-up:** {pdata['follow_up']}")
-                            with col2:
-                                st.markdown(f"**Medications:**")
-                                for med in pdata['medications']:
-                                    st.markdown(f"- {med}")
-                    
-                    # Show sources if available
-                    if data.get("sources"):
-                        sources = data["sources"]
-                        if sources.get("rag") or sources.get("web"):
-                            with st.expander("📚 Sources"):
-                                if sources.get("rag"):
-                                    st.markdown("**Medical Knowledge Base:**")
-                                    for source in sources["rag"][:2]:
-                                        st.markdown(f"- {source}")
-                                if sources.get("web"):
-                                    st.markdown("**Web Search Results:**")
-                                    for result in sources["web"][:2]:
-                                        st.markdown(f"- [{result['title']}]({result['url']})")
-                    
-                    st.rerun()
-                else:
-                    st.error(f"Error: {response.status_code}")
-                    st.error(f"Response: {response.text}")
-            
-            except requests.exceptions.ConnectionError:
-                st.error(f"❌ Cannot connect to backend server")
-                st.info(f"Make sure the FastAPI server is running on http://localhost:8000")
-            except Exception as e:
-                st.error(f"Error communicating with backend: {e}")
+            else:
+                st.error(f"Error: {response.status_code}")
+                st.error(f"Response: {response.text}")
+
+        except requests.exceptions.ConnectionError:
+            st.error(f"❌ Cannot connect to backend server")
+            st.info(f"Make sure the FastAPI server is running on http://localhost:8000")
+        except requests.exceptions.Timeout:
+            st.error("⏱️ The assistant took too long to respond. Please try again.")
+        except Exception as e:
+            st.error(f"Error communicating with backend: {e}")
 
 # Footer
 st.markdown("---")
@@ -216,4 +260,4 @@ st.markdown("""
 <div style='text-align: center; color: gray;'>
     <small>Post-Discharge Medical AI Assistant POC | Built with FastAPI, LangChain & Streamlit</small>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)